@@ -1,3 +1,23 @@
-from .code_reviewer.reviewer import analyze_code_file, generate_report
+import importlib
 
-__all__ = ['analyze_code_file', 'generate_report'] 
\ No newline at end of file
+# Public names and the submodule that defines each, imported on first access
+# so `from applications import analyze_code_file` never loads numpy
+_EXPORTS = {
+    'analyze_code_file': 'code_reviewer.reviewer',
+    'generate_report': 'code_reviewer.reviewer',
+    'VectorStore': 'vector_store'
+}
+
+__all__ = ['analyze_code_file', 'generate_report', 'VectorStore']
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    # Cache on the package so later lookups skip __getattr__
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,43 @@
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+class ReviewStore:
+    """SQLite store of per-unit review results keyed by unit fingerprint."""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS reviews (
+                key TEXT PRIMARY KEY,
+                result TEXT NOT NULL,
+                updated REAL NOT NULL
+            )"""
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the stored result for key, or None."""
+        with self._lock:
+            row = self._conn.execute("SELECT result FROM reviews WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, key: str, result: Dict[str, Any]) -> None:
+        """Store the result for key, replacing any previous one."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO reviews (key, result, updated) VALUES (?, ?, ?)",
+                (key, json.dumps(result), time.time())
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
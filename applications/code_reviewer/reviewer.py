@@ -1,5 +1,7 @@
-from typing import Dict, List
+from typing import Any, Callable, Dict, List, Tuple
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
 from pathlib import Path
 
 # Add root directory to Python path
@@ -10,14 +12,58 @@ if root_dir not in sys.path:
 from basic_functions.code_function import code_function
 from basic_functions.debug_function import debug_function
 from basic_functions.string_function import string_function
+from basic_functions.metrics import instrument, in_context
+from applications.code_reviewer.units import Chunk, chunk_source, estimate_tokens
+from applications.code_reviewer.review_store import ReviewStore
+from config import OLLAMA_CONFIG, REVIEW_CONFIG
 
-def analyze_code_file(file_path: str) -> Dict[str, any]:
-    """Analyze a code file using LLM functions."""
-    with open(file_path, 'r') as f:
-        code = f.read()
-    
-    # Get optimized version
-    optimized = code_function("optimize", code)
+ISSUE_SECTIONS = ['analysis', 'root_cause', 'fix', 'prevention']
+
+def _timed(func: Callable[[], Any]):
+    """Run func and return (value, error, elapsed seconds)."""
+    started = time.perf_counter()
+    try:
+        return func(), None, time.perf_counter() - started
+    except Exception as e:
+        return None, e, time.perf_counter() - started
+
+def _run_stages(stages: Dict[str, Callable[[], Any]], timeout: float):
+    """
+    Run independent analysis stages concurrently.
+
+    Returns:
+        tuple: (results, timings, errors) dicts keyed by stage name
+    """
+    results, timings, errors = {}, {}, {}
+    executor = ThreadPoolExecutor(max_workers=len(stages))
+    started = time.perf_counter()
+    try:
+        futures = {name: executor.submit(in_context(_timed), func) for name, func in stages.items()}
+        for name, future in futures.items():
+            remaining = max(0.0, started + timeout - time.perf_counter())
+            try:
+                value, error, elapsed = future.result(timeout=remaining)
+            except TimeoutError:
+                errors[name] = f"Timed out after {timeout:g}s"
+                timings[name] = time.perf_counter() - started
+                continue
+            timings[name] = elapsed
+            if error is not None:
+                errors[name] = f"{type(error).__name__}: {error}"
+            else:
+                results[name] = value
+    finally:
+        # Don't block on stalled stages; their results are discarded
+        executor.shutdown(wait=False, cancel_futures=True)
+    timings['total'] = time.perf_counter() - started
+    return results, timings, errors
+
+def _review_source(code: str, file_path: str, stage_timeout: float, unit: str = None,
+                   context: str = None) -> Dict[str, any]:
+    """Run the optimize, issues and documentation stages on one piece of source."""
+    review_prompt = "Perform a comprehensive code review focusing on optimization, security, and best practices"
+    if context:
+        review_prompt += f"\nThe code is an excerpt; it relies on this surrounding code:\n{context}"
     
     # Get potential issues
     error_info = {
@@ -31,18 +77,148 @@ def analyze_code_file(file_path: str) -> Dict[str, any]:
             'review_type': 'static_analysis'
         }
     }
-    issues = debug_function(error_info, "Perform a comprehensive code review focusing on optimization, security, and best practices")
+    if unit:
+        error_info['variables']['unit'] = unit
     
-    # Generate documentation
-    docs = code_function("document", code)
+    results, timings, errors = _run_stages({
+        # Get optimized version
+        'optimized': lambda: code_function("optimize", code, context=context),
+        'issues': lambda: debug_function(error_info, review_prompt),
+        # Generate documentation
+        'documentation': lambda: code_function("document", code, context=context)
+    }, stage_timeout)
     
     return {
-        "original": code,
-        "optimized": optimized,
+        "optimized": results.get('optimized', f"# Optimization unavailable: {errors.get('optimized')}"),
+        "issues": results.get('issues', {
+            section: f"Unavailable: {errors.get('issues')}" for section in ISSUE_SECTIONS
+        }),
+        "documentation": results.get('documentation', f"# Documentation unavailable: {errors.get('documentation')}"),
+        "timings": timings,
+        "errors": errors
+    }
+
+def _merge_reviews(parts: List[Tuple[str, Dict[str, any]]]) -> Dict[str, any]:
+    """Combine per-unit reviews, in source order, into one analysis."""
+    def join(stage: str) -> str:
+        if len(parts) == 1:
+            return parts[0][1][stage]
+        return "\n\n".join(f"# --- {name} ---\n{review[stage]}" for name, review in parts)
+    
+    issues = {}
+    for section in ISSUE_SECTIONS:
+        findings = [
+            f"[{name}] {review['issues'][section]}" for name, review in parts
+            if review['issues'][section] != "No information provided"
+        ]
+        issues[section] = "\n".join(findings) or "No information provided"
+    
+    timings, errors = {}, {}
+    for name, review in parts:
+        for stage, elapsed in review.get('timings', {}).items():
+            timings[f"{name}/{stage}"] = elapsed
+        for stage, error in review.get('errors', {}).items():
+            errors[f"{name}/{stage}"] = error
+    
+    return {
+        "optimized": join('optimized'),
         "issues": issues,
-        "documentation": docs
+        "documentation": join('documentation'),
+        "timings": timings,
+        "errors": errors
     }
 
+def _get_store() -> ReviewStore:
+    """Open the review store configured in REVIEW_CONFIG."""
+    path = Path(REVIEW_CONFIG["store_path"])
+    if not path.is_absolute():
+        path = Path(root_dir) / path
+    return ReviewStore(path)
+
+def _review_chunks(chunks: List[Chunk], file_path: str, stage_timeout: float,
+                   store: ReviewStore = None) -> Dict[str, any]:
+    """
+    Review chunks in parallel and merge the results in source order.
+
+    With a store, chunks whose fingerprint already has a review reuse it and
+    only the rest are sent to the LLM.
+    """
+    started = time.perf_counter()
+    keys = [f"{OLLAMA_CONFIG['model']}:{chunk.fingerprint}" for chunk in chunks]
+    reviews = [store.get(key) for key in keys] if store else [None] * len(chunks)
+    changed = [i for i, review in enumerate(reviews) if review is None]
+    
+    with ThreadPoolExecutor(max_workers=REVIEW_CONFIG["max_parallel_units"]) as executor:
+        fresh = executor.map(
+            in_context(lambda i: _review_source(
+                chunks[i].source, file_path, stage_timeout, chunks[i].name, chunks[i].context
+            )),
+            changed
+        )
+        for i, review in zip(changed, fresh):
+            reviews[i] = review
+            # Only keep complete reviews so failed stages are retried next time
+            if store and not review['errors']:
+                store.set(keys[i], {
+                    key: review[key] for key in ('optimized', 'issues', 'documentation')
+                })
+    
+    analysis = _merge_reviews([
+        (f"{chunk.name} (lines {chunk.start}-{chunk.end})", review) for chunk, review in zip(chunks, reviews)
+    ])
+    analysis['timings']['total'] = time.perf_counter() - started
+    analysis['units'] = [
+        {
+            "name": chunk.name,
+            "kind": chunk.kind,
+            "lines": (chunk.start, chunk.end),
+            "fingerprint": chunk.fingerprint,
+            "cached": i not in changed
+        }
+        for i, chunk in enumerate(chunks)
+    ]
+    return analysis
+
+@instrument("analyze_code_file")
+def analyze_code_file(file_path: str, stage_timeout: float = None, incremental: bool = None) -> Dict[str, any]:
+    """
+    Analyze a code file using LLM functions.
+
+    The optimize, issues and documentation stages run concurrently. A stage
+    that fails or exceeds stage_timeout is reported in "errors" and replaced
+    with a placeholder, so the other stages still make it into the analysis.
+
+    A file larger than REVIEW_CONFIG["chunk_token_budget"] is split along
+    AST boundaries into chunks that fit the budget. Each chunk carries the
+    module imports (and its class header when a class is split) as context,
+    chunks are reviewed in parallel and the results are merged in source order.
+    
+    In incremental mode the file is split into top-level functions, classes
+    and module blocks. Only units whose normalized AST hash has no stored
+    review are sent to the LLM; the rest reuse earlier findings.
+    """
+    with open(file_path, 'r') as f:
+        code = f.read()
+    
+    stage_timeout = stage_timeout or REVIEW_CONFIG["stage_timeout"]
+    if incremental is None:
+        incremental = REVIEW_CONFIG["incremental"]
+    
+    token_budget = REVIEW_CONFIG["chunk_token_budget"]
+    
+    if incremental:
+        store = _get_store()
+        try:
+            analysis = _review_chunks(chunk_source(code, token_budget, pack=False), file_path, stage_timeout, store)
+        finally:
+            store.close()
+    elif estimate_tokens(code) > token_budget:
+        analysis = _review_chunks(chunk_source(code, token_budget), file_path, stage_timeout)
+    else:
+        analysis = _review_source(code, file_path, stage_timeout)
+    
+    return {"original": code, **analysis}
+
 def generate_report(analysis: Dict[str, any], output_format: str = "markdown") -> str:
     """Generate formatted report from analysis results."""
     report = f"""
@@ -70,6 +246,12 @@ def generate_report(analysis: Dict[str, any], output_format: str = "markdown") -
 ```
 """
     
+    if analysis.get('timings'):
+        report += "\n## Review Stages\n"
+        for stage, elapsed in analysis['timings'].items():
+            status = analysis.get('errors', {}).get(stage, "ok")
+            report += f"- {stage}: {elapsed:.2f}s ({status})\n"
+    
     if output_format != "markdown":
         report = string_function("convert_format", report)
     
@@ -77,10 +259,11 @@ def generate_report(analysis: Dict[str, any], output_format: str = "markdown") -
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
-        print("Usage: python reviewer.py <file_path>")
+        print("Usage: python reviewer.py <file_path> [--incremental]")
         sys.exit(1)
         
     file_path = sys.argv[1]
-    analysis = analyze_code_file(file_path)
+    # Without the flag, REVIEW_CONFIG["incremental"] decides
+    analysis = analyze_code_file(file_path, incremental=True if "--incremental" in sys.argv[2:] else None)
     report = generate_report(analysis)
-    print(report) 
\ No newline at end of file
+    print(report)
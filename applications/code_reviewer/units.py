@@ -0,0 +1,171 @@
+import ast
+import hashlib
+from typing import List, NamedTuple
+
+class CodeUnit(NamedTuple):
+    """A top-level slice of a source file reviewed as one piece."""
+    name: str
+    kind: str  # 'function', 'class' or 'module'
+    start: int  # First line, 1-based
+    end: int  # Last line, inclusive
+    source: str
+    fingerprint: str
+
+class Chunk(NamedTuple):
+    """One or more consecutive units sent to the LLM together."""
+    name: str
+    kind: str  # Unit kind, or 'group' for several packed units
+    start: int
+    end: int
+    source: str
+    context: str  # Imports and enclosing class header needed to read source
+    fingerprint: str
+
+def _fingerprint(nodes: List[ast.AST]) -> str:
+    """Hash the AST of nodes so formatting and comment changes keep the same fingerprint."""
+    normalized = "\n".join(ast.dump(node, annotate_fields=False, include_attributes=False) for node in nodes)
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+def _first_line(node: ast.AST) -> int:
+    """First line of a statement, including its decorators."""
+    return min([node.lineno] + [decorator.lineno for decorator in getattr(node, "decorator_list", [])])
+
+def _split_statements(statements: List[ast.stmt], lines: List[str], prefix: str = "") -> List[CodeUnit]:
+    """Group statements into function, class and module-level units."""
+    units = []
+    pending = []
+
+    def make_unit(name: str, kind: str, nodes: List[ast.AST]) -> CodeUnit:
+        start = min(_first_line(node) for node in nodes)
+        end = max(node.end_lineno for node in nodes)
+        return CodeUnit(prefix + name, kind, start, end, "".join(lines[start - 1:end]), _fingerprint(nodes))
+
+    def flush_pending():
+        if pending:
+            units.append(make_unit(f"<module:{pending[0].lineno}>", "module", pending))
+            pending.clear()
+
+    for node in statements:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            flush_pending()
+            units.append(make_unit(node.name, "function", [node]))
+        elif isinstance(node, ast.ClassDef):
+            flush_pending()
+            units.append(make_unit(node.name, "class", [node]))
+        else:
+            pending.append(node)
+    flush_pending()
+
+    return units
+
+def split_units(source: str) -> List[CodeUnit]:
+    """
+    Split Python source into top-level functions, classes and module-level blocks.
+
+    Consecutive statements that are not functions or classes (imports,
+    constants, __main__ blocks) are grouped into a single 'module' unit.
+    Source that does not parse is returned as one unit hashed by its text.
+
+    Args:
+        source (str): Python source code
+
+    Returns:
+        List[CodeUnit]: Units in source order
+    """
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        return [CodeUnit("<module>", "module", 1, source.count("\n") + 1, source,
+                         hashlib.sha256(source.encode("utf-8")).hexdigest())]
+
+    return _split_statements(tree.body, source.splitlines(keepends=True))
+
+def estimate_tokens(text: str, chars_per_token: float = 4.0) -> int:
+    """Rough token count for budgeting prompts."""
+    return int(len(text) / chars_per_token) + 1
+
+def _class_members(node: ast.ClassDef) -> List[ast.stmt]:
+    """Statements of a class body after its docstring."""
+    body = node.body
+    if body and isinstance(body[0], ast.Expr) and isinstance(body[0].value, ast.Constant) \
+            and isinstance(body[0].value.value, str):
+        return body[1:]
+    return body
+
+def chunk_source(source: str, token_budget: int, pack: bool = True, chars_per_token: float = 4.0) -> List[Chunk]:
+    """
+    Split source along AST boundaries into chunks that fit a token budget.
+
+    Top-level units are packed greedily into chunks. A class that does not fit
+    on its own is split into groups of members, each carrying the class header
+    as context. Every chunk also carries the module's imports as context. A
+    single function larger than the budget is kept whole.
+
+    Args:
+        source (str): Python source code
+        token_budget (int): Approximate tokens allowed per chunk, context included
+        pack (bool): Combine small units into one chunk; when False each unit
+            is its own chunk unless it has to be split
+        chars_per_token (float): Characters per token used for estimates
+
+    Returns:
+        List[Chunk]: Chunks in source order
+    """
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        unit = split_units(source)[0]
+        return [Chunk(unit.name, unit.kind, unit.start, unit.end, unit.source, "", unit.fingerprint)]
+
+    lines = source.splitlines(keepends=True)
+    import_nodes = [node for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+    imports = "".join("".join(lines[node.lineno - 1:node.end_lineno]) for node in import_nodes)
+
+    classes = {_first_line(node): node for node in tree.body if isinstance(node, ast.ClassDef)}
+
+    # Work items of (unit, context), with oversized classes expanded into their members
+    items = []
+    for unit in _split_statements(tree.body, lines):
+        members = _class_members(classes[unit.start]) if unit.kind == "class" else []
+        if members and estimate_tokens(imports + unit.source, chars_per_token) > token_budget:
+            header = "".join(lines[unit.start - 1:_first_line(members[0]) - 1])
+            for member in _split_statements(members, lines, prefix=f"{unit.name}."):
+                items.append((member, imports + header))
+        else:
+            items.append((unit, imports))
+
+    chunks = []
+    group = []
+
+    def flush_group():
+        if group:
+            context = group[0][1]
+            units = [unit for unit, _ in group]
+            # Don't repeat the imports for the chunk that already contains them
+            if import_nodes and units[0].start <= import_nodes[0].lineno and units[-1].end >= import_nodes[-1].end_lineno:
+                context = context[len(imports):]
+            if len(units) == 1:
+                chunks.append(Chunk(units[0].name, units[0].kind, units[0].start, units[0].end,
+                                    units[0].source, context, units[0].fingerprint))
+            else:
+                chunks.append(Chunk(
+                    f"{units[0].name}..{units[-1].name}",
+                    "group",
+                    units[0].start,
+                    units[-1].end,
+                    "".join(lines[units[0].start - 1:units[-1].end]),
+                    context,
+                    hashlib.sha256("".join(unit.fingerprint for unit in units).encode("utf-8")).hexdigest()
+                ))
+            group.clear()
+
+    for unit, context in items:
+        if group:
+            candidate = "".join(lines[group[0][0].start - 1:unit.end])
+            fits = estimate_tokens(context + candidate, chars_per_token) <= token_budget
+            if not pack or context != group[0][1] or not fits:
+                flush_group()
+        group.append((unit, context))
+    flush_group()
+
+    return chunks
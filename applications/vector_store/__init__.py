@@ -0,0 +1,3 @@
+from .store import VectorStore
+
+__all__ = ['VectorStore']
@@ -0,0 +1,342 @@
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+# Add root directory to Python path
+root_dir = str(Path(__file__).resolve().parent.parent.parent)
+if root_dir not in sys.path:
+    sys.path.append(root_dir)
+
+from basic_functions.embedding_function import embedding_function, batch_embedding_function
+from config import LOG_CONFIG
+
+# Configure logging
+logging.basicConfig(level=LOG_CONFIG["level"], format=LOG_CONFIG["format"])
+logger = logging.getLogger(__name__)
+
+# Row id marking a deleted vector awaiting compaction
+TOMBSTONE = -1
+
+class VectorStore:
+    """
+    Local vector index over embedding_function output.
+
+    Vectors are L2-normalised float32 rows in a memory-mapped file, so opening
+    a large store does not read it into RAM. Row ids live in a parallel int64
+    memmap and texts/metadata in SQLite. Deletes leave tombstones that
+    compact() removes.
+
+    Layout of a store directory:
+        vectors.f32    capacity x dim float32 rows
+        ids.i64        capacity int64 item ids (TOMBSTONE for deleted rows)
+        items.sqlite3  id -> row, text and JSON metadata
+    """
+
+    def __init__(self, path: str, dim: int = None, search_block: int = 65536):
+        if dim is not None and dim < 1:
+            raise ValueError(f"Vector dimension must be at least 1, got {dim}")
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.search_block = search_block
+        self._lock = threading.RLock()
+
+        self._db = sqlite3.connect(str(self.path / "items.sqlite3"), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS items (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                row INTEGER NOT NULL,
+                text TEXT,
+                metadata TEXT
+            )"""
+        )
+        self._db.execute("CREATE TABLE IF NOT EXISTS info (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        self._db.commit()
+
+        self.dim = self._get_info("dim") or dim
+        if dim and self._get_info("dim") is None:
+            # Record it now so the store reopens without being told its dimension
+            self._set_info("dim", dim)
+            self._db.commit()
+        self.count = self._get_info("count") or 0
+        self._vectors = None
+        self._ids = None
+        if self.dim:
+            self._open_arrays()
+
+    def _get_info(self, key: str) -> Optional[int]:
+        row = self._db.execute("SELECT value FROM info WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_info(self, key: str, value: int) -> None:
+        self._db.execute("INSERT OR REPLACE INTO info (key, value) VALUES (?, ?)", (key, int(value)))
+
+    @property
+    def capacity(self) -> int:
+        return 0 if self._ids is None else len(self._ids)
+
+    def _open_arrays(self, capacity: int = 0) -> None:
+        """Map the vector and id files, growing them to at least capacity rows."""
+        vectors_path = self.path / "vectors.f32"
+        ids_path = self.path / "ids.i64"
+        row_bytes = self.dim * 4
+
+        current = vectors_path.stat().st_size // row_bytes if vectors_path.exists() else 0
+        capacity = max(capacity, current, 1)
+        if capacity > current:
+            with open(vectors_path, "ab") as f:
+                f.truncate(capacity * row_bytes)
+            with open(ids_path, "ab") as f:
+                f.truncate(capacity * 8)
+
+        self._vectors = np.memmap(vectors_path, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+        self._ids = np.memmap(ids_path, dtype=np.int64, mode="r+", shape=(capacity,))
+
+    def _ensure_capacity(self, rows: int) -> None:
+        """Grow the memory-mapped files geometrically to fit rows entries."""
+        if rows <= self.capacity:
+            return
+        new_capacity = max(rows, self.capacity * 2)
+        self.flush()
+        self._vectors = None
+        self._ids = None
+        self._open_arrays(new_capacity)
+
+    def add(self, texts: Iterable[str], metadatas: Iterable[Dict[str, Any]] = None, **embedding_kwargs) -> List[int]:
+        """
+        Embed texts through batch_embedding_function and append them.
+
+        Args:
+            texts (Iterable[str]): Texts to index
+            metadatas (Iterable[Dict[str, Any]], optional): One metadata dict per text
+            **embedding_kwargs: Extra arguments for batch_embedding_function
+
+        Returns:
+            List[int]: Ids assigned to the new items
+        """
+        texts = list(texts)
+        if not texts:
+            return []
+        vectors = batch_embedding_function(texts, normalize=True, **embedding_kwargs)
+        return self.add_vectors(vectors, texts, metadatas)
+
+    def add_vectors(self, vectors: np.ndarray, texts: Iterable[str] = None,
+                    metadatas: Iterable[Dict[str, Any]] = None) -> List[int]:
+        """
+        Append precomputed vectors.
+
+        Args:
+            vectors (np.ndarray): Matrix of shape (n, dim)
+            texts (Iterable[str], optional): Source text per vector
+            metadatas (Iterable[Dict[str, Any]], optional): Metadata per vector
+
+        Returns:
+            List[int]: Ids assigned to the new items; empty when there are no vectors
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim == 1:
+            vectors = vectors[None, :]
+        n = len(vectors)
+        if n == 0 or vectors.shape[1] == 0:
+            return []
+        texts = list(texts) if texts is not None else [None] * n
+        metadatas = list(metadatas) if metadatas is not None else [None] * n
+        if len(texts) != n or len(metadatas) != n:
+            raise ValueError("texts and metadatas must match the number of vectors")
+
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        vectors = vectors / norms
+
+        with self._lock:
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+                self._set_info("dim", self.dim)
+                self._open_arrays(n)
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"Expected vectors of dimension {self.dim}, got {vectors.shape[1]}")
+
+            start = self.count
+            self._ensure_capacity(start + n)
+
+            ids = []
+            for offset, (text, metadata) in enumerate(zip(texts, metadatas)):
+                cursor = self._db.execute(
+                    "INSERT INTO items (row, text, metadata) VALUES (?, ?, ?)",
+                    (start + offset, text, json.dumps(metadata) if metadata is not None else None)
+                )
+                ids.append(cursor.lastrowid)
+
+            self._vectors[start:start + n] = vectors
+            self._ids[start:start + n] = ids
+            self.count = start + n
+            self._set_info("count", self.count)
+            self._db.commit()
+
+        logger.info(f"Added {n} vectors to store at {self.path}")
+        return ids
+
+    def delete(self, ids: Iterable[int]) -> int:
+        """
+        Remove items by id. Their rows are tombstoned until compact() runs.
+
+        Args:
+            ids (Iterable[int]): Ids to delete
+
+        Returns:
+            int: Number of items deleted
+        """
+        ids = list(ids)
+        rows = []
+        with self._lock:
+            # Stay under SQLite's bound-parameter limit
+            for begin in range(0, len(ids), 900):
+                chunk = ids[begin:begin + 900]
+                placeholders = ",".join("?" * len(chunk))
+                rows.extend(row for (row,) in self._db.execute(
+                    f"SELECT row FROM items WHERE id IN ({placeholders})", chunk
+                ))
+                self._db.execute(f"DELETE FROM items WHERE id IN ({placeholders})", chunk)
+            if rows:
+                self._ids[np.asarray(rows, dtype=np.int64)] = TOMBSTONE
+            self._db.commit()
+        return len(rows)
+
+    def compact(self) -> int:
+        """
+        Rewrite the arrays without tombstoned rows.
+
+        Returns:
+            int: Number of rows reclaimed
+        """
+        with self._lock:
+            if self._ids is None:
+                return 0
+            live = np.flatnonzero(self._ids[:self.count] != TOMBSTONE)
+            reclaimed = self.count - len(live)
+            if reclaimed == 0:
+                return 0
+
+            # Move live rows down block by block so the whole store never sits in RAM
+            write = 0
+            for begin in range(0, len(live), self.search_block):
+                rows = live[begin:begin + self.search_block]
+                self._vectors[write:write + len(rows)] = self._vectors[rows]
+                self._ids[write:write + len(rows)] = self._ids[rows]
+                write += len(rows)
+
+            self._db.executemany(
+                "UPDATE items SET row = ? WHERE id = ?",
+                ((row, int(item_id)) for row, item_id in enumerate(self._ids[:write]))
+            )
+            self.count = write
+            self._set_info("count", self.count)
+            self._db.commit()
+            self.flush()
+
+        logger.info(f"Compacted store at {self.path}, reclaimed {reclaimed} rows")
+        return reclaimed
+
+    def search(self, query, k: int = 5) -> List[Dict[str, Any]]:
+        """
+        Return the k items most similar to query by cosine similarity.
+
+        Args:
+            query (Union[str, np.ndarray]): Query text (embedded with embedding_function) or vector
+            k (int): Number of results
+
+        Returns:
+            List[Dict[str, Any]]: Results with id, score, text and metadata, best first;
+                empty when k < 1
+        """
+        if k < 1:
+            return []
+        if isinstance(query, str):
+            query = embedding_function(query)
+        query = np.asarray(query, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+
+        with self._lock:
+            if self.count == 0:
+                return []
+            best_scores = np.empty(0, dtype=np.float32)
+            best_ids = np.empty(0, dtype=np.int64)
+
+            for begin in range(0, self.count, self.search_block):
+                end = min(begin + self.search_block, self.count)
+                scores = np.asarray(self._vectors[begin:end]) @ query
+                ids = np.asarray(self._ids[begin:end])
+                scores[ids == TOMBSTONE] = -np.inf
+
+                if len(scores) > k:
+                    top = np.argpartition(scores, -k)[-k:]
+                    scores, ids = scores[top], ids[top]
+                best_scores = np.concatenate([best_scores, scores])
+                best_ids = np.concatenate([best_ids, ids])
+                if len(best_scores) > k:
+                    top = np.argpartition(best_scores, -k)[-k:]
+                    best_scores, best_ids = best_scores[top], best_ids[top]
+
+            order = np.argsort(-best_scores)
+            hits = [(int(best_ids[i]), float(best_scores[i])) for i in order if best_ids[i] != TOMBSTONE]
+
+        items = self.get_many([item_id for item_id, _ in hits])
+        return [dict(items[item_id], score=score) for item_id, score in hits if item_id in items]
+
+    def get(self, item_id: int) -> Optional[Dict[str, Any]]:
+        """Return the text and metadata stored for an id, or None."""
+        return self.get_many([item_id]).get(item_id)
+
+    def get_many(self, ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """Return stored text and metadata for several ids at once."""
+        rows = []
+        with self._lock:
+            # Stay under SQLite's bound-parameter limit
+            for begin in range(0, len(ids), 900):
+                chunk = ids[begin:begin + 900]
+                placeholders = ",".join("?" * len(chunk))
+                rows.extend(self._db.execute(
+                    f"SELECT id, text, metadata FROM items WHERE id IN ({placeholders})", chunk
+                ))
+        return {
+            item_id: {"id": item_id, "text": text, "metadata": json.loads(metadata) if metadata else None}
+            for item_id, text, metadata in rows
+        }
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+
+    def flush(self) -> None:
+        """Write memory-mapped changes back to disk."""
+        if self._vectors is not None:
+            self._vectors.flush()
+            self._ids.flush()
+
+    def close(self) -> None:
+        """Flush and release the mapped files and database."""
+        with self._lock:
+            self.flush()
+            self._vectors = None
+            self._ids = None
+            self._db.close()
+
+if __name__ == "__main__":
+    store_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(root_dir, ".cache", "vector_store")
+    store = VectorStore(store_path)
+    store.add(
+        ["The quick brown fox jumps over the lazy dog", "Machine learning is fascinating"],
+        [{"source": "showcase"}, {"source": "showcase"}]
+    )
+    for result in store.search("artificial intelligence", k=2):
+        print(f"{result['score']:.3f}  {result['text']}")
+    store.close()
@@ -1,10 +1,58 @@
-from .math_function import math_function
-from .string_function import string_function
-from .code_function import code_function
-from .embedding_function import embedding_function
-from .vision_function import vision_function
-from .web_function import web_function
-from .debug_function import debug_function
+import importlib
+import sys
+import types
+
+# Public names and the submodule that defines each. Submodules are imported on
+# first attribute access, so `from basic_functions import math_function` never
+# loads bs4, Pillow or numpy, and openai only loads once a request is made.
+_EXPORTS = {
+    'math_function': 'math_function',
+    'amath_function': 'math_function',
+    'batch_math_function': 'math_function',
+    'string_function': 'string_function',
+    'astring_function': 'string_function',
+    'register_operation': 'string_function',
+    'get_path_stats': 'string_function',
+    'code_function': 'code_function',
+    'acode_function': 'code_function',
+    'code_function_stream': 'code_function',
+    'embedding_function': 'embedding_function',
+    'aembedding_function': 'embedding_function',
+    'batch_embedding_function': 'embedding_function',
+    'abatch_embedding_function': 'embedding_function',
+    'vision_function': 'vision_function',
+    'avision_function': 'vision_function',
+    'web_function': 'web_function',
+    'aweb_function': 'web_function',
+    'web_function_stream': 'web_function',
+    'batch_web_function': 'web_function',
+    'abatch_web_function': 'web_function',
+    'debug_function': 'debug_function',
+    'adebug_function': 'debug_function',
+    'get_client': 'client',
+    'get_async_client': 'client',
+    'close_clients': 'client',
+    'aclose_clients': 'client',
+    'reset_clients': 'client',
+    'get_cache': 'cache',
+    'close_cache': 'cache',
+    'bypass_cache': 'cache',
+    'get_coalescing_stats': 'singleflight',
+    'get_microbatch_stats': 'microbatch',
+    'get_concurrency_stats': 'limiter',
+    'get_hedging_stats': 'hedging',
+    'get_cascade_stats': 'cascade',
+    'get_budget_stats': 'budget',
+    'warmup': 'warmup',
+    'get_warmup_report': 'warmup',
+    'loaded_models': 'warmup',
+    'start_keepalive': 'warmup',
+    'stop_keepalive': 'warmup',
+    'get_metrics': 'metrics',
+    'render_prometheus': 'metrics',
+    'reset_metrics': 'metrics',
+    'start_metrics_server': 'metrics'
+}
 
 __all__ = [
     'math_function',
@@ -13,5 +61,76 @@ __all__ = [
     'embedding_function',
     'vision_function',
     'web_function',
-    'debug_function'
-] 
\ No newline at end of file
+    'debug_function',
+    'amath_function',
+    'astring_function',
+    'acode_function',
+    'aembedding_function',
+    'avision_function',
+    'aweb_function',
+    'adebug_function',
+    'batch_embedding_function',
+    'abatch_embedding_function',
+    'batch_math_function',
+    'batch_web_function',
+    'abatch_web_function',
+    'code_function_stream',
+    'web_function_stream',
+    'register_operation',
+    'get_path_stats',
+    'get_client',
+    'get_async_client',
+    'close_clients',
+    'aclose_clients',
+    'reset_clients',
+    'get_cache',
+    'close_cache',
+    'bypass_cache',
+    'get_coalescing_stats',
+    'get_microbatch_stats',
+    'get_concurrency_stats',
+    'get_hedging_stats',
+    'get_cascade_stats',
+    'get_budget_stats',
+    'warmup',
+    'get_warmup_report',
+    'loaded_models',
+    'start_keepalive',
+    'stop_keepalive',
+    'get_metrics',
+    'render_prometheus',
+    'reset_metrics',
+    'start_metrics_server'
+]
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    # Cache on the package so later lookups skip __getattr__
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
+class _LazyPackage(types.ModuleType):
+    def __setattr__(self, name, value):
+        # Importing basic_functions.math_function binds the submodule on the package
+        # under its own name; keep the function of that name there instead
+        if isinstance(value, types.ModuleType) and _EXPORTS.get(name) == name \
+                and value.__name__ == f"{__name__}.{name}" and hasattr(value, name):
+            value = getattr(value, name)
+        super().__setattr__(name, value)
+
+sys.modules[__name__].__class__ = _LazyPackage
+
+from config import WARMUP_CONFIG as _WARMUP_CONFIG
+
+if _WARMUP_CONFIG["on_startup"]:
+    from .warmup import warmup as _warmup, start_keepalive as _start_keepalive
+
+    _warmup(background=True)
+    if _WARMUP_CONFIG["refresh_interval"]:
+        _start_keepalive()
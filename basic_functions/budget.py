@@ -0,0 +1,158 @@
+import logging
+import math
+import sys
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional
+
+# Add root directory to Python path
+root_dir = str(Path(__file__).resolve().parent.parent)
+if root_dir not in sys.path:
+    sys.path.append(root_dir)
+
+from config import BUDGET_CONFIG, LOG_CONFIG
+from basic_functions import metrics
+
+# Configure logging
+logging.basicConfig(level=LOG_CONFIG["level"], format=LOG_CONFIG["format"])
+logger = logging.getLogger(__name__)
+
+class _History:
+    """Recent completion lengths of one function/operation/model and the budget learned from them."""
+    __slots__ = ("lengths", "budget", "truncated")
+
+    def __init__(self):
+        self.lengths: Deque[int] = deque(maxlen=BUDGET_CONFIG["window"])
+        self.budget: Optional[int] = None
+        self.truncated = 0
+
+class TokenBudgets:
+    """
+    Output token limits per function agent, operation and model.
+
+    Stop sequences come from BUDGET_CONFIG["stop"]. max_tokens is learned:
+    once min_samples completions are known it is their `percentile` length
+    times `margin`, clamped to [min_tokens, max_tokens]. Before that, only
+    the max_tokens ceiling applies, if one is set. A response cut off by a
+    learned budget is reported and retried under the ceiling, so callers
+    never receive output truncated by a guess.
+    """
+
+    def __init__(self):
+        self._history: Dict[metrics.Labels, _History] = {}
+        self._lock = threading.Lock()
+
+    def _stop(self, labels: metrics.Labels) -> Optional[List[str]]:
+        values = dict(labels)
+        stops = BUDGET_CONFIG["stop"]
+        # "function.operation" overrides "function"
+        return stops.get(f"{values['function']}.{values['operation']}", stops.get(values["function"]))
+
+    def limits(self, labels: metrics.Labels, kwargs: Dict[str, Any], learned: bool = True) -> Dict[str, Any]:
+        """
+        Return max_tokens and stop arguments for a request the caller hasn't limited itself.
+
+        Args:
+            labels (metrics.Labels): Labels of the calling function agent
+            kwargs (Dict[str, Any]): Arguments the caller passed to the completion
+            learned (bool): Use the learned budget; False only applies the ceiling,
+                for requests that can't be retried such as streams
+
+        Returns:
+            Dict[str, Any]: Extra chat.completions.create arguments
+        """
+        if not BUDGET_CONFIG["enabled"]:
+            return {}
+        limits: Dict[str, Any] = {}
+        if "stop" not in kwargs:
+            stop = self._stop(labels)
+            if stop:
+                limits["stop"] = list(stop)
+        if "max_tokens" not in kwargs:
+            with self._lock:
+                history = self._history.get(labels)
+                budget = history.budget if history is not None and learned else None
+            budget = budget or BUDGET_CONFIG["max_tokens"]
+            if budget:
+                limits["max_tokens"] = budget
+        return limits
+
+    def observe(self, labels: metrics.Labels, limits: Dict[str, Any], completion: Any) -> bool:
+        """
+        Learn from a completion and report whether it was truncated.
+
+        Args:
+            labels (metrics.Labels): Labels of the calling function agent
+            limits (Dict[str, Any]): Arguments limits() added to the request
+            completion (Any): The chat completion response
+
+        Returns:
+            bool: True if a learned budget cut the response off and it should
+                be retried under the ceiling
+        """
+        if not BUDGET_CONFIG["enabled"]:
+            return False
+        truncated = completion.choices[0].finish_reason == "length"
+        tokens = getattr(completion.usage, "completion_tokens", None) if completion.usage is not None else None
+        learned = "max_tokens" in limits and limits["max_tokens"] != BUDGET_CONFIG["max_tokens"]
+
+        with self._lock:
+            history = self._history.get(labels)
+            if history is None:
+                history = self._history[labels] = _History()
+            if truncated:
+                history.truncated += 1
+            # A cut-off length is only a lower bound; the retry records the real one
+            if tokens and not (truncated and learned):
+                history.lengths.append(tokens)
+                if len(history.lengths) >= BUDGET_CONFIG["min_samples"]:
+                    history.budget = self._learn(history.lengths)
+            budget = history.budget
+
+        if truncated:
+            limit = limits.get("max_tokens")
+            logger.warning(f"Response truncated at max_tokens={limit} for {dict(labels)}")
+            metrics.record_truncation(labels, "learned" if learned else "ceiling")
+        if budget is not None:
+            metrics.set_gauge("llm_output_token_budget", budget, labels)
+        return truncated and learned and BUDGET_CONFIG["retry_truncated"]
+
+    def _learn(self, lengths: Deque[int]) -> int:
+        ordered = sorted(lengths)
+        index = min(len(ordered) - 1, int(BUDGET_CONFIG["percentile"] * len(ordered)))
+        budget = max(BUDGET_CONFIG["min_tokens"], math.ceil(ordered[index] * BUDGET_CONFIG["margin"]))
+        ceiling = BUDGET_CONFIG["max_tokens"]
+        return min(budget, ceiling) if ceiling else budget
+
+    def retry_limits(self, limits: Dict[str, Any]) -> Dict[str, Any]:
+        """Limits for retrying a truncated request: the same stops, with only the ceiling."""
+        retry = {key: value for key, value in limits.items() if key != "max_tokens"}
+        if BUDGET_CONFIG["max_tokens"]:
+            retry["max_tokens"] = BUDGET_CONFIG["max_tokens"]
+        return retry
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            result = {}
+            for labels, history in self._history.items():
+                values = dict(labels)
+                result[f"{values['function']}/{values['operation']}/{values['model']}"] = {
+                    "budget": history.budget,
+                    "samples": len(history.lengths),
+                    "max_seen": max(history.lengths, default=None),
+                    "truncated": history.truncated,
+                }
+            return result
+
+# Shared by every chat completion
+budgets = TokenBudgets()
+
+def get_budget_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Return the learned output token budget, sample count, longest output and truncations per function/operation/model.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Stats keyed by "function/operation/model"
+    """
+    return budgets.stats()
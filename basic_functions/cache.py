@@ -0,0 +1,196 @@
+import contextvars
+import hashlib
+import json
+import logging
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Add root directory to Python path
+root_dir = str(Path(__file__).resolve().parent.parent)
+if root_dir not in sys.path:
+    sys.path.append(root_dir)
+
+from config import CACHE_CONFIG, LOG_CONFIG
+
+# Configure logging
+logging.basicConfig(level=LOG_CONFIG["level"], format=LOG_CONFIG["format"])
+logger = logging.getLogger(__name__)
+
+# Set by bypass_cache() to skip the cache for the current context
+_bypass = contextvars.ContextVar("bypass_cache", default=False)
+
+class ResponseCache:
+    """
+    SQLite-backed cache of chat completion responses.
+
+    Entries expire after a TTL and the least recently used entries are evicted
+    once the cache grows past max_entries or max_bytes.
+    """
+
+    def __init__(self, path: str, max_entries: int = 10000, max_bytes: int = None, ttl: float = None):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                accessed REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(model: str, messages: List[Dict[str, Any]], temperature: float, **params) -> str:
+        """Hash the model, messages, temperature and extra request parameters."""
+        payload = json.dumps(
+            {"model": model, "messages": messages, "temperature": temperature, "params": params},
+            sort_keys=True,
+            separators=(",", ":"),
+            default=str
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for key, or None on a miss."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None or (self.ttl is not None and now - row[1] > self.ttl):
+                if row is not None:
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._conn.commit()
+                self.misses += 1
+                return None
+
+            self._conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def set(self, key: str, value: str) -> None:
+        """Store a response and evict old entries if the cache is over its limits."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value.encode("utf-8")), now, now)
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now: float) -> None:
+        """Drop expired entries, then least recently used ones until within limits."""
+        if self.ttl is not None:
+            self._conn.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,))
+
+        count, total = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+
+        if self.max_entries is not None and count > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY accessed LIMIT ?)",
+                (count - self.max_entries,)
+            )
+            count, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+
+        if self.max_bytes is not None and total > self.max_bytes:
+            excess = total - self.max_bytes
+            freed = 0
+            stale = []
+            for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY accessed"):
+                stale.append((key,))
+                freed += size
+                if freed >= excess:
+                    break
+            self._conn.executemany("DELETE FROM responses WHERE key = ?", stale)
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters and current cache size."""
+        with self._lock:
+            count, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        return {"hits": self.hits, "misses": self.misses, "entries": count, "bytes": total}
+
+    def clear(self) -> None:
+        """Remove every entry and reset the counters."""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+            self.hits = 0
+            self.misses = 0
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+def get_cache() -> Optional[ResponseCache]:
+    """
+    Return the shared response cache, or None if caching is disabled or bypassed.
+
+    Returns:
+        Optional[ResponseCache]: Cache configured from CACHE_CONFIG
+    """
+    global _cache
+    if not CACHE_CONFIG["enabled"] or _bypass.get():
+        return None
+
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                path = Path(CACHE_CONFIG["path"])
+                if not path.is_absolute():
+                    path = Path(root_dir) / path
+                logger.info(f"Opening response cache at {path}")
+                _cache = ResponseCache(
+                    path,
+                    max_entries=CACHE_CONFIG["max_entries"],
+                    max_bytes=CACHE_CONFIG["max_bytes"],
+                    ttl=CACHE_CONFIG["ttl"]
+                )
+    return _cache
+
+def close_cache() -> None:
+    """Close the shared cache so the next call reopens it from CACHE_CONFIG."""
+    global _cache
+    with _cache_lock:
+        if _cache is not None:
+            _cache.close()
+            _cache = None
+
+@contextmanager
+def bypass_cache():
+    """Skip the response cache for every call made inside this block."""
+    token = _bypass.set(True)
+    try:
+        yield
+    finally:
+        _bypass.reset(token)
@@ -0,0 +1,150 @@
+import logging
+import sys
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+# Add root directory to Python path
+root_dir = str(Path(__file__).resolve().parent.parent)
+if root_dir not in sys.path:
+    sys.path.append(root_dir)
+
+from config import OLLAMA_CONFIG, LOG_CONFIG
+from basic_functions.completion import chat_completion, achat_completion
+from basic_functions import metrics
+
+# Configure logging
+logging.basicConfig(level=LOG_CONFIG["level"], format=LOG_CONFIG["format"])
+logger = logging.getLogger(__name__)
+
+def cascade_models() -> List[str]:
+    """Models to try in order; without a configured cascade only OLLAMA_CONFIG["model"]."""
+    return list(OLLAMA_CONFIG.get("cascade") or [OLLAMA_CONFIG["model"]])
+
+class _Tally:
+    """Calls served and escalated per function agent and model."""
+
+    def __init__(self):
+        self._served: Dict[str, Dict[str, int]] = {}
+        self._escalated: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def _add(self, counts: Dict[str, Dict[str, int]], function: str, model: str) -> None:
+        with self._lock:
+            by_model = counts.setdefault(function, {})
+            by_model[model] = by_model.get(model, 0) + 1
+
+    def served(self, function: str, model: str) -> None:
+        self._add(self._served, function, model)
+
+    def escalated(self, function: str, model: str) -> None:
+        self._add(self._escalated, function, model)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            result = {}
+            for function in dict.fromkeys(list(self._served) + list(self._escalated)):
+                served = dict(self._served.get(function, {}))
+                total = sum(served.values())
+                result[function] = {
+                    "served": served,
+                    "escalated": dict(self._escalated.get(function, {})),
+                    "share": {model: count / total for model, count in served.items()} if total else {},
+                }
+            return result
+
+_tally = _Tally()
+
+def _labels(model: str, tier: int) -> metrics.Labels:
+    call = metrics.current_call()
+    labels = call.labels(model) if call is not None else (("function", ""), ("operation", ""), ("model", model))
+    return labels + (("tier", str(tier)),)
+
+def _validator(parse: Callable[[str], Any], lenient: Optional[Callable[[str], Any]]) -> Callable[[str], Any]:
+    """Check a raw response the way _accept will parse it; pass lenient only for the last tier."""
+    def validate(response: str) -> Any:
+        response = response.strip()
+        try:
+            return parse(response)
+        except ValueError:
+            if lenient is None:
+                raise
+            return lenient(response)
+    return validate
+
+def _accept(model: str, tier: int, last: bool, response: str, parse: Callable[[str], Any],
+            lenient: Optional[Callable[[str], Any]]) -> Any:
+    """Parse a tier's response; raise ValueError to escalate, or return the result it served."""
+    labels = _labels(model, tier)
+    function = dict(labels)["function"]
+    try:
+        result = parse(response)
+    except ValueError as e:
+        if not last:
+            logger.info(f"{model} failed validation ({str(e)}), escalating")
+            _tally.escalated(function, model)
+            metrics.record_cascade(labels, served=False)
+            raise
+        if lenient is None:
+            raise
+        # The largest model gets the last word; keep whatever it produced
+        result = lenient(response)
+    _tally.served(function, model)
+    metrics.record_cascade(labels, served=True)
+    return result
+
+def cascade(messages: list, parse: Callable[[str], Any], lenient: Callable[[str], Any] = None, **kwargs) -> Any:
+    """
+    Ask the cascade's models in order until one's response passes validation.
+
+    A response is only cached once it is accepted, by parse or, for the
+    last model, by lenient, so a malformed reply is asked for again rather
+    than replayed from the cache.
+
+    Args:
+        messages (list): Chat messages
+        parse (Callable[[str], Any]): Turns a response into the result, raising
+            ValueError when its structure is invalid
+        lenient (Callable[[str], Any], optional): Accepts the last model's
+            response when parse rejects it; without it the ValueError is raised
+        **kwargs: Passed to chat_completion, e.g. temperature
+
+    Returns:
+        Any: Result of the first response that passed validation
+
+    Raises:
+        ValueError: If the last model's response is invalid and there is no lenient parser
+    """
+    models = cascade_models()
+    for tier, model in enumerate(models):
+        last = tier == len(models) - 1
+        validate = _validator(parse, lenient if last else None)
+        response = chat_completion(messages, model=model, validate=validate, **kwargs).strip()
+        try:
+            return _accept(model, tier, last, response, parse, lenient)
+        except ValueError:
+            if last:
+                raise
+
+async def acascade(messages: list, parse: Callable[[str], Any], lenient: Callable[[str], Any] = None,
+                   **kwargs) -> Any:
+    """Async version of cascade."""
+    models = cascade_models()
+    for tier, model in enumerate(models):
+        last = tier == len(models) - 1
+        validate = _validator(parse, lenient if last else None)
+        response = (await achat_completion(messages, model=model, validate=validate, **kwargs)).strip()
+        try:
+            return _accept(model, tier, last, response, parse, lenient)
+        except ValueError:
+            if last:
+                raise
+
+def get_cascade_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Return, per function agent, calls served and escalated by each model and each model's share of calls.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: served, escalated and share, each keyed by model
+    """
+    return _tally.stats()
@@ -0,0 +1,154 @@
+import atexit
+import logging
+import sys
+import threading
+import weakref
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Tuple
+
+# openai, httpx and asyncio take most of the package's import time, so they load with the first client
+if TYPE_CHECKING:
+    import httpx
+    from openai import OpenAI, AsyncOpenAI
+
+# Add root directory to Python path
+root_dir = str(Path(__file__).resolve().parent.parent)
+if root_dir not in sys.path:
+    sys.path.append(root_dir)
+
+from config import OLLAMA_CONFIG, CLIENT_CONFIG, LOG_CONFIG
+
+# Configure logging
+logging.basicConfig(level=LOG_CONFIG["level"], format=LOG_CONFIG["format"])
+logger = logging.getLogger(__name__)
+
+# Process-wide registry of clients keyed by (base_url, api_key)
+_clients: Dict[Tuple[str, str], "OpenAI"] = {}
+_lock = threading.Lock()
+
+# Async clients are bound to the event loop that created their connections
+_async_clients = weakref.WeakKeyDictionary()
+
+def _http_limits(max_connections: int = None) -> "httpx.Limits":
+    """Build connection pool limits from CLIENT_CONFIG."""
+    import httpx
+
+    return httpx.Limits(
+        max_connections=max_connections or CLIENT_CONFIG["max_connections"],
+        max_keepalive_connections=CLIENT_CONFIG["max_keepalive_connections"],
+        keepalive_expiry=CLIENT_CONFIG["keepalive_expiry"]
+    )
+
+def get_client(base_url: str = None, api_key: str = None) -> "OpenAI":
+    """
+    Return the shared OpenAI-compatible client for a backend.
+
+    Clients are created once per (base_url, api_key) pair and reuse a pooled
+    keep-alive HTTP connection for every subsequent call.
+
+    Args:
+        base_url (str, optional): API base URL, defaults to OLLAMA_CONFIG["base_url"]
+        api_key (str, optional): API key, defaults to OLLAMA_CONFIG["api_key"]
+
+    Returns:
+        OpenAI: Pooled client instance
+    """
+    key = (base_url or OLLAMA_CONFIG["base_url"], api_key or OLLAMA_CONFIG["api_key"])
+
+    client = _clients.get(key)
+    if client is not None:
+        return client
+
+    import httpx
+    from openai import OpenAI
+
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            logger.info(f"Creating pooled client for {key[0]}")
+            client = OpenAI(
+                base_url=key[0],
+                api_key=key[1],
+                max_retries=CLIENT_CONFIG["max_retries"],
+                http_client=httpx.Client(
+                    limits=_http_limits(),
+                    timeout=CLIENT_CONFIG["timeout"]
+                )
+            )
+            _clients[key] = client
+    return client
+
+def get_async_client(base_url: str = None, api_key: str = None) -> "AsyncOpenAI":
+    """
+    Return the shared async client for a backend on the running event loop.
+
+    The pool is sized to CLIENT_CONFIG["max_concurrency"] so every request
+    admitted by the shared concurrency limiter can hold its own connection.
+
+    Args:
+        base_url (str, optional): API base URL, defaults to OLLAMA_CONFIG["base_url"]
+        api_key (str, optional): API key, defaults to OLLAMA_CONFIG["api_key"]
+
+    Returns:
+        AsyncOpenAI: Pooled async client instance
+    """
+    import asyncio
+
+    loop = asyncio.get_running_loop()
+    key = (base_url or OLLAMA_CONFIG["base_url"], api_key or OLLAMA_CONFIG["api_key"])
+
+    import httpx
+    from openai import AsyncOpenAI
+
+    with _lock:
+        clients = _async_clients.setdefault(loop, {})
+        client = clients.get(key)
+        if client is None:
+            logger.info(f"Creating pooled async client for {key[0]}")
+            client = AsyncOpenAI(
+                base_url=key[0],
+                api_key=key[1],
+                max_retries=CLIENT_CONFIG["max_retries"],
+                http_client=httpx.AsyncClient(
+                    limits=_http_limits(max(CLIENT_CONFIG["max_connections"], CLIENT_CONFIG["max_concurrency"])),
+                    timeout=CLIENT_CONFIG["timeout"]
+                )
+            )
+            clients[key] = client
+    return client
+
+async def aclose_clients() -> None:
+    """Close the async clients owned by the running event loop."""
+    import asyncio
+
+    loop = asyncio.get_running_loop()
+    with _lock:
+        clients = list(_async_clients.pop(loop, {}).values())
+
+    for client in clients:
+        try:
+            await client.close()
+        except Exception as e:
+            logger.error(f"Error closing async client: {str(e)}")
+
+def close_clients() -> None:
+    """Close every pooled client and empty the registry."""
+    with _lock:
+        clients = list(_clients.values())
+        _clients.clear()
+        # Async clients can only be closed on their own loop; drop them here
+        _async_clients.clear()
+
+    for client in clients:
+        try:
+            client.close()
+        except Exception as e:
+            logger.error(f"Error closing client: {str(e)}")
+
+def reset_clients() -> None:
+    """
+    Drop all pooled clients so the next call picks up updated configuration.
+    """
+    close_clients()
+
+atexit.register(close_clients)
@@ -1,4 +1,3 @@
-from openai import OpenAI
 import logging
 import sys
 from pathlib import Path
@@ -8,41 +7,25 @@ root_dir = str(Path(__file__).resolve().parent.parent)
 if root_dir not in sys.path:
     sys.path.append(root_dir)
 
-from config import OLLAMA_CONFIG, LOG_CONFIG
+from config import LOG_CONFIG
+from basic_functions.completion import chat_completion, achat_completion, stream_chat_completion, CompletionStream
+from basic_functions.metrics import instrument
 
 # Configure logging
 logging.basicConfig(level=LOG_CONFIG["level"], format=LOG_CONFIG["format"])
 logger = logging.getLogger(__name__)
 
-def code_function(operation: str, code: str, language: str = "python") -> str:
-    """
-    Process code operations using LLM.
-    
-    Args:
-        operation (str): Operation to perform (e.g., 'optimize', 'add_typing', 'add_tests', 'document', 'refactor')
-        code (str): Code to process
-        language (str): Programming language of the code
-        
-    Returns:
-        str: Processed code
-        
-    Raises:
-        Exception: If API call fails
-    """
-    try:
-        client = OpenAI(
-            base_url=OLLAMA_CONFIG["base_url"],
-            api_key=OLLAMA_CONFIG["api_key"]
-        )
-        
-        logger.info(f"Processing code operation: {operation} for {language} code...")
-        
-        completion = client.chat.completions.create(
-            model=OLLAMA_CONFIG["model"],
-            messages=[
-                {
-                    "role": "system", 
-                    "content": f"""You are an expert {language} developer. You modify code based on requested operations.
+def _build_messages(operation: str, code: str, language: str, context: str = None) -> list:
+    """Build the chat messages for a code operation."""
+    user_content = f"Input Operation: {operation}\nInput Code:\n{code}"
+    if context:
+        # Surrounding code the snippet depends on; the model should read it but not echo it
+        user_content = f"Context (do not modify or repeat):\n{context}\n{user_content}"
+
+    return [
+        {
+            "role": "system", 
+            "content": f"""You are an expert {language} developer. You modify code based on requested operations.
                     ONLY output the modified code with NO explanations.
                     
                     Examples:
@@ -86,16 +69,34 @@ def code_function(operation: str, code: str, language: str = "python") -> str:
                     - Preserve functionality while improving code
                     - Follow language best practices
                     - No comments or explanations in output"""
-                },
-                {
-                    "role": "user",
-                    "content": f"Input Operation: {operation}\nInput Code:\n{code}"
-                }
-            ],
-            temperature=0.1
-        )
+        },
+        {
+            "role": "user",
+            "content": user_content
+        }
+    ]
+
+@instrument("code_function", "operation")
+def code_function(operation: str, code: str, language: str = "python", context: str = None) -> str:
+    """
+    Process code operations using LLM.
+    
+    Args:
+        operation (str): Operation to perform (e.g., 'optimize', 'add_typing', 'add_tests', 'document', 'refactor')
+        code (str): Code to process
+        language (str): Programming language of the code
+        context (str, optional): Surrounding code such as imports or the enclosing class header
+        
+    Returns:
+        str: Processed code
         
-        response = completion.choices[0].message.content.strip()
+    Raises:
+        Exception: If API call fails
+    """
+    try:
+        logger.info(f"Processing code operation: {operation} for {language} code...")
+        
+        response = chat_completion(_build_messages(operation, code, language, context), temperature=0.1).strip()
         logger.info("Code processing completed")
         return response
         
@@ -103,6 +104,59 @@ def code_function(operation: str, code: str, language: str = "python") -> str:
         logger.error(f"Error processing code operation: {str(e)}")
         raise
 
+@instrument("code_function", "operation")
+async def acode_function(operation: str, code: str, language: str = "python", context: str = None) -> str:
+    """
+    Async version of code_function.
+    
+    Args:
+        operation (str): Operation to perform (e.g., 'optimize', 'add_typing', 'add_tests', 'document', 'refactor')
+        code (str): Code to process
+        language (str): Programming language of the code
+        context (str, optional): Surrounding code such as imports or the enclosing class header
+        
+    Returns:
+        str: Processed code
+        
+    Raises:
+        Exception: If API call fails
+    """
+    try:
+        logger.info(f"Processing code operation: {operation} for {language} code...")
+        
+        response = (await achat_completion(_build_messages(operation, code, language, context), temperature=0.1)).strip()
+        logger.info("Code processing completed")
+        return response
+        
+    except Exception as e:
+        logger.error(f"Error processing code operation: {str(e)}")
+        raise
+
+@instrument("code_function", "operation")
+def code_function_stream(operation: str, code: str, language: str = "python", context: str = None) -> CompletionStream:
+    """
+    Streaming version of code_function that yields code as it is generated.
+    
+    Args:
+        operation (str): Operation to perform (e.g., 'optimize', 'add_typing', 'add_tests', 'document', 'refactor')
+        code (str): Code to process
+        language (str): Programming language of the code
+        context (str, optional): Surrounding code such as imports or the enclosing class header
+        
+    Returns:
+        CompletionStream: Iterator of text deltas; exposes time_to_first_token and the full text
+        
+    Raises:
+        Exception: If API call fails
+    """
+    try:
+        logger.info(f"Streaming code operation: {operation} for {language} code...")
+        return stream_chat_completion(_build_messages(operation, code, language, context), temperature=0.1)
+        
+    except Exception as e:
+        logger.error(f"Error processing code operation: {str(e)}")
+        raise
+
 if __name__ == "__main__":
     try:
         # Test different operations
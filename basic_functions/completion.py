@@ -0,0 +1,440 @@
+import logging
+import sys
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterable, Iterator, List, Optional, Union
+
+# Add root directory to Python path
+root_dir = str(Path(__file__).resolve().parent.parent)
+if root_dir not in sys.path:
+    sys.path.append(root_dir)
+
+from config import OLLAMA_CONFIG, COALESCE_CONFIG, LOG_CONFIG
+from basic_functions.client import get_client, get_async_client
+from basic_functions.cache import get_cache
+from basic_functions import metrics
+from basic_functions.singleflight import flights, make_key
+from basic_functions.limiter import limiter
+from basic_functions import hedging
+from basic_functions.budget import budgets
+
+# Configure logging
+logging.basicConfig(level=LOG_CONFIG["level"], format=LOG_CONFIG["format"])
+logger = logging.getLogger(__name__)
+
+def _coalesced(key_parts: tuple, labels: "metrics.Labels", coalesce: bool, request: Callable[[], Any],
+               copy: Callable[[Any], Any] = None) -> Any:
+    """
+    Run request, sharing it with identical calls already in flight when coalescing is on.
+
+    Args:
+        key_parts (tuple): Everything that identifies the request
+        labels (metrics.Labels): Labels of the calling function agent
+        coalesce (bool): False always runs request itself
+        request (Callable[[], Any]): Performs the request
+        copy (Callable[[Any], Any], optional): Copies a mutable result handed to a sharing caller
+
+    Returns:
+        Any: The request's result
+    """
+    if not (coalesce and COALESCE_CONFIG["enabled"]):
+        return request()
+    result, shared = flights.do(make_key(*key_parts), request)
+    if shared:
+        logger.debug(f"Coalesced with an identical in-flight request to {labels[-1][1]}")
+        metrics.record_coalesced(labels)
+        if copy is not None:
+            result = copy(result)
+    return result
+
+async def _acoalesced(key_parts: tuple, labels: "metrics.Labels", coalesce: bool,
+                      request: Callable[[], Awaitable[Any]], copy: Callable[[Any], Any] = None) -> Any:
+    """Async counterpart of _coalesced; request returns the awaitable to run."""
+    if not (coalesce and COALESCE_CONFIG["enabled"]):
+        return await request()
+    result, shared = await flights.ado(make_key(*key_parts), request)
+    if shared:
+        logger.debug(f"Coalesced with an identical in-flight request to {labels[-1][1]}")
+        metrics.record_coalesced(labels)
+        if copy is not None:
+            result = copy(result)
+    return result
+
+def _copy_vectors(vectors: List[List[float]]) -> List[List[float]]:
+    return [list(vector) for vector in vectors]
+
+def _latency_key(labels: "metrics.Labels", kind: str) -> str:
+    """
+    Limiter key for requests whose latencies are comparable.
+
+    Functions differ widely in output length (and so latency) on the same
+    model, so each gets its own baseline; otherwise short math calls would
+    make every code call look like backend queueing.
+    """
+    values = dict(labels)
+    return f"{values['model']}/{values['function']}/{kind}"
+
+def _chat_attempt(model: str, messages: List[Dict[str, Any]], temperature: float,
+                  kwargs: Dict[str, Any], slot_key: str) -> Callable[[Optional[str]], Awaitable[Any]]:
+    """Return a coroutine function sending the chat request to a base URL (None for the default)."""
+    async def attempt(base_url: Optional[str]) -> Any:
+        async with limiter.slot(slot_key):
+            return await get_async_client(base_url).chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                **kwargs
+            )
+    return attempt
+
+class _ChatRequest:
+    """
+    Everything about a chat completion except its transport, shared by the sync and async APIs.
+
+    The caller looks the request up in the cache, then sends limits() and
+    hands each completion to settle() until it returns no retry limits,
+    and finally takes the text from finish(). Only replies that ran to
+    completion and passed validate are cached.
+    """
+
+    def __init__(self, messages: List[Dict[str, Any]], model: Optional[str], temperature: Optional[float],
+                 use_cache: bool, budget: bool, kwargs: Dict[str, Any],
+                 validate: Optional[Callable[[str], Any]] = None):
+        self.messages = messages
+        self.model = model or OLLAMA_CONFIG["model"]
+        self.temperature = OLLAMA_CONFIG["temperature"] if temperature is None else temperature
+        self.kwargs = kwargs
+        self.budget = budget
+        self.validate = validate
+        self.labels = metrics.core_labels(self.model)
+        self.slot_key = _latency_key(self.labels, "chat")
+        self.cache = get_cache() if use_cache else None
+        self.key = None
+
+    @property
+    def key_parts(self) -> tuple:
+        """Identity of the request for coalescing."""
+        return ("chat", self.model, self.messages, self.temperature, self.kwargs)
+
+    def cached(self) -> Optional[str]:
+        """Return the cached response, or None on a miss or with the cache off."""
+        if self.cache is None:
+            return None
+        # Stop sequences shape the reply; max_tokens doesn't, since truncated replies are never stored
+        stop = budgets.limits(self.labels, self.kwargs, learned=False).get("stop") if self.budget else None
+        scope = {"stop": stop} if stop else {}
+        self.key = self.cache.make_key(self.model, self.messages, self.temperature, **self.kwargs, **scope)
+        cached = self.cache.get(self.key)
+        metrics.record_cache(self.labels, cached is not None)
+        if cached is not None:
+            logger.debug(f"Response cache hit for {self.model}")
+        return cached
+
+    def limits(self) -> Dict[str, Any]:
+        """Extra create() arguments for the first attempt."""
+        return budgets.limits(self.labels, self.kwargs) if self.budget else {}
+
+    def settle(self, limits: Dict[str, Any], completion: Any) -> Optional[Dict[str, Any]]:
+        """
+        Account for a completion sent with limits.
+
+        Returns:
+            Optional[Dict[str, Any]]: Limits to retry under when a learned
+                budget truncated the completion, otherwise None
+        """
+        metrics.record_usage(self.labels, completion.usage)
+        if self.budget and budgets.observe(self.labels, limits, completion):
+            return budgets.retry_limits(limits)
+        return None
+
+    def finish(self, completion: Any) -> str:
+        """Return the completion's text, storing it in the cache."""
+        content = completion.choices[0].message.content
+        self.store(content, completion.choices[0].finish_reason)
+        return content
+
+    def store(self, content: str, finish_reason: Optional[str]) -> None:
+        """Cache a reply unless it was cut off at max_tokens or fails the caller's validation."""
+        if self.cache is None:
+            return
+        if finish_reason == "length":
+            logger.debug(f"Not caching a truncated response from {self.model}")
+            return
+        if self.validate is not None:
+            try:
+                self.validate(content)
+            except ValueError as e:
+                logger.debug(f"Not caching a response that failed validation: {str(e)}")
+                return
+        self.cache.set(self.key, content)
+
+def chat_completion(messages: List[Dict[str, Any]], model: str = None, temperature: float = None,
+                    use_cache: bool = True, coalesce: bool = True, budget: bool = True,
+                    validate: Callable[[str], Any] = None, **kwargs) -> str:
+    """
+    Run a chat completion on the pooled client and return the message text.
+
+    Args:
+        messages (List[Dict[str, Any]]): Chat messages to send
+        model (str, optional): Model name, defaults to OLLAMA_CONFIG["model"]
+        temperature (float, optional): Sampling temperature, defaults to OLLAMA_CONFIG["temperature"]
+        use_cache (bool): Consult the response cache when it is enabled
+        coalesce (bool): Share one request with identical calls already in flight
+        budget (bool): Apply the output token budget and stop sequences for the calling function
+        validate (Callable[[str], Any], optional): The caller's parser; a response
+            it rejects with ValueError is returned but not cached
+        **kwargs: Extra arguments passed to chat.completions.create
+
+    Returns:
+        str: Content of the first choice
+    """
+    chat = _ChatRequest(messages, model, temperature, use_cache, budget, kwargs, validate)
+    cached = chat.cached()
+    if cached is not None:
+        return cached
+
+    def send(limits: Dict[str, Any]) -> Any:
+        def create() -> Any:
+            with limiter.slot(chat.slot_key):
+                return get_client().chat.completions.create(
+                    model=chat.model,
+                    messages=messages,
+                    temperature=chat.temperature,
+                    **kwargs,
+                    **limits
+                )
+
+        if hedging.policy.applies(chat.labels):
+            attempt = _chat_attempt(chat.model, messages, chat.temperature, {**kwargs, **limits}, chat.slot_key)
+            return hedging.hedged(chat.labels, attempt, create)
+        return create()
+
+    def request() -> str:
+        limits = chat.limits()
+        while limits is not None:
+            completion = send(limits)
+            limits = chat.settle(limits, completion)
+        return chat.finish(completion)
+
+    return _coalesced(chat.key_parts, chat.labels, coalesce, request)
+
+async def achat_completion(messages: List[Dict[str, Any]], model: str = None, temperature: float = None,
+                           use_cache: bool = True, coalesce: bool = True, budget: bool = True,
+                           validate: Callable[[str], Any] = None, **kwargs) -> str:
+    """
+    Async counterpart of chat_completion, bounded by the shared concurrency limiter.
+
+    Args:
+        messages (List[Dict[str, Any]]): Chat messages to send
+        model (str, optional): Model name, defaults to OLLAMA_CONFIG["model"]
+        temperature (float, optional): Sampling temperature, defaults to OLLAMA_CONFIG["temperature"]
+        use_cache (bool): Consult the response cache when it is enabled
+        coalesce (bool): Share one request with identical calls already in flight
+        budget (bool): Apply the output token budget and stop sequences for the calling function
+        validate (Callable[[str], Any], optional): The caller's parser; a response
+            it rejects with ValueError is returned but not cached
+        **kwargs: Extra arguments passed to chat.completions.create
+
+    Returns:
+        str: Content of the first choice
+    """
+    chat = _ChatRequest(messages, model, temperature, use_cache, budget, kwargs, validate)
+    cached = chat.cached()
+    if cached is not None:
+        return cached
+
+    async def send(limits: Dict[str, Any]) -> Any:
+        attempt = _chat_attempt(chat.model, messages, chat.temperature, {**kwargs, **limits}, chat.slot_key)
+        if hedging.policy.applies(chat.labels):
+            return await hedging.ahedged(chat.labels, attempt)
+        return await attempt(None)
+
+    async def request() -> str:
+        limits = chat.limits()
+        while limits is not None:
+            completion = await send(limits)
+            limits = chat.settle(limits, completion)
+        return chat.finish(completion)
+
+    return await _acoalesced(chat.key_parts, chat.labels, coalesce, request)
+
+class CompletionStream:
+    """
+    Iterator over the text deltas of a streamed chat completion.
+
+    Attributes:
+        time_to_first_token (Optional[float]): Seconds from request to first delta
+        finish_reason (Optional[str]): Finish reason reported by the backend
+        text (str): Text received so far
+    """
+
+    def __init__(self, deltas: Iterable[str], started: float,
+                 on_complete: Callable[[str], None] = None, on_close: Callable[[], None] = None,
+                 labels: "metrics.Labels" = None):
+        self._deltas = deltas
+        self._parts: List[str] = []
+        self._on_complete = on_complete
+        self._on_close = on_close
+        self._labels = labels
+        self._error: Optional[BaseException] = None
+        # A tracked call that returned this stream is finished when the stream closes
+        self._call = metrics.current_call()
+        if self._call is not None:
+            self._call.deferred = True
+        self.started = started
+        self.time_to_first_token: Optional[float] = None
+        self.finish_reason: Optional[str] = None
+        self.closed = False
+
+    @property
+    def text(self) -> str:
+        return "".join(self._parts)
+
+    def __iter__(self) -> Iterator[str]:
+        try:
+            for delta in self._deltas:
+                if self.time_to_first_token is None:
+                    self.time_to_first_token = time.perf_counter() - self.started
+                    logger.info(f"Time to first token: {self.time_to_first_token:.3f}s")
+                    if self._labels is not None:
+                        metrics.record_ttft(self._labels, self.time_to_first_token)
+                self._parts.append(delta)
+                yield delta
+        except Exception as e:
+            self._error = e
+            raise
+        finally:
+            self.close()
+
+        if self._on_complete is not None:
+            self._on_complete(self.text)
+
+    def close(self) -> None:
+        """Stop receiving and release the underlying HTTP response."""
+        if not self.closed:
+            self.closed = True
+            if self._on_close is not None:
+                self._on_close()
+            if self._call is not None:
+                self._call.finish(self._error)
+
+def stream_chat_completion(messages: List[Dict[str, Any]], model: str = None, temperature: float = None,
+                           use_cache: bool = True, budget: bool = True, validate: Callable[[str], Any] = None,
+                           **kwargs) -> CompletionStream:
+    """
+    Start a streamed chat completion and return an iterator over its text deltas.
+
+    A cache hit is replayed as a single delta. Streamed text can't be
+    retried once delivered, so only stop sequences and the max_tokens
+    ceiling apply, never a learned budget.
+
+    Args:
+        messages (List[Dict[str, Any]]): Chat messages to send
+        model (str, optional): Model name, defaults to OLLAMA_CONFIG["model"]
+        temperature (float, optional): Sampling temperature, defaults to OLLAMA_CONFIG["temperature"]
+        use_cache (bool): Consult the response cache when it is enabled
+        budget (bool): Apply the calling function's stop sequences and the max_tokens ceiling
+        validate (Callable[[str], Any], optional): The caller's parser; a response
+            it rejects with ValueError is returned but not cached
+        **kwargs: Extra arguments passed to chat.completions.create
+
+    Returns:
+        CompletionStream: Iterator of text deltas exposing time_to_first_token
+    """
+    started = time.perf_counter()
+    chat = _ChatRequest(messages, model, temperature, use_cache, budget, kwargs, validate)
+    labels = chat.labels
+    cached = chat.cached()
+    if cached is not None:
+        result = CompletionStream([cached], started)
+        result.finish_reason = "stop"
+        return result
+
+    # The slot covers the wait for response headers, where backend queueing shows up;
+    # holding it while the caller consumes the stream could deadlock nested calls
+    limits = budgets.limits(labels, kwargs, learned=False) if budget else {}
+    with limiter.slot(_latency_key(labels, "stream")):
+        response = get_client().chat.completions.create(
+            model=chat.model,
+            messages=messages,
+            temperature=chat.temperature,
+            stream=True,
+            **kwargs,
+            **limits
+        )
+
+    def deltas() -> Iterator[str]:
+        for chunk in response:
+            # Only sent by backends that report usage, on a final chunk that may carry no choices
+            if getattr(chunk, "usage", None) is not None:
+                metrics.record_usage(labels, chunk.usage)
+            if not chunk.choices:
+                continue
+            choice = chunk.choices[0]
+            if choice.finish_reason:
+                result.finish_reason = choice.finish_reason
+            if choice.delta.content:
+                yield choice.delta.content
+
+    result = CompletionStream(
+        deltas(),
+        started,
+        on_complete=lambda text: chat.store(text, result.finish_reason),
+        on_close=response.response.close,
+        labels=labels
+    )
+    return result
+
+def create_embeddings(texts: Union[str, List[str]], model: str = None, coalesce: bool = True) -> List[List[float]]:
+    """
+    Embed one or more texts on the pooled client.
+
+    Args:
+        texts (Union[str, List[str]]): Text or list of texts to embed
+        model (str, optional): Model name, defaults to OLLAMA_CONFIG["embedding_model"]
+        coalesce (bool): Share one request with identical calls already in flight
+
+    Returns:
+        List[List[float]]: One vector per input, in input order
+    """
+    model = model or OLLAMA_CONFIG["embedding_model"]
+    labels = metrics.core_labels(model)
+
+    def request() -> List[List[float]]:
+        with limiter.slot(_latency_key(labels, "embeddings")):
+            response = get_client().embeddings.create(
+                model=model,
+                input=texts
+            )
+        metrics.record_usage(labels, response.usage)
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+    # Callers sharing a request get their own copy of the vectors
+    return _coalesced(("embeddings", model, texts), labels, coalesce, request, copy=_copy_vectors)
+
+async def acreate_embeddings(texts: Union[str, List[str]], model: str = None,
+                             coalesce: bool = True) -> List[List[float]]:
+    """
+    Async counterpart of create_embeddings, bounded by the shared concurrency limiter.
+
+    Args:
+        texts (Union[str, List[str]]): Text or list of texts to embed
+        model (str, optional): Model name, defaults to OLLAMA_CONFIG["embedding_model"]
+        coalesce (bool): Share one request with identical calls already in flight
+
+    Returns:
+        List[List[float]]: One vector per input, in input order
+    """
+    model = model or OLLAMA_CONFIG["embedding_model"]
+    labels = metrics.core_labels(model)
+
+    async def request() -> List[List[float]]:
+        async with limiter.slot(_latency_key(labels, "embeddings")):
+            response = await get_async_client().embeddings.create(
+                model=model,
+                input=texts
+            )
+        metrics.record_usage(labels, response.usage)
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+    return await _acoalesced(("embeddings", model, texts), labels, coalesce, request, copy=_copy_vectors)
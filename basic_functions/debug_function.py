@@ -1,4 +1,3 @@
-from openai import OpenAI
 import logging
 import sys
 import traceback
@@ -10,12 +9,134 @@ root_dir = str(Path(__file__).resolve().parent.parent)
 if root_dir not in sys.path:
     sys.path.append(root_dir)
 
-from config import OLLAMA_CONFIG, LOG_CONFIG
+from config import LOG_CONFIG
+from basic_functions.cascade import cascade, acascade
+from basic_functions import structured
+from basic_functions.metrics import instrument
 
 # Configure logging
 logging.basicConfig(level=LOG_CONFIG["level"], format=LOG_CONFIG["format"])
 logger = logging.getLogger(__name__)
 
+SYSTEM_PROMPT = """You are an expert debugging assistant. Analyze errors and provide clear, actionable solutions.
+                    ONLY respond in this exact format with these exact sections:
+                    
+                    ANALYSIS:
+                    <single line brief error analysis>
+                    
+                    ROOT_CAUSE:
+                    <single line root cause>
+                    
+                    FIX:
+                    <code or steps to fix>
+                    
+                    PREVENTION:
+                    <bullet points for prevention>
+                    
+                    DO NOT include any other text or sections."""
+
+SECTIONS = ['analysis', 'root_cause', 'fix', 'prevention']
+
+# Used in structured output mode; the schema replaces the section layout instructions
+JSON_SYSTEM_PROMPT = """You are an expert debugging assistant. Analyze errors and provide clear, actionable solutions.
+                    Reply with a JSON object with these string fields:
+                    analysis: single line brief error analysis
+                    root_cause: single line root cause
+                    fix: code or steps to fix
+                    prevention: bullet points for prevention"""
+
+def _request_kwargs() -> Dict[str, Any]:
+    """Completion arguments, asking for schema-constrained JSON in structured output mode."""
+    if not structured.enabled("debug_function"):
+        return {"temperature": 0.1}
+    return {"temperature": 0.1,
+            "response_format": structured.response_format("debug_analysis", structured.string_schema(SECTIONS))}
+
+def _build_messages(error_info: Dict[str, Any], context: str = None) -> list:
+    """Build the chat messages for an error analysis."""
+    # Format error information more clearly
+    error_context = f"""
+ERROR DETAILS:
+Type: {error_info['error_type']}
+Message: {error_info['error_message']}
+
+TRACEBACK:
+{error_info['traceback']}
+"""
+    
+    if 'code_snippet' in error_info:
+        error_context += f"\nCODE:\n{error_info['code_snippet']}"
+        
+    if 'variables' in error_info:
+        error_context += "\nVARIABLE STATE:\n"
+        for var, value in error_info['variables'].items():
+            error_context += f"{var} = {value}\n"
+            
+    if context:
+        error_context += f"\nCONTEXT:\n{context}"
+
+    return [
+        {
+            "role": "system", 
+            "content": JSON_SYSTEM_PROMPT if structured.enabled("debug_function") else SYSTEM_PROMPT
+        },
+        {
+            "role": "user",
+            "content": f"Debug this error:\n{error_context}"
+        }
+    ]
+
+def _parse_response(response: str, strict: bool = False) -> Dict[str, str]:
+    """
+    Split the model response into its analysis sections.
+
+    JSON replies from structured output mode are read directly; anything
+    else goes through the section header parser. Missing sections are filled
+    with "No information provided", or raise ValueError when strict so the
+    model cascade can escalate.
+    """
+    data = structured.parse_object(response)
+    if data is not None:
+        sections = {section: structured.field_text(data.get(section)) for section in SECTIONS}
+    else:
+        sections = _parse_sections(response)
+
+    # Validate all sections are present
+    missing = [section for section in sections if not sections[section]]
+    if strict and missing:
+        raise ValueError(f"Missing sections: {', '.join(missing)}")
+    for section in missing:
+        sections[section] = "No information provided"
+    
+    return sections
+
+def _parse_sections(response: str) -> Dict[str, str]:
+    """Split a text response on its ANALYSIS:/ROOT_CAUSE:/FIX:/PREVENTION: headers."""
+    # Parse response sections with improved handling
+    sections = {section: '' for section in SECTIONS}
+    
+    current_section = None
+    current_content = []
+    
+    for line in response.split('\n'):
+        line = line.strip()
+        if line in ['ANALYSIS:', 'ROOT_CAUSE:', 'FIX:', 'PREVENTION:']:
+            if current_section:
+                sections[current_section.lower().rstrip(':')] = '\n'.join(current_content).strip()
+            current_section = line.lower().rstrip(':')
+            current_content = []
+        elif line:  # Only append non-empty lines
+            current_content.append(line)
+            
+    if current_section:
+        sections[current_section] = '\n'.join(current_content).strip()
+    
+    return sections
+
+def _parse_strict(response: str) -> Dict[str, str]:
+    return _parse_response(response, strict=True)
+
+@instrument("debug_function", lambda args: args["error_info"].get("error_type", ""))
 def debug_function(error_info: Dict[str, Any], context: str = None) -> Dict[str, str]:
     """
     Analyze errors and suggest fixes using LLM.
@@ -41,94 +162,48 @@ def debug_function(error_info: Dict[str, Any], context: str = None) -> Dict[str,
             }
     """
     try:
-        client = OpenAI(
-            base_url=OLLAMA_CONFIG["base_url"],
-            api_key=OLLAMA_CONFIG["api_key"]
-        )
-        
         logger.info(f"Processing debug analysis for {error_info['error_type']}")
         
-        # Format error information more clearly
-        error_context = f"""
-ERROR DETAILS:
-Type: {error_info['error_type']}
-Message: {error_info['error_message']}
-
-TRACEBACK:
-{error_info['traceback']}
-"""
-        
-        if 'code_snippet' in error_info:
-            error_context += f"\nCODE:\n{error_info['code_snippet']}"
-            
-        if 'variables' in error_info:
-            error_context += "\nVARIABLE STATE:\n"
-            for var, value in error_info['variables'].items():
-                error_context += f"{var} = {value}\n"
-                
-        if context:
-            error_context += f"\nCONTEXT:\n{context}"
-
-        completion = client.chat.completions.create(
-            model=OLLAMA_CONFIG["model"],
-            messages=[
-                {
-                    "role": "system", 
-                    "content": """You are an expert debugging assistant. Analyze errors and provide clear, actionable solutions.
-                    ONLY respond in this exact format with these exact sections:
-                    
-                    ANALYSIS:
-                    <single line brief error analysis>
-                    
-                    ROOT_CAUSE:
-                    <single line root cause>
-                    
-                    FIX:
-                    <code or steps to fix>
-                    
-                    PREVENTION:
-                    <bullet points for prevention>
-                    
-                    DO NOT include any other text or sections."""
-                },
-                {
-                    "role": "user",
-                    "content": f"Debug this error:\n{error_context}"
-                }
-            ],
-            temperature=0.1
-        )
+        sections = cascade(_build_messages(error_info, context), _parse_strict, _parse_response,
+                           **_request_kwargs())
         
-        response = completion.choices[0].message.content.strip()
-        
-        # Parse response sections with improved handling
-        sections = {
-            'analysis': '',
-            'root_cause': '',
-            'fix': '',
-            'prevention': ''
-        }
+        logger.info("Debug analysis completed")
+        return sections
         
-        current_section = None
-        current_content = []
+    except Exception as e:
+        logger.error(f"Error in debug analysis: {str(e)}")
+        raise
+
+@instrument("debug_function", lambda args: args["error_info"].get("error_type", ""))
+async def adebug_function(error_info: Dict[str, Any], context: str = None) -> Dict[str, str]:
+    """
+    Async version of debug_function.
+    
+    Args:
+        error_info (Dict[str, Any]): Dictionary containing error details
+            {
+                'error_type': str,
+                'error_message': str,
+                'traceback': str,
+                'code_snippet': str (optional),
+                'variables': dict (optional)
+            }
+        context (str, optional): Additional context about the error
         
-        for line in response.split('\n'):
-            line = line.strip()
-            if line in ['ANALYSIS:', 'ROOT_CAUSE:', 'FIX:', 'PREVENTION:']:
-                if current_section:
-                    sections[current_section.lower().rstrip(':')] = '\n'.join(current_content).strip()
-                current_section = line.lower().rstrip(':')
-                current_content = []
-            elif line:  # Only append non-empty lines
-                current_content.append(line)
-                
-        if current_section:
-            sections[current_section] = '\n'.join(current_content).strip()
+    Returns:
+        Dict[str, str]: Analysis and suggestions
+            {
+                'analysis': str,
+                'root_cause': str,
+                'fix': str,
+                'prevention': str
+            }
+    """
+    try:
+        logger.info(f"Processing debug analysis for {error_info['error_type']}")
         
-        # Validate all sections are present
-        for section in sections:
-            if not sections[section]:
-                sections[section] = "No information provided"
+        sections = await acascade(_build_messages(error_info, context), _parse_strict, _parse_response,
+                                  **_request_kwargs())
         
         logger.info("Debug analysis completed")
         return sections
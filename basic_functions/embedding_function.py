@@ -1,19 +1,26 @@
-from openai import OpenAI
+import asyncio
 import logging
 import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
+from typing import Iterable, List
+
+import numpy as np
 
 # Add root directory to Python path
 root_dir = str(Path(__file__).resolve().parent.parent)
 if root_dir not in sys.path:
     sys.path.append(root_dir)
 
-from config import OLLAMA_CONFIG, LOG_CONFIG
+from config import OLLAMA_CONFIG, EMBEDDING_CONFIG, LOG_CONFIG
+from basic_functions.completion import create_embeddings, acreate_embeddings
+from basic_functions.metrics import instrument, in_context
 
 # Configure logging
 logging.basicConfig(level=LOG_CONFIG["level"], format=LOG_CONFIG["format"])
 logger = logging.getLogger(__name__)
 
+@instrument("embedding_function")
 def embedding_function(text: str) -> list:
     """
     Generate embeddings for input text using Ollama's embedding models.
@@ -28,20 +35,34 @@ def embedding_function(text: str) -> list:
         Exception: If API call fails
     """
     try:
-        client = OpenAI(
-            base_url=OLLAMA_CONFIG["base_url"],
-            api_key=OLLAMA_CONFIG["api_key"]
-        )
-        
         logger.info(f"Generating embeddings for text: {text[:100]}...")
         
-        # Using nomic-embed-text model which is optimized for embeddings
-        response = client.embeddings.create(
-            model="nomic-embed-text",
-            input=text
-        )
+        embedding = create_embeddings(text, model=OLLAMA_CONFIG["embedding_model"])[0]
+        logger.info(f"Generated embedding vector of length: {len(embedding)}")
+        return embedding
+        
+    except Exception as e:
+        logger.error(f"Error generating embeddings: {str(e)}")
+        raise
+
+@instrument("embedding_function")
+async def aembedding_function(text: str) -> list:
+    """
+    Async version of embedding_function.
+    
+    Args:
+        text (str): Text to generate embeddings for
+        
+    Returns:
+        list: Vector embedding
+        
+    Raises:
+        Exception: If API call fails
+    """
+    try:
+        logger.info(f"Generating embeddings for text: {text[:100]}...")
         
-        embedding = response.data[0].embedding
+        embedding = (await acreate_embeddings(text, model=OLLAMA_CONFIG["embedding_model"]))[0]
         logger.info(f"Generated embedding vector of length: {len(embedding)}")
         return embedding
         
@@ -49,10 +70,122 @@ def embedding_function(text: str) -> list:
         logger.error(f"Error generating embeddings: {str(e)}")
         raise
 
+def _split_batches(texts: List[str], batch_size: int) -> List[List[str]]:
+    """Split texts into consecutive request batches."""
+    return [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+
+def _fill_matrix(matrix: np.ndarray, start: int, vectors: List[List[float]]) -> np.ndarray:
+    """Write one batch of vectors into the result matrix, allocating it on first use."""
+    if matrix.shape[1] == 0:
+        matrix = np.empty((matrix.shape[0], len(vectors[0])), dtype=np.float32)
+    matrix[start:start + len(vectors)] = vectors
+    return matrix
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalise rows in place, leaving zero vectors untouched."""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    matrix /= norms
+    return matrix
+
+@instrument("embedding_function", lambda args: "batch")
+def batch_embedding_function(texts: Iterable[str], batch_size: int = None, max_workers: int = None,
+                             normalize: bool = False) -> np.ndarray:
+    """
+    Generate embeddings for many texts using batched, concurrent requests.
+    
+    Args:
+        texts (Iterable[str]): Texts to generate embeddings for
+        batch_size (int, optional): Texts per request, defaults to EMBEDDING_CONFIG["batch_size"]
+        max_workers (int, optional): Requests in flight, defaults to EMBEDDING_CONFIG["max_workers"]
+        normalize (bool): L2-normalise each row
+        
+    Returns:
+        np.ndarray: C-contiguous float32 matrix of shape (len(texts), dim)
+        
+    Raises:
+        Exception: If API call fails
+    """
+    try:
+        texts = list(texts)
+        batch_size = batch_size or EMBEDDING_CONFIG["batch_size"]
+        max_workers = max_workers or EMBEDDING_CONFIG["max_workers"]
+        batches = _split_batches(texts, batch_size)
+        
+        logger.info(f"Generating embeddings for {len(texts)} texts in {len(batches)} batches...")
+        
+        matrix = np.empty((len(texts), 0), dtype=np.float32)
+        embed = in_context(create_embeddings)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(embed, batch, OLLAMA_CONFIG["embedding_model"]): i * batch_size
+                for i, batch in enumerate(batches)
+            }
+            for future in as_completed(futures):
+                matrix = _fill_matrix(matrix, futures[future], future.result())
+        
+        if normalize:
+            matrix = _normalize_rows(matrix)
+        
+        logger.info(f"Generated embedding matrix of shape: {matrix.shape}")
+        return matrix
+        
+    except Exception as e:
+        logger.error(f"Error generating batch embeddings: {str(e)}")
+        raise
+
+@instrument("embedding_function", lambda args: "batch")
+async def abatch_embedding_function(texts: Iterable[str], batch_size: int = None, max_workers: int = None,
+                                    normalize: bool = False) -> np.ndarray:
+    """
+    Async version of batch_embedding_function.
+    
+    Args:
+        texts (Iterable[str]): Texts to generate embeddings for
+        batch_size (int, optional): Texts per request, defaults to EMBEDDING_CONFIG["batch_size"]
+        max_workers (int, optional): Requests in flight, defaults to EMBEDDING_CONFIG["max_workers"]
+        normalize (bool): L2-normalise each row
+        
+    Returns:
+        np.ndarray: C-contiguous float32 matrix of shape (len(texts), dim)
+        
+    Raises:
+        Exception: If API call fails
+    """
+    try:
+        texts = list(texts)
+        batch_size = batch_size or EMBEDDING_CONFIG["batch_size"]
+        semaphore = asyncio.Semaphore(max_workers or EMBEDDING_CONFIG["max_workers"])
+        batches = _split_batches(texts, batch_size)
+        
+        logger.info(f"Generating embeddings for {len(texts)} texts in {len(batches)} batches...")
+        
+        async def embed(start: int, batch: List[str]):
+            async with semaphore:
+                return start, await acreate_embeddings(batch, OLLAMA_CONFIG["embedding_model"])
+        
+        matrix = np.empty((len(texts), 0), dtype=np.float32)
+        for coro in asyncio.as_completed([embed(i * batch_size, batch) for i, batch in enumerate(batches)]):
+            start, vectors = await coro
+            matrix = _fill_matrix(matrix, start, vectors)
+        
+        if normalize:
+            matrix = _normalize_rows(matrix)
+        
+        logger.info(f"Generated embedding matrix of shape: {matrix.shape}")
+        return matrix
+        
+    except Exception as e:
+        logger.error(f"Error generating batch embeddings: {str(e)}")
+        raise
+
 if __name__ == "__main__":
     try:
         sample_text = "This is a test sentence to generate embeddings."
         embedding = embedding_function(sample_text)
         print(f"Generated embedding vector (first 5 values): {embedding[:5]}")
+        
+        matrix = batch_embedding_function([sample_text, "Another sentence to embed."], normalize=True)
+        print(f"Generated embedding matrix of shape: {matrix.shape}")
     except Exception as e:
         logger.error(f"Failed to process: {str(e)}") 
\ No newline at end of file
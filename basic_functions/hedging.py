@@ -0,0 +1,207 @@
+import logging
+import sys
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Deque, Dict, Optional
+
+if TYPE_CHECKING:
+    import asyncio
+
+# Add root directory to Python path
+root_dir = str(Path(__file__).resolve().parent.parent)
+if root_dir not in sys.path:
+    sys.path.append(root_dir)
+
+from config import OLLAMA_CONFIG, HEDGE_CONFIG, LOG_CONFIG
+from basic_functions import metrics
+
+# Configure logging
+logging.basicConfig(level=LOG_CONFIG["level"], format=LOG_CONFIG["format"])
+logger = logging.getLogger(__name__)
+
+# Starts one request against a base URL and returns its awaitable
+Attempt = Callable[[str], Awaitable[Any]]
+
+class HedgePolicy:
+    """
+    Decides when to hedge, from recent latencies and an extra-load budget.
+
+    Each function/operation/model keeps its last HEDGE_CONFIG["window"]
+    request latencies; a call still running at their HEDGE_CONFIG["percentile"]
+    gets a duplicate. Every call earns HEDGE_CONFIG["budget"] of a hedge and
+    every hedge spends one, so hedges never exceed that fraction of calls.
+
+    Attributes:
+        calls (int): Calls eligible for hedging
+        hedged (int): Duplicates sent
+        won (int): Calls answered by the duplicate
+        denied (int): Hedges skipped because the budget was spent
+    """
+
+    # Unused budget carried over, in hedges; caps bursts after quiet periods
+    MAX_TOKENS = 10.0
+
+    def __init__(self):
+        self._latencies: Dict[metrics.Labels, Deque[float]] = {}
+        self._tokens = 0.0
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.hedged = 0
+        self.won = 0
+        self.denied = 0
+
+    def applies(self, labels: metrics.Labels) -> bool:
+        return HEDGE_CONFIG["enabled"] and dict(labels).get("function") in HEDGE_CONFIG["functions"]
+
+    def delay(self, labels: metrics.Labels) -> Optional[float]:
+        """Return how long to wait before hedging a call, or None until enough latencies are known."""
+        with self._lock:
+            self.calls += 1
+            self._tokens = min(self.MAX_TOKENS, self._tokens + HEDGE_CONFIG["budget"])
+            samples = self._latencies.get(labels)
+            if samples is None or len(samples) < HEDGE_CONFIG["min_samples"]:
+                return None
+            ordered = sorted(samples)
+        index = min(len(ordered) - 1, int(HEDGE_CONFIG["percentile"] * len(ordered)))
+        return ordered[index]
+
+    def record(self, labels: metrics.Labels, seconds: float) -> None:
+        """Add the latency of one completed request."""
+        with self._lock:
+            samples = self._latencies.get(labels)
+            if samples is None or samples.maxlen != HEDGE_CONFIG["window"]:
+                samples = self._latencies[labels] = deque(samples or (), maxlen=HEDGE_CONFIG["window"])
+            samples.append(seconds)
+
+    def spend(self) -> bool:
+        """Take one hedge from the budget, if there is one."""
+        with self._lock:
+            if self._tokens < 1.0:
+                self.denied += 1
+                return False
+            self._tokens -= 1.0
+            self.hedged += 1
+            return True
+
+    def record_win(self) -> None:
+        with self._lock:
+            self.won += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"calls": self.calls, "hedged": self.hedged, "won": self.won, "denied": self.denied}
+
+policy = HedgePolicy()
+
+async def _timed(labels: metrics.Labels, attempt: Attempt, base_url: str) -> Any:
+    started = time.perf_counter()
+    result = await attempt(base_url)
+    policy.record(labels, time.perf_counter() - started)
+    return result
+
+async def ahedged(labels: metrics.Labels, attempt: Attempt) -> Any:
+    """
+    Run attempt, sending a duplicate if it outlives the hedging threshold.
+
+    The first successful response wins and the other request is cancelled.
+    If one request fails, the other still gets its chance.
+
+    Args:
+        labels (metrics.Labels): Labels of the calling function agent
+        attempt (Attempt): Starts one request against the given base URL
+
+    Returns:
+        Any: Result of the winning request
+    """
+    delay = policy.delay(labels)
+    if delay is None:
+        return await _timed(labels, attempt, OLLAMA_CONFIG["base_url"])
+    return await _race(labels, attempt, delay)
+
+async def _race(labels: metrics.Labels, attempt: Attempt, delay: float) -> Any:
+    import asyncio
+
+    primary_url = OLLAMA_CONFIG["base_url"]
+    started = time.perf_counter()
+    primary = asyncio.ensure_future(_timed(labels, attempt, primary_url))
+    tasks = {primary}
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=delay)
+        if done or not policy.spend():
+            return await primary
+
+        hedge_url = HEDGE_CONFIG["base_url"] or primary_url
+        logger.info(f"Hedging {dict(labels)['function']} after {delay:.2f}s against {hedge_url}")
+        hedge = asyncio.ensure_future(_timed(labels, attempt, hedge_url))
+        tasks.add(hedge)
+
+        error = None
+        while tasks:
+            done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    won = task is hedge
+                    if won:
+                        policy.record_win()
+                    metrics.record_hedge(labels, won)
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        # A finished primary was timed by _timed; a cancelled slow one still belongs
+        # in the tail, with its elapsed time as a lower bound
+        if not primary.done():
+            policy.record(labels, time.perf_counter() - started)
+        for task in tasks:
+            task.cancel()
+
+# Event loop that runs hedged requests for sync callers
+_loop = None
+_loop_lock = threading.Lock()
+
+def _background_loop() -> "asyncio.AbstractEventLoop":
+    global _loop
+    import asyncio
+
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="hedging-loop", daemon=True).start()
+    return _loop
+
+def hedged(labels: metrics.Labels, attempt: Attempt, direct: Callable[[], Any]) -> Any:
+    """
+    Sync counterpart of ahedged.
+
+    Until the threshold is known the request runs directly in the calling
+    thread. After that it runs on a background event loop, because only async
+    requests can be cancelled when the other one wins.
+
+    Args:
+        labels (metrics.Labels): Labels of the calling function agent
+        attempt (Attempt): Starts one async request against the given base URL
+        direct (Callable[[], Any]): Performs the request synchronously
+
+    Returns:
+        Any: Result of the winning request
+    """
+    import asyncio
+
+    delay = policy.delay(labels)
+    if delay is None:
+        started = time.perf_counter()
+        result = direct()
+        policy.record(labels, time.perf_counter() - started)
+        return result
+    return asyncio.run_coroutine_threadsafe(_race(labels, attempt, delay), _background_loop()).result()
+
+def get_hedging_stats() -> Dict[str, int]:
+    """
+    Return how many calls were eligible for hedging, hedged, won by the duplicate, or denied by the budget.
+
+    Returns:
+        Dict[str, int]: calls, hedged, won and denied
+    """
+    return policy.stats()
@@ -0,0 +1,143 @@
+import base64
+import hashlib
+import io
+import logging
+import os
+import sys
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, NamedTuple, Tuple
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+# Add root directory to Python path
+root_dir = str(Path(__file__).resolve().parent.parent)
+if root_dir not in sys.path:
+    sys.path.append(root_dir)
+
+from config import VISION_CONFIG, LOG_CONFIG
+
+# Configure logging
+logging.basicConfig(level=LOG_CONFIG["level"], format=LOG_CONFIG["format"])
+logger = logging.getLogger(__name__)
+
+MIME_TYPES = {"JPEG": "image/jpeg", "PNG": "image/png", "WEBP": "image/webp"}
+
+class ImagePayload(NamedTuple):
+    """An image ready to embed in a chat message."""
+    mime_type: str
+    data: str  # Base64-encoded image bytes
+    size: Tuple[int, int]  # Width and height after preprocessing
+    source_bytes: int  # Size of the file on disk
+
+    @property
+    def data_url(self) -> str:
+        return f"data:{self.mime_type};base64,{self.data}"
+
+# Encoded payloads by content hash and preprocessing settings, least recently used first
+_payloads: "OrderedDict[Tuple, ImagePayload]" = OrderedDict()
+# Content hash of each path, valid while its mtime and size are unchanged
+_digests: Dict[str, Tuple[int, int, str]] = {}
+_lock = threading.Lock()
+
+def _has_alpha(image: "Image.Image") -> bool:
+    """True if the image has any pixel that is not fully opaque."""
+    if image.mode == "P" and "transparency" in image.info:
+        image = image.convert("RGBA")
+    if image.mode not in ("RGBA", "LA", "PA"):
+        return False
+    return image.getchannel("A").getextrema()[0] < 255
+
+def _encode(raw: bytes, max_size: int, quality: int) -> Tuple[bytes, str, Tuple[int, int]]:
+    """Downsize and re-encode image bytes, returning (bytes, mime type, size)."""
+    from PIL import Image, ImageOps
+
+    with Image.open(io.BytesIO(raw)) as image:
+        source_format = image.format
+        image = ImageOps.exif_transpose(image)
+        resized = max(image.size) > max_size
+        if resized:
+            image.thumbnail((max_size, max_size), Image.LANCZOS)
+
+        # JPEG has no alpha channel, so transparent images stay PNG
+        if _has_alpha(image):
+            target = "PNG"
+            image = image.convert("RGBA")
+        else:
+            target = "JPEG"
+            image = image.convert("RGB")
+
+        buffer = io.BytesIO()
+        if target == "JPEG":
+            image.save(buffer, "JPEG", quality=quality, optimize=True)
+        else:
+            image.save(buffer, "PNG", optimize=True)
+        encoded = buffer.getvalue()
+
+        # An untouched original that is already smaller is sent as-is
+        if not resized and source_format in MIME_TYPES and len(raw) <= len(encoded):
+            return raw, MIME_TYPES[source_format], image.size
+        return encoded, MIME_TYPES[target], image.size
+
+def prepare_image(image_path: str, max_size: int = None, quality: int = None) -> ImagePayload:
+    """
+    Downsize and re-encode an image for the vision model, reusing cached payloads.
+
+    Images larger than max_size on their longest side are scaled down. Opaque
+    images are re-encoded as JPEG and transparent ones as PNG, each with the
+    matching MIME type. Payloads are cached by file content hash, and a path
+    is only re-hashed when its mtime or size changes.
+
+    Args:
+        image_path (str): Path to image file
+        max_size (int, optional): Longest side in pixels, defaults to VISION_CONFIG["max_size"]
+        quality (int, optional): JPEG quality, defaults to VISION_CONFIG["jpeg_quality"]
+
+    Returns:
+        ImagePayload: Base64 payload with its MIME type
+    """
+    max_size = max_size or VISION_CONFIG["max_size"]
+    quality = quality or VISION_CONFIG["jpeg_quality"]
+    path = os.path.abspath(image_path)
+    stat = os.stat(path)
+
+    raw = None
+    with _lock:
+        known = _digests.get(path)
+    if known is not None and known[:2] == (stat.st_mtime_ns, stat.st_size):
+        digest = known[2]
+    else:
+        with open(path, "rb") as f:
+            raw = f.read()
+        digest = hashlib.sha256(raw).hexdigest()
+        with _lock:
+            _digests[path] = (stat.st_mtime_ns, stat.st_size, digest)
+
+    key = (digest, max_size, quality)
+    with _lock:
+        payload = _payloads.get(key)
+        if payload is not None:
+            _payloads.move_to_end(key)
+            logger.debug(f"Image payload cache hit for {image_path}")
+            return payload
+
+    if raw is None:
+        with open(path, "rb") as f:
+            raw = f.read()
+    encoded, mime_type, size = _encode(raw, max_size, quality)
+    payload = ImagePayload(mime_type, base64.b64encode(encoded).decode("utf-8"), size, len(raw))
+    logger.info(f"Prepared {image_path}: {len(raw)} -> {len(encoded)} bytes as {mime_type} {size[0]}x{size[1]}")
+
+    with _lock:
+        _payloads[key] = payload
+        while len(_payloads) > VISION_CONFIG["cache_entries"]:
+            _payloads.popitem(last=False)
+    return payload
+
+def clear_image_cache() -> None:
+    """Drop every cached image payload."""
+    with _lock:
+        _payloads.clear()
+        _digests.clear()
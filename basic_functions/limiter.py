@@ -0,0 +1,308 @@
+import logging
+import math
+import sys
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Deque, Dict, Optional
+
+# Add root directory to Python path
+root_dir = str(Path(__file__).resolve().parent.parent)
+if root_dir not in sys.path:
+    sys.path.append(root_dir)
+
+from config import CLIENT_CONFIG, CONCURRENCY_CONFIG, LOG_CONFIG
+from basic_functions import metrics
+
+# Configure logging
+logging.basicConfig(level=LOG_CONFIG["level"], format=LOG_CONFIG["format"])
+logger = logging.getLogger(__name__)
+
+# HTTP statuses that mean the backend is overloaded rather than the request being bad
+OVERLOAD_STATUSES = {408, 429, 500, 502, 503, 504}
+
+def is_overload(error: BaseException) -> bool:
+    """
+    Tell whether an exception signals an overloaded backend.
+
+    Timeouts, 429s and 5xx responses count; bad requests and cancellations don't.
+
+    Args:
+        error (BaseException): Exception raised by a request
+
+    Returns:
+        bool: True if the limit should back off
+    """
+    status = getattr(error, "status_code", None)
+    if status is not None:
+        return status in OVERLOAD_STATUSES or status >= 500
+    # openai.APITimeoutError, httpx.TimeoutException, asyncio.TimeoutError and TimeoutError
+    return isinstance(error, TimeoutError) or "Timeout" in type(error).__name__
+
+class _ThreadWaiter:
+    __slots__ = ("event",)
+
+    def __init__(self):
+        self.event = threading.Event()
+
+    def wake(self, limiter: "AdaptiveLimiter") -> None:
+        self.event.set()
+
+class _AsyncWaiter:
+    __slots__ = ("loop", "future")
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.future = loop.create_future()
+
+    def wake(self, limiter: "AdaptiveLimiter") -> None:
+        self.loop.call_soon_threadsafe(self._grant, limiter)
+
+    def _grant(self, limiter: "AdaptiveLimiter") -> None:
+        if self.future.done():
+            # Cancelled after the slot was handed over; pass it on
+            limiter._release_slot()
+        else:
+            self.future.set_result(None)
+
+class _Latency:
+    """Latency samples of the current window and the unloaded baseline for one kind of request."""
+    __slots__ = ("total", "count", "recent", "baseline")
+
+    def __init__(self):
+        self.total = 0.0
+        self.count = 0
+        self.recent = None
+        self.baseline = None
+
+class AdaptiveLimiter:
+    """
+    Concurrency limit on backend requests that adapts to latency and errors.
+
+    Threads and coroutines on any event loop wait in one FIFO queue. The limit
+    is adjusted once per window of about `limit` completed requests, roughly
+    one round trip. Each window compares the average latency of every kind of
+    request (model, function agent and request type) against that kind's
+    unloaded baseline:
+    - Within tolerance and in use, the limit grows by sqrt(limit). Before the
+      first slowdown it doubles instead (slow start).
+    - Above tolerance, meaning the backend has started queueing, the limit
+      shrinks in proportion, by at most half.
+    Timeouts, 429s and 5xx responses multiply the limit by `backoff`, at most
+    once per window. Time spent waiting for a slot is not part of the latency
+    samples.
+
+    Attributes:
+        limit (float): Current limit; int(limit) requests may be in flight
+        in_flight (int): Requests holding a slot
+    """
+
+    def __init__(self, initial_limit: float = None, min_limit: int = None, max_limit: int = None,
+                 adaptive: bool = None, tolerance: float = None, backoff: float = None):
+        self.min_limit = min_limit or CONCURRENCY_CONFIG["min_limit"]
+        self.max_limit = max_limit or CLIENT_CONFIG["max_concurrency"]
+        self.adaptive = CONCURRENCY_CONFIG["adaptive"] if adaptive is None else adaptive
+        self.tolerance = tolerance or CONCURRENCY_CONFIG["tolerance"]
+        self.backoff = backoff or CONCURRENCY_CONFIG["backoff"]
+        self.limit = float(min(self.max_limit, max(self.min_limit, initial_limit or CONCURRENCY_CONFIG["initial_limit"])))
+        self.in_flight = 0
+        self._waiters: Deque[Any] = deque()
+        self._latency: Dict[str, _Latency] = {}
+        self._samples = 0
+        self._busy = 0
+        self._backed_off = False
+        self._slow_start = self.adaptive
+        self._lock = threading.Lock()
+        self._publish()
+
+    def _publish(self) -> None:
+        metrics.set_gauge("llm_concurrency_limit", int(self.limit))
+        metrics.set_gauge("llm_requests_in_flight", self.in_flight)
+        metrics.set_gauge("llm_requests_queued", len(self._waiters))
+
+    def _try_acquire(self, waiter=None) -> bool:
+        """Take a slot if one is free and nobody is queued, else enqueue waiter."""
+        with self._lock:
+            if not self._waiters and self.in_flight < int(self.limit):
+                self.in_flight += 1
+                self._publish()
+                return True
+            if waiter is not None:
+                self._waiters.append(waiter)
+                self._publish()
+            return False
+
+    def acquire(self) -> float:
+        """
+        Block until a slot is free.
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        started = time.perf_counter()
+        waiter = _ThreadWaiter()
+        if not self._try_acquire(waiter):
+            waiter.event.wait()
+        return time.perf_counter() - started
+
+    async def aacquire(self) -> float:
+        """Async counterpart of acquire."""
+        import asyncio
+
+        started = time.perf_counter()
+        waiter = _AsyncWaiter(asyncio.get_running_loop())
+        if self._try_acquire(waiter):
+            return time.perf_counter() - started
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            with self._lock:
+                try:
+                    self._waiters.remove(waiter)
+                    self._publish()
+                    granted = False
+                except ValueError:
+                    granted = True
+            # Handed a slot at the moment it was cancelled
+            if granted and waiter.future.done() and not waiter.future.cancelled():
+                self._release_slot()
+            raise
+        return time.perf_counter() - started
+
+    def _release_slot(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            self._grant()
+
+    def _grant(self) -> None:
+        """Hand free slots to queued waiters; call with the lock held."""
+        while self._waiters and self.in_flight < int(self.limit):
+            self.in_flight += 1
+            self._waiters.popleft().wake(self)
+        self._publish()
+
+    def release(self, key: str, latency: float, error: Optional[BaseException] = None) -> None:
+        """
+        Return a slot and update the limit from the request's outcome.
+
+        Args:
+            key (str): Kind of request whose latencies are comparable, e.g. the model name
+            latency (float): Seconds the request held its slot
+            error (Optional[BaseException]): Exception the request raised, if any
+        """
+        with self._lock:
+            busy = self.in_flight
+            self.in_flight -= 1
+            if self.adaptive:
+                if error is None:
+                    self._on_success(key, latency, busy)
+                elif is_overload(error):
+                    self._on_overload(key, error)
+            self._grant()
+
+    def _on_success(self, key: str, latency: float, busy: int) -> None:
+        stats = self._latency.get(key)
+        if stats is None:
+            stats = self._latency[key] = _Latency()
+        stats.total += latency
+        stats.count += 1
+        self._samples += 1
+        self._busy = max(self._busy, busy)
+        # A window spans about one round trip at the current limit
+        if self._samples >= int(self.limit):
+            self._adjust()
+
+    def _adjust(self) -> None:
+        """Close the sample window and move the limit; call with the lock held."""
+        gradient = 1.0
+        for stats in self._latency.values():
+            if not stats.count:
+                continue
+            stats.recent = stats.total / stats.count
+            stats.total, stats.count = 0.0, 0
+            # The baseline is the lowest window average, drifting up slowly so it
+            # follows lasting workload changes without absorbing backend queueing
+            if stats.baseline is None or stats.recent < stats.baseline:
+                stats.baseline = stats.recent
+            else:
+                stats.baseline += 0.005 * (stats.recent - stats.baseline)
+            gradient = min(gradient, max(0.5, self.tolerance * stats.baseline / stats.recent))
+
+        busy, backed_off = self._busy, self._backed_off
+        self._samples, self._busy, self._backed_off = 0, 0, False
+        if backed_off:
+            return
+        if gradient < 1.0:
+            self._slow_start = False
+            if self.limit <= self.min_limit:
+                # Nothing is queued at the minimum, so this is the backend's unloaded latency now
+                for stats in self._latency.values():
+                    stats.baseline = stats.recent
+            self.limit = max(self.min_limit, self.limit * gradient)
+        elif busy >= self.limit / 2:
+            # Only grow a limit that is actually being used
+            growth = self.limit if self._slow_start else math.sqrt(self.limit)
+            self.limit = min(self.max_limit, self.limit + growth)
+
+    def _on_overload(self, key: str, error: BaseException) -> None:
+        # Errors from one burst arrive together; back off once per window
+        if self._backed_off:
+            return
+        self._backed_off = True
+        self._slow_start = False
+        previous = self.limit
+        self.limit = max(self.min_limit, self.limit * self.backoff)
+        logger.warning(f"Backend overloaded ({type(error).__name__}), concurrency limit {previous:.1f} -> {self.limit:.1f}")
+
+    def slot(self, key: str) -> "_Slot":
+        """Context manager (sync or async) holding a slot for one request to key."""
+        return _Slot(self, key)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "limit": int(self.limit),
+                "in_flight": self.in_flight,
+                "queued": len(self._waiters),
+                "latency": {key: {"recent": stats.recent, "baseline": stats.baseline}
+                            for key, stats in self._latency.items()},
+            }
+
+class _Slot:
+    __slots__ = ("limiter", "key", "started")
+
+    def __init__(self, limiter: AdaptiveLimiter, key: str):
+        self.limiter = limiter
+        self.key = key
+        self.started = 0.0
+
+    def _granted(self, waited: float) -> None:
+        metrics.observe("llm_queue_wait_seconds", waited)
+        self.started = time.perf_counter()
+
+    def __enter__(self) -> "_Slot":
+        self._granted(self.limiter.acquire())
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.limiter.release(self.key, time.perf_counter() - self.started, exc)
+
+    async def __aenter__(self) -> "_Slot":
+        self._granted(await self.limiter.aacquire())
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        self.limiter.release(self.key, time.perf_counter() - self.started, exc)
+
+# Shared by every request to the backend
+limiter = AdaptiveLimiter()
+
+def get_concurrency_stats() -> Dict[str, Any]:
+    """
+    Return the adaptive limiter's current limit, in-flight requests, queue depth and latency averages.
+
+    Returns:
+        Dict[str, Any]: limit, in_flight, queued and recent/baseline latency per kind of request
+    """
+    return limiter.stats()
@@ -0,0 +1,346 @@
+import ast
+import logging
+import math
+import re
+import sys
+from collections import defaultdict
+from pathlib import Path
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Union
+
+# Add root directory to Python path
+root_dir = str(Path(__file__).resolve().parent.parent)
+if root_dir not in sys.path:
+    sys.path.append(root_dir)
+
+from config import LOG_CONFIG
+
+# Configure logging
+logging.basicConfig(level=LOG_CONFIG["level"], format=LOG_CONFIG["format"])
+logger = logging.getLogger(__name__)
+
+Number = Union[int, float]
+
+# Largest exponent / factorial argument accepted, to keep evaluation instant
+MAX_EXPONENT = 1000
+MAX_FACTORIAL = 1000
+
+# Largest integer power result accepted, in bits (about 3000 decimal digits)
+MAX_RESULT_BITS = 10000
+
+# Groups smaller than this are evaluated one by one instead of with NumPy
+VECTOR_MIN_GROUP = 8
+
+# Results beyond this magnitude are recomputed with exact integer arithmetic
+EXACT_LIMIT = 2 ** 53
+
+CONSTANTS = {
+    "pi": math.pi,
+    "e": math.e,
+    "tau": math.tau,
+}
+
+def _log(x, base=None):
+    return math.log(x) if base is None else math.log(x, base)
+
+def _power(base, exponent, modulus=None):
+    """
+    base ** exponent, refusing powers too large to compute instantly.
+
+    Both pow() and the ** operator go through here. The exponent is capped
+    at MAX_EXPONENT, and an integer result is estimated from the base's bit
+    length before anything is computed, so chained powers such as
+    ((10**1000)**1000)**1000 are rejected at the first oversized step.
+    """
+    if modulus is not None:
+        # Modular exponentiation stays small whatever the exponent
+        return pow(base, exponent, modulus)
+    if _exceeds(exponent, MAX_EXPONENT):
+        raise ValueError("exponent too large")
+    if isinstance(base, int) and isinstance(exponent, int) and exponent > 0 \
+            and abs(base).bit_length() * exponent > MAX_RESULT_BITS:
+        raise ValueError("result too large")
+    return base ** exponent
+
+def _factorial(x):
+    if x != int(x) or not 0 <= x <= MAX_FACTORIAL:
+        raise ValueError("factorial argument out of range")
+    return math.factorial(int(x))
+
+SCALAR_FUNCTIONS = {
+    "sqrt": math.sqrt,
+    "cbrt": lambda x: math.copysign(abs(x) ** (1 / 3), x),
+    "sin": math.sin,
+    "cos": math.cos,
+    "tan": math.tan,
+    "asin": math.asin,
+    "acos": math.acos,
+    "atan": math.atan,
+    "sinh": math.sinh,
+    "cosh": math.cosh,
+    "tanh": math.tanh,
+    "exp": math.exp,
+    "log": _log,
+    "ln": math.log,
+    "log10": math.log10,
+    "log2": math.log2,
+    "abs": abs,
+    "floor": math.floor,
+    "ceil": math.ceil,
+    "round": round,
+    "radians": math.radians,
+    "degrees": math.degrees,
+    "factorial": _factorial,
+    "hypot": math.hypot,
+    "pow": _power,
+    "min": min,
+    "max": max,
+}
+
+@lru_cache(maxsize=None)
+def _vector_functions() -> Dict[str, object]:
+    """Numpy counterparts of FUNCTIONS, built on first use so numpy loads only for batches."""
+    import numpy as np
+
+    return {
+        "sqrt": np.sqrt,
+        "cbrt": np.cbrt,
+        "sin": np.sin,
+        "cos": np.cos,
+        "tan": np.tan,
+        "asin": np.arcsin,
+        "acos": np.arccos,
+        "atan": np.arctan,
+        "sinh": np.sinh,
+        "cosh": np.cosh,
+        "tanh": np.tanh,
+        "exp": np.exp,
+        "log": lambda x, base=None: np.log(x) if base is None else np.log(x) / np.log(base),
+        "ln": np.log,
+        "log10": np.log10,
+        "log2": np.log2,
+        "abs": np.abs,
+        "floor": np.floor,
+        "ceil": np.ceil,
+        "round": np.round,
+        "radians": np.radians,
+        "degrees": np.degrees,
+        "hypot": np.hypot,
+        "pow": _power,
+        "min": lambda *args: np.minimum.reduce(np.broadcast_arrays(*args)),
+        "max": lambda *args: np.maximum.reduce(np.broadcast_arrays(*args)),
+    }
+
+_BINARY_OPERATORS = {
+    ast.Add: lambda a, b: a + b,
+    ast.Sub: lambda a, b: a - b,
+    ast.Mult: lambda a, b: a * b,
+    ast.Div: lambda a, b: a / b,
+    ast.FloorDiv: lambda a, b: a // b,
+    ast.Mod: lambda a, b: a % b,
+    ast.Pow: _power,
+}
+
+_UNARY_OPERATORS = {
+    ast.UAdd: lambda a: +a,
+    ast.USub: lambda a: -a,
+}
+
+# A number, or a numeric placeholder in a batch template
+_NUMBER = r"(?:\d+(?:\.\d+)?|_c\d+)"
+
+_THOUSANDS = re.compile(r"(?<=\d),(?=\d{3}\b)")
+
+# Natural-language phrasings rewritten into expression syntax, applied in order
+_REWRITES = [
+    (re.compile(r"^(?:what is|what's|whats|calculate|compute|evaluate|solve|find)\s+(?:the\s+)?(?:value of\s+)?"), ""),
+    (re.compile(r"[=?]+\s*$"), ""),
+    (re.compile(r"\bsquare root of\s+(" + _NUMBER + r"|\([^()]*\))"), r"sqrt(\1)"),
+    (re.compile(r"\bcube root of\s+(" + _NUMBER + r"|\([^()]*\))"), r"cbrt(\1)"),
+    (re.compile(r"(" + _NUMBER + r"|\([^()]*\))\s+squared\b"), r"(\1)**2"),
+    (re.compile(r"(" + _NUMBER + r"|\([^()]*\))\s+cubed\b"), r"(\1)**3"),
+    (re.compile(r"(" + _NUMBER + r"|pi)\s*(?:degrees|degree|deg|°)\s+(?:to|in)\s+radians?\b"), r"radians(\1)"),
+    (re.compile(r"(" + _NUMBER + r"|pi)\s*(?:radians|radian|rad)\s+(?:to|in)\s+degrees?\b"), r"degrees(\1)"),
+    (re.compile(r"^convert\s+"), ""),
+    (re.compile(r"(" + _NUMBER + r")\s*(?:degrees|degree|deg|°)"), r"radians(\1)"),
+    (re.compile(r"(" + _NUMBER + r"|pi)\s*(?:radians|radian|rad)\b"), r"\1"),
+    (re.compile(r"(" + _NUMBER + r")\s*%\s*of\s+"), r"(\1/100)*"),
+    (re.compile(r"(" + _NUMBER + r")\s*%(?!\s*[\d(_])"), r"(\1/100)"),
+    (re.compile(r"\bto the power of\b"), "**"),
+    (re.compile(r"\bplus\b"), "+"),
+    (re.compile(r"\bminus\b"), "-"),
+    (re.compile(r"\b(?:times|multiplied by)\b"), "*"),
+    (re.compile(r"\b(?:divided by|over)\b"), "/"),
+    (re.compile(r"\bmod(?:ulo)?\b"), "%"),
+    (re.compile(r"(?<=[\d)])\s*[x×]\s*(?=[\d(_])"), "*"),
+    (re.compile(r"÷"), "/"),
+    (re.compile(r"\^"), "**"),
+]
+
+def normalize_expression(question: str) -> str:
+    """
+    Rewrite common natural-language math phrasing into Python expression syntax.
+
+    Args:
+        question (str): Question such as "15% of 200" or "sin(90 degrees)"
+
+    Returns:
+        str: Expression text such as "(15/100)*200" or "sin(radians(90))"
+    """
+    expression = _THOUSANDS.sub("", question.strip().lower())
+    for pattern, replacement in _REWRITES:
+        expression = pattern.sub(replacement, expression).strip()
+    return expression
+
+def _parse(expression: str, placeholders: bool = False) -> ast.Expression:
+    """Parse a normalized expression, rejecting unsupported syntax."""
+    tree = ast.parse(expression, mode="eval")
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Call):
+            if not isinstance(node.func, ast.Name) or node.func.id not in SCALAR_FUNCTIONS or node.keywords:
+                raise ValueError("unsupported function call")
+        elif isinstance(node, ast.Name):
+            if node.id not in CONSTANTS and node.id not in SCALAR_FUNCTIONS \
+                    and not (placeholders and node.id.startswith("_c")):
+                raise ValueError(f"unknown name: {node.id}")
+        elif isinstance(node, ast.Constant):
+            if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+                raise ValueError("unsupported constant")
+        elif not isinstance(node, (ast.Expression, ast.BinOp, ast.UnaryOp, ast.Load)
+                            + tuple(_BINARY_OPERATORS) + tuple(_UNARY_OPERATORS)):
+            raise ValueError(f"unsupported syntax: {type(node).__name__}")
+    return tree
+
+def _evaluate(node: ast.AST, env: Dict[str, object], functions: Dict[str, object]):
+    """Evaluate a validated expression tree with the given names and functions."""
+    if isinstance(node, ast.Expression):
+        return _evaluate(node.body, env, functions)
+    if isinstance(node, ast.Constant):
+        return node.value
+    if isinstance(node, ast.Name):
+        return env[node.id] if node.id in env else CONSTANTS[node.id]
+    if isinstance(node, ast.UnaryOp):
+        return _UNARY_OPERATORS[type(node.op)](_evaluate(node.operand, env, functions))
+    if isinstance(node, ast.BinOp):
+        left = _evaluate(node.left, env, functions)
+        right = _evaluate(node.right, env, functions)
+        return _BINARY_OPERATORS[type(node.op)](left, right)
+    if isinstance(node, ast.Call):
+        args = [_evaluate(arg, env, functions) for arg in node.args]
+        return functions[node.func.id](*args)
+    raise ValueError(f"unsupported syntax: {type(node).__name__}")
+
+def _exceeds(value, limit: float) -> bool:
+    """abs(value) > limit for scalars and, elementwise with any(), for arrays."""
+    if isinstance(value, (int, float)):
+        return abs(value) > limit
+    import numpy as np
+    return bool(np.any(np.abs(value) > limit))
+
+def format_result(value: Number) -> str:
+    """Render a numeric result, dropping float noise and trailing .0."""
+    if isinstance(value, int):
+        return str(value)
+    value = round(float(value), 10)
+    if value.is_integer() and abs(value) < EXACT_LIMIT:
+        return str(int(value))
+    return repr(value)
+
+def evaluate_expression(question: str) -> Optional[str]:
+    """
+    Evaluate a math question locally without calling the LLM.
+
+    Args:
+        question (str): Arithmetic question, e.g. "2 + 2=", "15% of 200", "sin(90 degrees)"
+
+    Returns:
+        Optional[str]: Formatted result, or None if the question is not a plain expression
+    """
+    try:
+        value = _evaluate(_parse(normalize_expression(question)), {}, SCALAR_FUNCTIONS)
+        if isinstance(value, complex) or (isinstance(value, float) and not math.isfinite(value)):
+            return None
+        return format_result(value)
+    except (SyntaxError, ValueError, TypeError, ZeroDivisionError, OverflowError, KeyError, RecursionError):
+        return None
+
+# Standalone numeric literals (not part of names such as log10 or 1e5)
+_LITERAL = re.compile(r"(?<![\w.])\d+(?:\.\d+)?(?![\w.])")
+
+def _templatize(expression: str):
+    """Replace numeric literals with placeholders so same-shaped expressions share a template."""
+    constants = []
+
+    def replace(match):
+        constants.append(float(match.group(0)))
+        return f"_c{len(constants) - 1}"
+
+    return _LITERAL.sub(replace, expression), constants
+
+def evaluate_batch(questions: Sequence[str]) -> List[Optional[str]]:
+    """
+    Evaluate many math questions at once.
+
+    Questions with the same shape (e.g. "a + b * c" or "a% of b") are
+    normalized and parsed once, then evaluated together as NumPy operations
+    over all their constants.
+
+    Args:
+        questions (Sequence[str]): Questions to evaluate
+
+    Returns:
+        List[Optional[str]]: Formatted results, None where the question is not a plain expression
+    """
+    import numpy as np
+
+    vector_functions = _vector_functions()
+    results: List[Optional[str]] = [None] * len(questions)
+    groups = defaultdict(list)
+
+    # Template the raw text first so phrasing is normalized once per shape, not per question
+    for index, question in enumerate(questions):
+        if "_" in question:
+            continue
+        template, constants = _templatize(_THOUSANDS.sub("", question.strip().lower()))
+        groups[template].append((index, constants))
+
+    for template, members in groups.items():
+        try:
+            tree = _parse(normalize_expression(template), placeholders=True)
+        except (SyntaxError, ValueError, RecursionError):
+            continue
+
+        uses_scalar_only = any(
+            isinstance(node, ast.Call) and node.func.id not in vector_functions
+            for node in ast.walk(tree)
+        )
+        if len(members) < VECTOR_MIN_GROUP or uses_scalar_only:
+            for index, _ in members:
+                results[index] = evaluate_expression(questions[index])
+            continue
+
+        columns = np.array([constants for _, constants in members], dtype=np.float64).reshape(len(members), -1)
+        env = {f"_c{i}": columns[:, i] for i in range(columns.shape[1])}
+        try:
+            with np.errstate(all="ignore"):
+                values = np.broadcast_to(_evaluate(tree, env, vector_functions), (len(members),))
+        except (ValueError, TypeError, KeyError, OverflowError):
+            for index, _ in members:
+                results[index] = evaluate_expression(questions[index])
+            continue
+
+        values = np.round(values.astype(np.float64), 10)
+        finite = np.isfinite(values)
+        exact = finite & (np.abs(values) < EXACT_LIMIT)
+        integral = exact & (values == np.floor(values))
+        for (index, _), value, is_finite, is_exact, is_integral in zip(members, values.tolist(), finite, exact, integral):
+            if not is_finite:
+                continue
+            if not is_exact:
+                results[index] = evaluate_expression(questions[index])
+            elif is_integral:
+                results[index] = str(int(value))
+            else:
+                results[index] = repr(value)
+
+    return results
@@ -1,22 +1,69 @@
-from openai import OpenAI
 import logging
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import List, Sequence
 
 # Add root directory to Python path
 root_dir = str(Path(__file__).resolve().parent.parent)
 if root_dir not in sys.path:
     sys.path.append(root_dir)
 
-from config import OLLAMA_CONFIG, LOG_CONFIG
+from config import OLLAMA_CONFIG, MICROBATCH_CONFIG, LOG_CONFIG
+from basic_functions.completion import chat_completion, achat_completion
+from basic_functions.metrics import instrument, in_context
+from basic_functions.math_eval import evaluate_expression, evaluate_batch
+from basic_functions.microbatch import MicroBatcher, register_batcher
 
 # Configure logging
 logging.basicConfig(level=LOG_CONFIG["level"], format=LOG_CONFIG["format"])
 logger = logging.getLogger(__name__)
 
+SYSTEM_PROMPT = """You are a mathematical computation function. You ONLY output the numerical result.
+                    Examples:
+                    Input: 2 + 2=
+                    Output: 4
+                    
+                    Input: What is 5 * 3?
+                    Output: 15
+                    
+                    Input: Calculate 10/2
+                    Output: 5"""
+
+def _build_messages(question: str) -> list:
+    """Build the chat messages for a math question."""
+    return [
+        {
+            "role": "system", 
+            "content": SYSTEM_PROMPT
+        },
+        {
+            "role": "user",
+            "content": question
+        }
+    ]
+
+def _ask(question: str) -> str:
+    """Send one math question to the LLM."""
+    return chat_completion(
+        _build_messages(question),
+        temperature=OLLAMA_CONFIG["temperature"]
+    ).strip()
+
+# Packs concurrent word problems into one numbered prompt when MICROBATCH_CONFIG is enabled
+_batcher = register_batcher(MicroBatcher(
+    "math_function",
+    SYSTEM_PROMPT,
+    format_item=lambda question: " ".join(question.split()),
+    single=_ask,
+    temperature=OLLAMA_CONFIG["temperature"]
+))
+
+@instrument("math_function")
 def math_function(question: str) -> str:
     """
-    Process mathematical questions using LLM.
+    Process mathematical questions, evaluating plain expressions locally and
+    sending word problems to the LLM.
     
     Args:
         question (str): Mathematical question to process
@@ -28,38 +75,53 @@ def math_function(question: str) -> str:
         Exception: If API call fails
     """
     try:
-        client = OpenAI(
-            base_url=OLLAMA_CONFIG["base_url"],
-            api_key=OLLAMA_CONFIG["api_key"]
-        )
+        logger.info(f"Processing math question: {question}")
+        
+        response = evaluate_expression(question)
+        if response is not None:
+            logger.info(f"Evaluated locally: {response}")
+            return response
+        
+        if MICROBATCH_CONFIG["enabled"]:
+            response = _batcher.submit(question)
+        else:
+            response = _ask(question)
+        logger.info(f"Received response: {response}")
+        return response
+        
+    except Exception as e:
+        logger.error(f"Error processing math question: {str(e)}")
+        raise
+
+@instrument("math_function")
+async def amath_function(question: str) -> str:
+    """
+    Async version of math_function.
+    
+    Args:
+        question (str): Mathematical question to process
+        
+    Returns:
+        str: Calculated result
         
+    Raises:
+        Exception: If API call fails
+    """
+    try:
         logger.info(f"Processing math question: {question}")
         
-        completion = client.chat.completions.create(
-            model=OLLAMA_CONFIG["model"],
-            messages=[
-                {
-                    "role": "system", 
-                    "content": """You are a mathematical computation function. You ONLY output the numerical result.
-                    Examples:
-                    Input: 2 + 2=
-                    Output: 4
-                    
-                    Input: What is 5 * 3?
-                    Output: 15
-                    
-                    Input: Calculate 10/2
-                    Output: 5"""
-                },
-                {
-                    "role": "user",
-                    "content": question
-                }
-            ],
-            temperature=OLLAMA_CONFIG["temperature"]
-        )
+        response = evaluate_expression(question)
+        if response is not None:
+            logger.info(f"Evaluated locally: {response}")
+            return response
         
-        response = completion.choices[0].message.content.strip()
+        if MICROBATCH_CONFIG["enabled"]:
+            response = await _batcher.asubmit(question)
+        else:
+            response = (await achat_completion(
+                _build_messages(question),
+                temperature=OLLAMA_CONFIG["temperature"]
+            )).strip()
         logger.info(f"Received response: {response}")
         return response
         
@@ -67,6 +129,40 @@ def math_function(question: str) -> str:
         logger.error(f"Error processing math question: {str(e)}")
         raise
 
+@instrument("math_function", lambda args: "batch")
+def batch_math_function(questions: Sequence[str], max_workers: int = 8) -> List[str]:
+    """
+    Process many math questions at once.
+    
+    Plain expressions are evaluated together by the vectorised local
+    evaluator; only the remaining word problems are sent to the LLM,
+    concurrently.
+    
+    Args:
+        questions (Sequence[str]): Mathematical questions to process
+        max_workers (int): LLM requests in flight for unresolved questions
+        
+    Returns:
+        List[str]: Calculated results in input order
+        
+    Raises:
+        Exception: If an API call fails
+    """
+    try:
+        results = evaluate_batch(questions)
+        pending = [i for i, result in enumerate(results) if result is None]
+        logger.info(f"Evaluated {len(results) - len(pending)} of {len(results)} math questions locally")
+        
+        if pending:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                for i, response in zip(pending, executor.map(in_context(lambda i: math_function(questions[i])), pending)):
+                    results[i] = response
+        return results
+        
+    except Exception as e:
+        logger.error(f"Error processing math batch: {str(e)}")
+        raise
+
 if __name__ == "__main__":
     try:
         result = math_function("2 + 2=")
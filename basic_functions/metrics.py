@@ -0,0 +1,428 @@
+import bisect
+import contextvars
+import functools
+import inspect
+import logging
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Add root directory to Python path
+root_dir = str(Path(__file__).resolve().parent.parent)
+if root_dir not in sys.path:
+    sys.path.append(root_dir)
+
+from config import METRICS_CONFIG, LOG_CONFIG
+
+# Configure logging
+logging.basicConfig(level=LOG_CONFIG["level"], format=LOG_CONFIG["format"])
+logger = logging.getLogger(__name__)
+
+# Metric name -> (type, help text)
+METRICS = {
+    "llm_function_calls_total": ("counter", "Function agent calls by outcome"),
+    "llm_function_errors_total": ("counter", "Function agent calls that raised, by exception type"),
+    "llm_function_latency_seconds": ("histogram", "End-to-end function agent latency"),
+    "llm_time_to_first_token_seconds": ("histogram", "Time from request to the first streamed token"),
+    "llm_prompt_tokens_total": ("counter", "Prompt tokens reported by the backend"),
+    "llm_completion_tokens_total": ("counter", "Completion tokens reported by the backend"),
+    "llm_cache_hits_total": ("counter", "Response cache hits"),
+    "llm_cache_misses_total": ("counter", "Response cache misses"),
+    "llm_coalesced_requests_total": ("counter", "Calls that shared an identical request already in flight"),
+    "llm_hedged_requests_total": ("counter", "Duplicate requests sent for slow calls, by whether the duplicate won"),
+    "llm_cascade_served_total": ("counter", "Calls answered by each model cascade tier"),
+    "llm_cascade_escalations_total": ("counter", "Responses that failed validation and moved to the next tier"),
+    "llm_truncated_responses_total": ("counter", "Responses cut off at max_tokens, by whether a learned budget or the ceiling applied"),
+    "llm_output_token_budget": ("gauge", "Learned max_tokens per function, operation and model"),
+    "llm_concurrency_limit": ("gauge", "Current adaptive limit on in-flight backend requests"),
+    "llm_requests_in_flight": ("gauge", "Backend requests in flight"),
+    "llm_requests_queued": ("gauge", "Requests waiting for a concurrency slot"),
+    "llm_queue_wait_seconds": ("histogram", "Time requests waited for a concurrency slot"),
+}
+
+# Calls that never reach a model (local string and math paths) are labelled with this model
+LOCAL_MODEL = "local"
+
+Labels = Tuple[Tuple[str, str], ...]
+
+class _Histogram:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self, size: int):
+        self.counts = [0] * size
+        self.sum = 0.0
+        self.count = 0
+
+class MetricsRegistry:
+    """Thread-safe counters, gauges and fixed-bucket histograms keyed by metric name and labels."""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(sorted(buckets))
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._gauges: Dict[Tuple[str, Labels], float] = {}
+        self._histograms: Dict[Tuple[str, Labels], _Histogram] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, labels: Labels, value: float = 1.0) -> None:
+        key = (name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + value
+
+    def set(self, name: str, labels: Labels, value: float) -> None:
+        with self._lock:
+            self._gauges[(name, labels)] = value
+
+    def observe(self, name: str, labels: Labels, value: float) -> None:
+        key = (name, labels)
+        # Bucket i counts observations <= buckets[i]; the last slot is +Inf
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = _Histogram(len(self.buckets) + 1)
+            histogram.counts[index] += 1
+            histogram.sum += value
+            histogram.count += 1
+
+    def _quantile(self, counts: List[int], total: int, q: float) -> Optional[float]:
+        """Estimate a quantile by interpolating inside the bucket that holds it."""
+        if total == 0:
+            return None
+        rank = q * total
+        seen = 0
+        for i, count in enumerate(counts):
+            if seen + count >= rank and count:
+                if i == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[i - 1] if i else 0.0
+                return lower + (self.buckets[i] - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return every metric as plain data suitable for JSON."""
+        with self._lock:
+            counters = list(self._counters.items()) + list(self._gauges.items())
+            histograms = [(key, list(h.counts), h.sum, h.count) for key, h in self._histograms.items()]
+
+        result: Dict[str, Any] = {name: [] for name in METRICS}
+        for (name, labels), value in counters:
+            result.setdefault(name, []).append({"labels": dict(labels), "value": value})
+        for (name, labels), counts, total, count in histograms:
+            result.setdefault(name, []).append({
+                "labels": dict(labels),
+                "count": count,
+                "sum": total,
+                "buckets": {str(bound): n for bound, n in zip(self.buckets + (float("inf"),), _cumulative(counts))},
+                "p50": self._quantile(counts, count, 0.50),
+                "p95": self._quantile(counts, count, 0.95),
+                "p99": self._quantile(counts, count, 0.99),
+            })
+        return result
+
+    def render_prometheus(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        with self._lock:
+            counters = sorted(self._counters.items())
+            gauges = sorted(self._gauges.items())
+            histograms = sorted((key, list(h.counts), h.sum, h.count) for key, h in self._histograms.items())
+
+        lines = []
+        for name, (kind, help_text) in METRICS.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            if kind in ("counter", "gauge"):
+                for (metric, labels), value in (counters if kind == "counter" else gauges):
+                    if metric == name:
+                        lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+            else:
+                for (metric, labels), counts, total, count in histograms:
+                    if metric != name:
+                        continue
+                    bounds = [_format_value(bound) for bound in self.buckets] + ["+Inf"]
+                    for bound, cumulative in zip(bounds, _cumulative(counts)):
+                        lines.append(f"{name}_bucket{_format_labels(labels + (('le', bound),))} {cumulative}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(total)}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+
+def _cumulative(counts):
+    total = 0
+    for count in counts:
+        total += count
+        yield total
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+registry = MetricsRegistry(METRICS_CONFIG["latency_buckets"])
+
+# The tracked call the current thread or task is running, read by the completion core
+_current = contextvars.ContextVar("metrics_call", default=None)
+
+class Call:
+    """
+    Labels and timing for one function agent call.
+
+    Used as a context manager by track(). The completion core fills in the
+    model when a request is made; calls that never reach a model are labelled
+    LOCAL_MODEL. A streaming call is marked deferred and finished by its
+    stream once the last token arrives.
+    """
+    __slots__ = ("function", "operation", "model", "started", "deferred", "parent", "_token")
+
+    def __init__(self, function: str, operation: str = ""):
+        self.function = function
+        self.operation = operation or ""
+        self.model = None
+        self.deferred = False
+        self.started = 0.0
+        self.parent = None
+        self._token = None
+
+    def labels(self, model: str = None) -> Labels:
+        return (("function", self.function), ("operation", self.operation),
+                ("model", model or self.model or LOCAL_MODEL))
+
+    def __enter__(self) -> "Call":
+        self.started = time.perf_counter()
+        self.parent = _current.get()
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        _current.reset(self._token)
+        if not self.deferred or exc is not None:
+            self.finish(exc)
+
+    def finish(self, error: BaseException = None) -> None:
+        """Record the call's latency and outcome."""
+        labels = self.labels()
+        registry.observe("llm_function_latency_seconds", labels, time.perf_counter() - self.started)
+        registry.inc("llm_function_calls_total", labels + (("status", "error" if error else "ok"),))
+        if error is not None:
+            registry.inc("llm_function_errors_total", labels + (("error", type(error).__name__),))
+
+class _NullCall:
+    """Stand-in used while metrics are disabled."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return None
+
+    def finish(self, error: BaseException = None) -> None:
+        pass
+
+_NULL_CALL = _NullCall()
+
+def track(function: str, operation: str = None):
+    """
+    Measure a block as one call of a function agent.
+
+    Args:
+        function (str): Function agent name, e.g. 'code_function'
+        operation (str, optional): Operation label, e.g. 'optimize'
+
+    Returns:
+        Call: Context manager recording latency, outcome and anything the
+            completion core reports while it is active
+    """
+    if not METRICS_CONFIG["enabled"]:
+        return _NULL_CALL
+    return Call(function, operation)
+
+def instrument(function: str, operation: Any = None):
+    """
+    Decorate a sync or async function agent so every call is tracked.
+
+    Args:
+        function (str): Function agent name used as the metric label
+        operation (Any, optional): Name of the parameter holding the operation,
+            or a callable that receives the bound arguments and returns the label
+
+    Returns:
+        Callable: Decorator
+    """
+    def decorator(func: Callable) -> Callable:
+        signature = inspect.signature(func)
+        params = list(signature.parameters)
+
+        def resolve(args, kwargs) -> str:
+            if operation is None:
+                return ""
+            if callable(operation):
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                return str(operation(bound.arguments))
+            if operation in kwargs:
+                return str(kwargs[operation])
+            index = params.index(operation)
+            if index < len(args):
+                return str(args[index])
+            default = signature.parameters[operation].default
+            return "" if default is inspect.Parameter.empty else str(default)
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with track(function, resolve(args, kwargs)):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with track(function, resolve(args, kwargs)):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def current_call() -> Optional[Call]:
+    """Return the call being tracked in this context, if any."""
+    return _current.get()
+
+def in_context(func: Callable) -> Callable:
+    """
+    Wrap func to run in a copy of the caller's context.
+
+    Worker threads start with an empty context, so requests made from a
+    thread pool would otherwise not be attributed to the call that started it.
+    """
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.copy().run(func, *args, **kwargs)
+
+def core_labels(model: str) -> Labels:
+    """Labels for a request to model, attributing it to the current call if there is one."""
+    call = _current.get()
+    if call is None:
+        return (("function", ""), ("operation", ""), ("model", model))
+    # Enclosing calls (a batch or a review) take the model of their first request
+    outer = call
+    while outer is not None and outer.model is None:
+        outer.model = model
+        outer = outer.parent
+    call.model = model
+    return call.labels(model)
+
+def record_usage(labels: Labels, usage: Any) -> None:
+    """Add the prompt and completion token counts from a response's usage."""
+    if not METRICS_CONFIG["enabled"] or usage is None:
+        return
+    if isinstance(usage, dict):
+        # Older openai versions leave usage on stream chunks as an untyped dict
+        prompt_tokens, completion_tokens = usage.get("prompt_tokens"), usage.get("completion_tokens")
+    else:
+        prompt_tokens = getattr(usage, "prompt_tokens", None)
+        completion_tokens = getattr(usage, "completion_tokens", None)
+    if prompt_tokens:
+        registry.inc("llm_prompt_tokens_total", labels, prompt_tokens)
+    if completion_tokens:
+        registry.inc("llm_completion_tokens_total", labels, completion_tokens)
+
+def record_cache(labels: Labels, hit: bool) -> None:
+    """Count a response cache lookup."""
+    if METRICS_CONFIG["enabled"]:
+        registry.inc("llm_cache_hits_total" if hit else "llm_cache_misses_total", labels)
+
+def record_coalesced(labels: Labels) -> None:
+    """Count a call answered by an identical request already in flight."""
+    if METRICS_CONFIG["enabled"]:
+        registry.inc("llm_coalesced_requests_total", labels)
+
+def record_hedge(labels: Labels, won: bool) -> None:
+    """Count a hedged call and whether the duplicate answered first."""
+    if METRICS_CONFIG["enabled"]:
+        registry.inc("llm_hedged_requests_total", labels + (("result", "won" if won else "lost"),))
+
+def record_cascade(labels: Labels, served: bool) -> None:
+    """Count a cascade tier that answered a call, or one whose response was rejected."""
+    if METRICS_CONFIG["enabled"]:
+        registry.inc("llm_cascade_served_total" if served else "llm_cascade_escalations_total", labels)
+
+def record_truncation(labels: Labels, limit: str) -> None:
+    """Count a response that stopped at max_tokens; limit is 'learned' or 'ceiling'."""
+    if METRICS_CONFIG["enabled"]:
+        registry.inc("llm_truncated_responses_total", labels + (("limit", limit),))
+
+def set_gauge(name: str, value: float, labels: Labels = ()) -> None:
+    """Set a gauge such as the current concurrency limit."""
+    if METRICS_CONFIG["enabled"]:
+        registry.set(name, labels, value)
+
+def observe(name: str, value: float, labels: Labels = ()) -> None:
+    """Add an observation to a histogram that isn't tied to a function agent call."""
+    if METRICS_CONFIG["enabled"]:
+        registry.observe(name, labels, value)
+
+def record_ttft(labels: Labels, seconds: float) -> None:
+    """Record a streamed call's time to first token."""
+    if METRICS_CONFIG["enabled"]:
+        registry.observe("llm_time_to_first_token_seconds", labels, seconds)
+
+def get_metrics() -> Dict[str, Any]:
+    """Return a JSON-serialisable snapshot of every metric, with estimated p50/p95/p99."""
+    return registry.snapshot()
+
+def render_prometheus() -> str:
+    """Return every metric in the Prometheus text exposition format."""
+    return registry.render_prometheus()
+
+def reset_metrics() -> None:
+    """Clear every recorded metric."""
+    registry.reset()
+
+def start_metrics_server(port: int = None, host: str = "127.0.0.1"):
+    """
+    Serve /metrics (Prometheus) and /metrics.json from a daemon thread.
+
+    Args:
+        port (int, optional): Port to listen on, defaults to METRICS_CONFIG["port"]
+        host (str): Interface to bind
+
+    Returns:
+        ThreadingHTTPServer: The running server; call shutdown() to stop it
+    """
+    import json
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/metrics":
+                body = render_prometheus().encode("utf-8")
+                content_type = "text/plain; version=0.0.4; charset=utf-8"
+            elif self.path == "/metrics.json":
+                body = json.dumps(get_metrics()).encode("utf-8")
+                content_type = "application/json"
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            logger.debug(format % args)
+
+    server = ThreadingHTTPServer((host, port or METRICS_CONFIG["port"]), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    logger.info(f"Serving metrics on http://{host}:{server.server_address[1]}/metrics")
+    return server
@@ -0,0 +1,279 @@
+import contextvars
+import logging
+import re
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+# Add root directory to Python path
+root_dir = str(Path(__file__).resolve().parent.parent)
+if root_dir not in sys.path:
+    sys.path.append(root_dir)
+
+from config import OLLAMA_CONFIG, MICROBATCH_CONFIG, LOG_CONFIG
+from basic_functions.completion import chat_completion
+from basic_functions import metrics
+
+# Configure logging
+logging.basicConfig(level=LOG_CONFIG["level"], format=LOG_CONFIG["format"])
+logger = logging.getLogger(__name__)
+
+BATCH_INSTRUCTIONS = """
+
+                    You will receive several numbered inputs. Handle each one independently
+                    and reply with exactly one line per input, in order, in the form:
+                    1. <output for input 1>
+                    2. <output for input 2>
+                    Never skip an input, merge inputs or add any other text."""
+
+_NUMBERED_LINE = re.compile(r"^\s*(\d+)\s*[.):]\s*(.*?)\s*$")
+
+def parse_numbered(response: str, count: int) -> Dict[int, str]:
+    """
+    Parse "N. answer" lines from a batched reply.
+
+    Args:
+        response (str): Model reply
+        count (int): Number of inputs in the batch
+
+    Returns:
+        Dict[int, str]: Non-empty answers by 1-based input number; numbers the
+            model skipped or repeated are missing
+    """
+    answers: Dict[int, str] = {}
+    repeated = set()
+    for line in response.splitlines():
+        match = _NUMBERED_LINE.match(line)
+        if not match:
+            continue
+        number, answer = int(match.group(1)), match.group(2)
+        if not 1 <= number <= count or not answer:
+            continue
+        if number in answers:
+            repeated.add(number)
+        answers[number] = answer
+    # An input answered twice can't be attributed reliably
+    for number in repeated:
+        del answers[number]
+    return answers
+
+class _Item:
+    __slots__ = ("value", "future", "context", "call")
+
+    def __init__(self, value: Any):
+        self.value = value
+        self.future = Future()
+        # Fallback requests run in the caller's context so metrics stay attributed to its call
+        self.context = contextvars.copy_context()
+        self.call = metrics.current_call()
+
+class MicroBatcher:
+    """
+    Packs small concurrent LLM calls into one numbered prompt.
+
+    A call arriving while no batch is in flight is sent straight away, so a
+    lone caller never waits. Otherwise the first queued call opens a window of
+    MICROBATCH_CONFIG["window"] seconds, and every call arriving before it
+    closes or the busy batches finish, up to max_items, is sent as one
+    request whose system prompt is the function's own few-shot prompt plus
+    BATCH_INSTRUCTIONS. Numbered answers go back to their callers. Any input
+    the reply doesn't answer cleanly is retried on its own with single().
+
+    Attributes:
+        batches (int): Batched requests sent
+        items (int): Distinct inputs answered from a batched request
+        fallbacks (int): Distinct inputs that needed their own request
+    """
+
+    def __init__(self, name: str, system_prompt: str, format_item: Callable[[Any], str],
+                 single: Callable[[Any], str], temperature: float = None, model: str = None):
+        """
+        Args:
+            name (str): Name used in logs, e.g. 'math_function'
+            system_prompt (str): The function's system prompt
+            format_item (Callable[[Any], str]): Renders one input as a single line; inputs
+                rendering the same are asked once
+            single (Callable[[Any], str]): Answers one input with its own request
+            temperature (float, optional): Sampling temperature of batched requests
+            model (str, optional): Model name, defaults to OLLAMA_CONFIG["model"]
+        """
+        self.name = name
+        self.system_prompt = system_prompt
+        self.format_item = format_item
+        self.single = single
+        self.temperature = temperature
+        self.model = model
+        self.batches = 0
+        self.items = 0
+        self.fallbacks = 0
+        self._pending: List[_Item] = []
+        self._deadline = 0.0
+        self._in_flight = 0
+        self._condition = threading.Condition()
+        self._thread = None
+        self._executor = None
+
+    def _enqueue(self, value: Any) -> Future:
+        item = _Item(value)
+        with self._condition:
+            if self._thread is None:
+                self._executor = ThreadPoolExecutor(max_workers=MICROBATCH_CONFIG["max_in_flight"],
+                                                    thread_name_prefix=f"{self.name}-batch")
+                self._thread = threading.Thread(target=self._collect, name=f"{self.name}-batcher", daemon=True)
+                self._thread.start()
+            if not self._pending:
+                self._deadline = time.monotonic() + MICROBATCH_CONFIG["window"]
+            self._pending.append(item)
+            self._condition.notify()
+        return item.future
+
+    def submit(self, value: Any) -> str:
+        """
+        Answer value as part of the next batch, blocking until it is answered.
+
+        Args:
+            value (Any): One input, as accepted by format_item and single
+
+        Returns:
+            str: The answer for value
+        """
+        return self._enqueue(value).result()
+
+    async def asubmit(self, value: Any) -> str:
+        """Async counterpart of submit."""
+        import asyncio
+
+        return await asyncio.wrap_future(self._enqueue(value))
+
+    def _collect(self) -> None:
+        """Close windows and hand full batches to the executor, forever."""
+        while True:
+            with self._condition:
+                while not self._pending:
+                    self._condition.wait()
+                max_items = MICROBATCH_CONFIG["max_items"]
+                # Collect while earlier batches are busy; with none in flight, waiting only adds latency
+                while len(self._pending) < max_items and self._in_flight:
+                    remaining = self._deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                batch = self._pending[:max_items]
+                del self._pending[:max_items]
+                # Calls left over from a full batch have already waited out their window
+                self._deadline = time.monotonic()
+                self._in_flight += 1
+            self._executor.submit(self._dispatch, batch)
+
+    def _dispatch(self, batch: List[_Item]) -> None:
+        try:
+            self._answer(batch)
+        finally:
+            with self._condition:
+                self._in_flight -= 1
+                # Flush whatever queued up behind this batch
+                self._condition.notify()
+
+    def _answer(self, batch: List[_Item]) -> None:
+        # Drop callers that were cancelled while waiting
+        batch = [item for item in batch if item.future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+
+        # Identical inputs are asked once and share the answer
+        groups: Dict[str, List[_Item]] = {}
+        for item in batch:
+            groups.setdefault(self.format_item(item.value), []).append(item)
+
+        answers: Dict[int, str] = {}
+        if len(groups) > 1:
+            try:
+                answers = self._ask_batch(list(groups), batch)
+            except Exception as e:
+                logger.error(f"Error processing {self.name} batch: {str(e)}")
+                for item in batch:
+                    item.future.set_exception(e)
+                return
+
+        unanswered: List[List[_Item]] = []
+        for number, items in enumerate(groups.values(), 1):
+            if number in answers:
+                for item in items:
+                    item.future.set_result(answers[number])
+            else:
+                unanswered.append(items)
+        if not unanswered:
+            return
+
+        # Re-ask unanswered inputs side by side rather than one after another
+        with ThreadPoolExecutor(max_workers=len(unanswered), thread_name_prefix=f"{self.name}-fallback") as executor:
+            for items in unanswered:
+                executor.submit(self._fallback, items)
+
+    def _fallback(self, items: List[_Item]) -> None:
+        """Answer one group of identical inputs with its own request."""
+        try:
+            result = items[0].context.run(self.single, items[0].value)
+        except Exception as e:
+            for item in items:
+                item.future.set_exception(e)
+        else:
+            for item in items:
+                item.future.set_result(result)
+
+    def _ask_batch(self, lines: List[str], batch: List[_Item]) -> Dict[int, str]:
+        """Send lines as one numbered prompt and return the answers it parsed."""
+        model = self.model or OLLAMA_CONFIG["model"]
+        messages = [
+            {
+                "role": "system",
+                "content": self.system_prompt + BATCH_INSTRUCTIONS
+            },
+            {
+                "role": "user",
+                "content": "\n".join(f"{number}. {line}" for number, line in enumerate(lines, 1))
+            }
+        ]
+        # Token usage is attributed to the first caller's call
+        # A batch's reply is as long as all its answers together, so the callers' single-answer budget doesn't fit
+        response = batch[0].context.run(chat_completion, messages, model=model, temperature=self.temperature,
+                                        budget=False)
+        answers = parse_numbered(response, len(lines))
+
+        for item in batch[1:]:
+            if item.call is not None and item.call.model is None:
+                item.call.model = model
+        missing = len(lines) - len(answers)
+        with self._condition:
+            self.batches += 1
+            self.items += len(answers)
+            self.fallbacks += missing
+        if missing:
+            logger.warning(f"{self.name} batch of {len(lines)} left {missing} inputs unanswered, retrying them one by one")
+        else:
+            logger.info(f"Answered {len(batch)} {self.name} calls with one request")
+        return answers
+
+    def stats(self) -> Dict[str, int]:
+        with self._condition:
+            return {"batches": self.batches, "items": self.items, "fallbacks": self.fallbacks,
+                    "pending": len(self._pending)}
+
+# Every batcher created, by name
+_batchers: Dict[str, MicroBatcher] = {}
+
+def register_batcher(batcher: MicroBatcher) -> MicroBatcher:
+    _batchers[batcher.name] = batcher
+    return batcher
+
+def get_microbatch_stats() -> Dict[str, Dict[str, int]]:
+    """
+    Return batches sent, calls answered from batches and fallbacks per function agent.
+
+    Returns:
+        Dict[str, Dict[str, int]]: Stats keyed by function agent name
+    """
+    return {name: batcher.stats() for name, batcher in _batchers.items()}
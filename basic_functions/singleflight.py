@@ -0,0 +1,178 @@
+import hashlib
+import json
+import logging
+import sys
+import threading
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+# Add root directory to Python path
+root_dir = str(Path(__file__).resolve().parent.parent)
+if root_dir not in sys.path:
+    sys.path.append(root_dir)
+
+from config import LOG_CONFIG
+
+# Configure logging
+logging.basicConfig(level=LOG_CONFIG["level"], format=LOG_CONFIG["format"])
+logger = logging.getLogger(__name__)
+
+def make_key(*parts: Any) -> str:
+    """Hash the parts that identify a request (kind, model, messages, parameters)."""
+    payload = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class _Flight:
+    __slots__ = ("future", "loop", "task", "waiters")
+
+    def __init__(self):
+        # A concurrent future can be waited on from threads and, wrapped, from any event loop
+        self.future = Future()
+        self.loop = None
+        self.task = None
+        self.waiters = 1
+
+class SingleFlight:
+    """
+    Share one execution among concurrent calls with the same key.
+
+    The first caller for a key (the leader) runs the request; callers that
+    arrive while it is in flight wait for it and receive the same result or
+    exception. Nothing is kept once the request finishes, so this never
+    serves stale results; persistent reuse is the response cache's job.
+
+    Attributes:
+        leaders (int): Requests actually executed
+        merged (int): Calls that shared a request already in flight
+    """
+
+    def __init__(self):
+        self._flights: Dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.merged = 0
+
+    def _join(self, key: str, blocking: bool) -> Tuple[Optional[_Flight], bool]:
+        """Return (flight, is_leader); flight is None when the caller must run alone."""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                # A blocking wait on a flight driven by this thread's own event loop would deadlock
+                if blocking and flight.loop is not None and flight.loop is _running_loop():
+                    return None, True
+                flight.waiters += 1
+                self.merged += 1
+                return flight, False
+            flight = self._flights[key] = _Flight()
+            self.leaders += 1
+            return flight, True
+
+    def _release(self, key: str, flight: _Flight) -> None:
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+
+    def do(self, key: str, func: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Run func() unless an identical call is in flight, and return its result.
+
+        Args:
+            key (str): Identity of the request, see make_key()
+            func (Callable[[], Any]): Performs the request
+
+        Returns:
+            Tuple[Any, bool]: The result and whether it was shared from another call
+        """
+        flight, leader = self._join(key, blocking=True)
+        if flight is None:
+            return func(), False
+        if not leader:
+            return flight.future.result(), True
+
+        try:
+            result = func()
+        except BaseException as e:
+            self._release(key, flight)
+            flight.future.set_exception(e)
+            raise
+        self._release(key, flight)
+        flight.future.set_result(result)
+        return result, False
+
+    async def ado(self, key: str, func: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Async counterpart of do(); func() returns the awaitable performing the request.
+
+        The request runs as its own task, so a cancelled leader does not fail
+        the callers sharing it. It is cancelled only once every waiter has gone.
+
+        Args:
+            key (str): Identity of the request, see make_key()
+            func (Callable[[], Awaitable[Any]]): Starts the request
+
+        Returns:
+            Tuple[Any, bool]: The result and whether it was shared from another call
+        """
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        flight, leader = self._join(key, blocking=False)
+        if leader:
+            flight.loop = loop
+            flight.task = loop.create_task(func())
+            flight.task.add_done_callback(lambda task: self._settle(key, flight, task))
+
+        try:
+            # shield() keeps a cancelled waiter from cancelling the shared future
+            return await asyncio.shield(asyncio.wrap_future(flight.future)), not leader
+        except asyncio.CancelledError:
+            self._abandon(key, flight)
+            raise
+
+    def _settle(self, key: str, flight: _Flight, task) -> None:
+        self._release(key, flight)
+        if flight.future.done():
+            return
+        if task.cancelled():
+            flight.future.cancel()
+        elif task.exception() is not None:
+            flight.future.set_exception(task.exception())
+        else:
+            flight.future.set_result(task.result())
+
+    def _abandon(self, key: str, flight: _Flight) -> None:
+        """Drop a cancelled waiter and cancel the request once nobody is waiting."""
+        with self._lock:
+            flight.waiters -= 1
+            if flight.waiters or flight.future.done() or flight.task is None:
+                return
+            # Later callers start a fresh request instead of joining a cancelled one
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        flight.loop.call_soon_threadsafe(flight.task.cancel)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"in_flight": len(self._flights), "leaders": self.leaders, "merged": self.merged}
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.leaders = 0
+            self.merged = 0
+
+def _running_loop():
+    asyncio = sys.modules.get("asyncio")
+    return asyncio._get_running_loop() if asyncio is not None else None
+
+# Shared by every function agent
+flights = SingleFlight()
+
+def get_coalescing_stats() -> Dict[str, int]:
+    """
+    Return how many upstream requests ran and how many calls were merged into them.
+
+    Returns:
+        Dict[str, int]: in_flight, leaders (requests executed) and merged (calls that shared one)
+    """
+    return flights.stats()
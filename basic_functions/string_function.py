@@ -1,47 +1,25 @@
-from openai import OpenAI
 import logging
+import string
 import sys
+import threading
 from pathlib import Path
+from typing import Callable, Dict, Tuple
 
 # Add root directory to Python path
 root_dir = str(Path(__file__).resolve().parent.parent)
 if root_dir not in sys.path:
     sys.path.append(root_dir)
 
-from config import OLLAMA_CONFIG, LOG_CONFIG
+from config import MICROBATCH_CONFIG, LOG_CONFIG
+from basic_functions.completion import chat_completion, achat_completion
+from basic_functions.metrics import instrument
+from basic_functions.microbatch import MicroBatcher, register_batcher
 
 # Configure logging
 logging.basicConfig(level=LOG_CONFIG["level"], format=LOG_CONFIG["format"])
 logger = logging.getLogger(__name__)
 
-def string_function(operation: str, text: str) -> str:
-    """
-    Process string operations using LLM.
-    
-    Args:
-        operation (str): Operation to perform (e.g., 'reverse', 'capitalize', 'count_words')
-        text (str): Text to process
-        
-    Returns:
-        str: Processed result
-        
-    Raises:
-        Exception: If API call fails
-    """
-    try:
-        client = OpenAI(
-            base_url=OLLAMA_CONFIG["base_url"],
-            api_key=OLLAMA_CONFIG["api_key"]
-        )
-        
-        logger.info(f"Processing string operation: {operation} on text: {text[:50]}...")
-        
-        completion = client.chat.completions.create(
-            model=OLLAMA_CONFIG["model"],
-            messages=[
-                {
-                    "role": "system", 
-                    "content": """You are a string manipulation function. You ONLY output the exact result with NO additional text.
+SYSTEM_PROMPT = """You are a string manipulation function. You ONLY output the exact result with NO additional text.
                     Examples:
                     Input Operation: reverse
                     Input Text: hello world
@@ -64,17 +42,160 @@ def string_function(operation: str, text: str) -> str:
                     - For remove_punctuation, preserve spaces between words
                     - For count_words, return only the number
                     - Never add explanations or extra text"""
-                },
-                {
-                    "role": "user",
-                    "content": f"Input Operation: {operation}\nInput Text: {text}"
-                }
-            ],
-            temperature=0.1
-        )
+
+def _build_messages(operation: str, text: str) -> list:
+    """Build the chat messages for a string operation."""
+    return [
+        {
+            "role": "system", 
+            "content": SYSTEM_PROMPT
+        },
+        {
+            "role": "user",
+            "content": f"Input Operation: {operation}\nInput Text: {text}"
+        }
+    ]
+
+# Operations computed natively; anything else is sent to the LLM
+LOCAL_OPERATIONS: Dict[str, Callable[[str], str]] = {}
+
+# How many calls each path has served
+PATH_STATS = {"local": 0, "llm": 0}
+_stats_lock = threading.Lock()
+
+def register_operation(name: str):
+    """
+    Register a native implementation for a string operation.
+    
+    Args:
+        name (str): Operation name as passed to string_function
+        
+    Returns:
+        Callable: Decorator that registers the function and returns it unchanged
+    """
+    def decorator(func: Callable[[str], str]) -> Callable[[str], str]:
+        LOCAL_OPERATIONS[name.lower()] = func
+        return func
+    return decorator
+
+@register_operation("reverse")
+def _reverse(text: str) -> str:
+    return text[::-1]
+
+@register_operation("capitalize")
+def _capitalize(text: str) -> str:
+    return text.upper()
+
+@register_operation("count_words")
+def _count_words(text: str) -> str:
+    return str(len(text.split()))
+
+_PUNCTUATION_TABLE = str.maketrans("", "", string.punctuation)
+
+@register_operation("remove_punctuation")
+def _remove_punctuation(text: str) -> str:
+    return text.translate(_PUNCTUATION_TABLE)
+
+def _record_path(path: str) -> None:
+    with _stats_lock:
+        PATH_STATS[path] += 1
+
+def get_path_stats() -> Dict[str, int]:
+    """Return how many calls were served locally and by the LLM."""
+    with _stats_lock:
+        return dict(PATH_STATS)
+
+def _run_local(operation: str, text: str):
+    """Run a registered local operation, or return None if there is none."""
+    func = LOCAL_OPERATIONS.get(operation.strip().lower())
+    if func is None:
+        return None
+    response = func(text)
+    _record_path("local")
+    logger.info(f"Served string operation {operation} via local path: {response}")
+    return response
+
+def _ask(item: Tuple[str, str]) -> str:
+    """Send one string operation to the LLM."""
+    operation, text = item
+    return chat_completion(_build_messages(operation, text), temperature=0.1).strip()
+
+# Packs concurrent LLM string operations into one numbered prompt when MICROBATCH_CONFIG is enabled
+_batcher = register_batcher(MicroBatcher(
+    "string_function",
+    SYSTEM_PROMPT,
+    format_item=lambda item: f"Input Operation: {item[0]} | Input Text: {item[1]}",
+    single=_ask,
+    temperature=0.1
+))
+
+def _batchable(text: str) -> bool:
+    # Answers come back one per line, so multi-line text is sent on its own
+    return MICROBATCH_CONFIG["enabled"] and "\n" not in text and "\r" not in text
+
+@instrument("string_function", "operation")
+def string_function(operation: str, text: str) -> str:
+    """
+    Process string operations, running registered operations locally and
+    sending anything else to the LLM.
+    
+    Args:
+        operation (str): Operation to perform (e.g., 'reverse', 'capitalize', 'count_words')
+        text (str): Text to process
+        
+    Returns:
+        str: Processed result
+        
+    Raises:
+        Exception: If API call fails
+    """
+    try:
+        logger.info(f"Processing string operation: {operation} on text: {text[:50]}...")
+        
+        response = _run_local(operation, text)
+        if response is not None:
+            return response
+        
+        if _batchable(text):
+            response = _batcher.submit((operation, text))
+        else:
+            response = _ask((operation, text))
+        _record_path("llm")
+        logger.info(f"Received response via LLM path: {response}")
+        return response
+        
+    except Exception as e:
+        logger.error(f"Error processing string operation: {str(e)}")
+        raise
+
+@instrument("string_function", "operation")
+async def astring_function(operation: str, text: str) -> str:
+    """
+    Async version of string_function.
+    
+    Args:
+        operation (str): Operation to perform (e.g., 'reverse', 'capitalize', 'count_words')
+        text (str): Text to process
+        
+    Returns:
+        str: Processed result
+        
+    Raises:
+        Exception: If API call fails
+    """
+    try:
+        logger.info(f"Processing string operation: {operation} on text: {text[:50]}...")
+        
+        response = _run_local(operation, text)
+        if response is not None:
+            return response
         
-        response = completion.choices[0].message.content.strip()
-        logger.info(f"Received response: {response}")
+        if _batchable(text):
+            response = await _batcher.asubmit((operation, text))
+        else:
+            response = (await achat_completion(_build_messages(operation, text), temperature=0.1)).strip()
+        _record_path("llm")
+        logger.info(f"Received response via LLM path: {response}")
         return response
         
     except Exception as e:
@@ -0,0 +1,78 @@
+import json
+import logging
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Add root directory to Python path
+root_dir = str(Path(__file__).resolve().parent.parent)
+if root_dir not in sys.path:
+    sys.path.append(root_dir)
+
+from config import STRUCTURED_OUTPUT_CONFIG, LOG_CONFIG
+
+# Configure logging
+logging.basicConfig(level=LOG_CONFIG["level"], format=LOG_CONFIG["format"])
+logger = logging.getLogger(__name__)
+
+def enabled(function: str) -> bool:
+    """Tell whether function should ask the backend for schema-constrained JSON."""
+    return STRUCTURED_OUTPUT_CONFIG["enabled"] and function in STRUCTURED_OUTPUT_CONFIG["functions"]
+
+def string_schema(fields: List[str]) -> Dict[str, Any]:
+    """JSON schema of an object whose fields are all required strings."""
+    return {
+        "type": "object",
+        "properties": {field: {"type": "string"} for field in fields},
+        "required": list(fields),
+        "additionalProperties": False
+    }
+
+def response_format(name: str, schema: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build the response_format argument for chat.completions.create.
+
+    Args:
+        name (str): Schema name reported to the backend
+        schema (Dict[str, Any]): JSON schema of the reply
+
+    Returns:
+        Dict[str, Any]: A json_schema format, or plain JSON mode when
+            STRUCTURED_OUTPUT_CONFIG["mode"] is "json_object"
+    """
+    if STRUCTURED_OUTPUT_CONFIG["mode"] == "json_object":
+        return {"type": "json_object"}
+    return {"type": "json_schema", "json_schema": {"name": name, "schema": schema, "strict": True}}
+
+def parse_object(response: str) -> Optional[Dict[str, Any]]:
+    """
+    Decode a JSON object reply.
+
+    Args:
+        response (str): Model reply
+
+    Returns:
+        Optional[Dict[str, Any]]: The object, or None if the reply isn't one,
+            in which case callers fall back to their text parser
+    """
+    text = response.strip()
+    # Some models wrap JSON in a code fence even in JSON mode
+    if text.startswith("```"):
+        text = text.strip("`")
+        text = (text[4:] if text.startswith("json") else text).strip()
+    if not text.startswith("{"):
+        return None
+    try:
+        data = json.loads(text)
+    except ValueError:
+        logger.debug("Structured reply is not valid JSON, falling back to the text parser")
+        return None
+    return data if isinstance(data, dict) else None
+
+def field_text(value: Any) -> str:
+    """Render a field as text; lists (e.g. bullet points) become one item per line."""
+    if value is None:
+        return ""
+    if isinstance(value, list):
+        return "\n".join(f"- {item}" for item in value if item)
+    return str(value).strip()
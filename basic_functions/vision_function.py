@@ -1,8 +1,8 @@
-from openai import OpenAI
 import logging
+import re
 import sys
 from pathlib import Path
-import base64
+from typing import Dict, List, Tuple, Union
 
 # Add root directory to Python path
 root_dir = str(Path(__file__).resolve().parent.parent)
@@ -10,79 +10,224 @@ if root_dir not in sys.path:
     sys.path.append(root_dir)
 
 from config import OLLAMA_CONFIG, LOG_CONFIG
+from basic_functions.completion import chat_completion, achat_completion
+from basic_functions.metrics import instrument
+from basic_functions.image_preprocess import prepare_image
 
 # Configure logging
 logging.basicConfig(level=LOG_CONFIG["level"], format=LOG_CONFIG["format"])
 logger = logging.getLogger(__name__)
 
-def encode_image(image_path):
-    """Convert image to base64 string."""
-    with open(image_path, "rb") as image_file:
-        return base64.b64encode(image_file.read()).decode('utf-8')
+SYSTEM_PROMPT = "You are a precise image analysis model. Respond with accurate, factual descriptions only."
 
-def vision_function(operation: str, image_path: str, prompt: str = None) -> str:
+# Default prompts for different operations
+OPERATION_PROMPTS = {
+    "caption": "Generate a short, accurate caption for this image.",
+    "analyze": "Provide a detailed analysis of this image.",
+    "describe": "Describe what you see in this image.",
+}
+
+def _build_messages(operation: str, image_path: str, prompt: str = None) -> list:
+    """Build the chat messages for a vision operation."""
+    # Downsize and encode the image, reusing the payload from earlier calls
+    payload = prepare_image(image_path)
+    
+    # Use custom prompt if provided, otherwise use default
+    content = prompt if prompt else OPERATION_PROMPTS.get(operation, "What is in this image?")
+    
+    return [
+        {
+            "role": "system", 
+            "content": SYSTEM_PROMPT
+        },
+        {
+            "role": "user",
+            "content": [
+                {
+                    "type": "text",
+                    "text": content
+                },
+                {
+                    "type": "image_url",
+                    "image_url": {
+                        "url": payload.data_url
+                    }
+                }
+            ]
+        }
+    ]
+
+# Operation names or (name, prompt) pairs answered together in one request
+Operations = List[Union[str, Tuple[str, str]]]
+
+def _normalize_operations(operations: Operations) -> List[Tuple[str, str, str]]:
+    """Return (name, prompt, marker) triples, rejecting duplicate names."""
+    normalized = []
+    seen = set()
+    for item in operations:
+        name, prompt = (item, None) if isinstance(item, str) else item
+        if name in seen:
+            raise ValueError(f"Duplicate vision operation: {name}")
+        seen.add(name)
+        marker = re.sub(r"[^A-Z0-9]+", "_", name.upper())
+        normalized.append((name, prompt or OPERATION_PROMPTS.get(name, "What is in this image?"), marker))
+    return normalized
+
+def _build_multi_messages(operations: List[Tuple[str, str, str]], image_path: str) -> list:
+    """Build one request that asks every question about the image."""
+    payload = prepare_image(image_path)
+    questions = "\n".join(f"---{marker}---\n{prompt}" for _, prompt, marker in operations)
+    
+    return [
+        {
+            "role": "system",
+            "content": f"""{SYSTEM_PROMPT}
+                    Answer every question below about the same image.
+                    Start each answer with its marker line exactly as given (for example ---CAPTION---),
+                    followed by the answer. Do not add anything else."""
+        },
+        {
+            "role": "user",
+            "content": [
+                {
+                    "type": "text",
+                    "text": questions
+                },
+                {
+                    "type": "image_url",
+                    "image_url": {
+                        "url": payload.data_url
+                    }
+                }
+            ]
+        }
+    ]
+
+def _parse_multi_response(response: str, operations: List[Tuple[str, str, str]]) -> Dict[str, str]:
+    """Split a marker-delimited response into answers keyed by operation name."""
+    names = {marker: name for name, _, marker in operations}
+    parts = re.split(r"^\s*-{3}\s*([A-Za-z0-9_ ]+?)\s*-{3}\s*$", response, flags=re.MULTILINE)
+    
+    answers = {}
+    # parts alternates: preamble, marker, answer, marker, answer...
+    for marker, answer in zip(parts[1::2], parts[2::2]):
+        name = names.get(re.sub(r"[^A-Z0-9]+", "_", marker.upper()))
+        if name is not None and answer.strip():
+            answers[name] = answer.strip()
+    return answers
+
+def _operation_label(args: dict) -> str:
+    """Metrics label: the operation name, or 'multi' for a combined request."""
+    return args["operation"] if isinstance(args["operation"], str) else "multi"
+
+def _request_options() -> dict:
+    return {"model": OLLAMA_CONFIG["vision_model"], "temperature": 0.1, "use_cache": False}
+
+def _vision_multi(operations: Operations, image_path: str) -> Dict[str, str]:
+    """Answer several operations on one image in a single request."""
+    normalized = _normalize_operations(operations)
+    response = chat_completion(_build_multi_messages(normalized, image_path), **_request_options())
+    answers = _parse_multi_response(response, normalized)
+    
+    # Ask separately for anything the model skipped
+    for name, prompt, _ in normalized:
+        if name not in answers:
+            logger.warning(f"No answer for {name} in combined response, requesting it separately")
+            answers[name] = chat_completion(_build_messages(name, image_path, prompt), **_request_options()).strip()
+    return {name: answers[name] for name, _, _ in normalized}
+
+async def _avision_multi(operations: Operations, image_path: str) -> Dict[str, str]:
+    """Async counterpart of _vision_multi."""
+    normalized = _normalize_operations(operations)
+    response = await achat_completion(_build_multi_messages(normalized, image_path), **_request_options())
+    answers = _parse_multi_response(response, normalized)
+    
+    missing = [(name, prompt) for name, prompt, _ in normalized if name not in answers]
+    if missing:
+        import asyncio
+
+        logger.warning(f"No answer for {', '.join(name for name, _ in missing)} in combined response, requesting separately")
+        retried = await asyncio.gather(*(
+            achat_completion(_build_messages(name, image_path, prompt), **_request_options())
+            for name, prompt in missing
+        ))
+        for (name, _), answer in zip(missing, retried):
+            answers[name] = answer.strip()
+    return {name: answers[name] for name, _, _ in normalized}
+
+@instrument("vision_function", _operation_label)
+def vision_function(operation: Union[str, Operations], image_path: str, prompt: str = None) -> Union[str, Dict[str, str]]:
     """
     Process images using LLM vision model.
     
+    Passing a list of operations sends the image once and asks every question
+    in the same request, so the image encoding is only paid for once.
+    
     Args:
-        operation (str): Operation to perform (e.g., 'caption', 'analyze', 'describe')
+        operation (Union[str, List]): Operation to perform (e.g., 'caption', 'analyze', 'describe'),
+            or a list of operation names and (name, prompt) pairs answered in one request
         image_path (str): Path to image file
         prompt (str, optional): Custom prompt for image analysis
         
     Returns:
-        str: Generated description/analysis
+        Union[str, Dict[str, str]]: Generated description/analysis, or answers keyed by
+            operation name when a list of operations is given
         
     Raises:
         Exception: If API call fails
     """
     try:
-        client = OpenAI(
-            base_url=OLLAMA_CONFIG["base_url"],
-            api_key=OLLAMA_CONFIG["api_key"]
-        )
+        if not isinstance(operation, str):
+            logger.info(f"Processing {len(operation)} vision operations in one pass on image: {image_path}")
+            response = _vision_multi(operation, image_path)
+            logger.info("Vision processing completed")
+            return response
         
         logger.info(f"Processing vision operation: {operation} on image: {image_path}")
         
-        # Encode image to base64
-        base64_image = encode_image(image_path)
+        response = chat_completion(
+            _build_messages(operation, image_path, prompt),
+            **_request_options()
+        ).strip()
+        logger.info("Vision processing completed")
+        return response
         
-        # Default prompts for different operations
-        operation_prompts = {
-            "caption": "Generate a short, accurate caption for this image.",
-            "analyze": "Provide a detailed analysis of this image.",
-            "describe": "Describe what you see in this image.",
-        }
+    except Exception as e:
+        logger.error(f"Error processing vision operation: {str(e)}")
+        raise
+
+@instrument("vision_function", _operation_label)
+async def avision_function(operation: Union[str, Operations], image_path: str,
+                           prompt: str = None) -> Union[str, Dict[str, str]]:
+    """
+    Async version of vision_function.
+    
+    Args:
+        operation (Union[str, List]): Operation to perform (e.g., 'caption', 'analyze', 'describe'),
+            or a list of operation names and (name, prompt) pairs answered in one request
+        image_path (str): Path to image file
+        prompt (str, optional): Custom prompt for image analysis
         
-        # Use custom prompt if provided, otherwise use default
-        content = prompt if prompt else operation_prompts.get(operation, "What is in this image?")
+    Returns:
+        Union[str, Dict[str, str]]: Generated description/analysis, or answers keyed by
+            operation name when a list of operations is given
         
-        completion = client.chat.completions.create(
-            model=OLLAMA_CONFIG["vision_model"],
-            messages=[
-                {
-                    "role": "system", 
-                    "content": "You are a precise image analysis model. Respond with accurate, factual descriptions only."
-                },
-                {
-                    "role": "user",
-                    "content": [
-                        {
-                            "type": "text",
-                            "text": content
-                        },
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:image/jpeg;base64,{base64_image}"
-                            }
-                        }
-                    ]
-                }
-            ],
-            temperature=0.1
-        )
+    Raises:
+        Exception: If API call fails
+    """
+    try:
+        if not isinstance(operation, str):
+            logger.info(f"Processing {len(operation)} vision operations in one pass on image: {image_path}")
+            response = await _avision_multi(operation, image_path)
+            logger.info("Vision processing completed")
+            return response
+        
+        logger.info(f"Processing vision operation: {operation} on image: {image_path}")
         
-        response = completion.choices[0].message.content.strip()
+        response = (await achat_completion(
+            _build_messages(operation, image_path, prompt),
+            **_request_options()
+        )).strip()
         logger.info("Vision processing completed")
         return response
         
@@ -102,8 +247,9 @@ if __name__ == "__main__":
             ("custom", "What colors are most prominent in this image?")
         ]
         
-        for op, prompt in operations:
-            result = vision_function(op, test_image, prompt)
+        # All four questions share one request and one image encoding
+        results = vision_function(operations, test_image)
+        for op, result in results.items():
             print(f"\nOperation: {op}")
             print(f"Result: {result}")
             print("-" * 50)
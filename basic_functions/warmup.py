@@ -0,0 +1,181 @@
+import logging
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Union
+
+if TYPE_CHECKING:
+    import httpx
+
+# Add root directory to Python path
+root_dir = str(Path(__file__).resolve().parent.parent)
+if root_dir not in sys.path:
+    sys.path.append(root_dir)
+
+from config import OLLAMA_CONFIG, WARMUP_CONFIG, LOG_CONFIG
+
+# Configure logging
+logging.basicConfig(level=LOG_CONFIG["level"], format=LOG_CONFIG["format"])
+logger = logging.getLogger(__name__)
+
+# Latest warm-up result per model
+_report: Dict[str, Dict[str, Any]] = {}
+_report_lock = threading.Lock()
+
+_keepalive_thread = None
+_keepalive_stop = threading.Event()
+
+def _native_url(path: str) -> str:
+    """Ollama's native API lives beside the OpenAI-compatible /v1 endpoint."""
+    base = OLLAMA_CONFIG["base_url"].rstrip("/")
+    if base.endswith("/v1"):
+        base = base[:-3]
+    return f"{base}{path}"
+
+def _default_models() -> List[str]:
+    models = WARMUP_CONFIG["models"] or [
+        *(OLLAMA_CONFIG.get("cascade") or []),
+        OLLAMA_CONFIG["model"], OLLAMA_CONFIG["vision_model"], OLLAMA_CONFIG["embedding_model"]
+    ]
+    # Keep order, drop duplicates
+    return list(dict.fromkeys(models))
+
+def _load_model(http: "httpx.Client", model: str, keep_alive: Union[str, int]) -> Dict[str, Any]:
+    """Ask Ollama to load one model and report how long the load took."""
+    started = time.perf_counter()
+    try:
+        if model == OLLAMA_CONFIG["embedding_model"]:
+            response = http.post(_native_url("/api/embed"), json={"model": model, "input": "", "keep_alive": keep_alive})
+        else:
+            # An empty prompt loads the model without generating anything
+            response = http.post(_native_url("/api/generate"), json={"model": model, "prompt": "", "keep_alive": keep_alive})
+        response.raise_for_status()
+        body = response.json()
+    except Exception as e:
+        logger.error(f"Error warming up {model}: {str(e)}")
+        return {"status": "error", "error": f"{type(e).__name__}: {e}", "wall_seconds": time.perf_counter() - started}
+
+    wall = time.perf_counter() - started
+    # Ollama reports durations in nanoseconds
+    load = body.get("load_duration", 0) / 1e9
+    total = body.get("total_duration", 0) / 1e9
+    result = {
+        "status": "ok",
+        "load_seconds": load,
+        "inference_seconds": max(0.0, total - load),
+        "wall_seconds": wall,
+        # A model that was already resident loads in a few milliseconds
+        "cold": load > WARMUP_CONFIG["cold_threshold"]
+    }
+    logger.info(f"Warmed up {model}: load {load:.2f}s, inference {result['inference_seconds']:.2f}s, wall {wall:.2f}s")
+    return result
+
+def warmup(models: List[str] = None, keep_alive: Union[str, int] = None,
+           background: bool = False) -> Union[Dict[str, Dict[str, Any]], Future]:
+    """
+    Preload models in Ollama in parallel so the first real request skips the load.
+
+    Args:
+        models (List[str], optional): Models to load, defaults to WARMUP_CONFIG["models"]
+            or the chat, vision and embedding models in OLLAMA_CONFIG
+        keep_alive (Union[str, int], optional): How long Ollama keeps the models resident
+            (e.g. "30m", or -1 for indefinitely), defaults to WARMUP_CONFIG["keep_alive"]
+        background (bool): Return immediately with a Future instead of waiting
+
+    Returns:
+        Union[Dict[str, Dict[str, Any]], Future]: Per-model status, load_seconds,
+            inference_seconds, wall_seconds and cold flag (or a Future of that dict)
+    """
+    models = models or _default_models()
+    keep_alive = WARMUP_CONFIG["keep_alive"] if keep_alive is None else keep_alive
+
+    if background:
+        future = Future()
+
+        def run():
+            try:
+                future.set_result(warmup(models, keep_alive))
+            except Exception as e:
+                future.set_exception(e)
+
+        threading.Thread(target=run, name="model-warmup", daemon=True).start()
+        return future
+
+    import httpx
+
+    try:
+        logger.info(f"Warming up models: {', '.join(models)}")
+        with httpx.Client(timeout=WARMUP_CONFIG["timeout"]) as http:
+            with ThreadPoolExecutor(max_workers=len(models)) as executor:
+                results = dict(zip(models, executor.map(lambda model: _load_model(http, model, keep_alive), models)))
+
+        with _report_lock:
+            _report.update(results)
+        return results
+
+    except Exception as e:
+        logger.error(f"Error warming up models: {str(e)}")
+        raise
+
+def get_warmup_report() -> Dict[str, Dict[str, Any]]:
+    """Return the most recent warm-up result for each model."""
+    with _report_lock:
+        return {model: dict(result) for model, result in _report.items()}
+
+def loaded_models() -> List[Dict[str, Any]]:
+    """
+    List the models Ollama currently holds in memory.
+
+    Returns:
+        List[Dict[str, Any]]: Entries from /api/ps with name, size and expires_at
+    """
+    import httpx
+
+    try:
+        response = httpx.get(_native_url("/api/ps"), timeout=WARMUP_CONFIG["timeout"])
+        response.raise_for_status()
+        return response.json().get("models", [])
+
+    except Exception as e:
+        logger.error(f"Error listing loaded models: {str(e)}")
+        raise
+
+def start_keepalive(interval: float = None, models: List[str] = None, keep_alive: Union[str, int] = None) -> None:
+    """
+    Re-warm models periodically from a daemon thread.
+
+    Requests through the OpenAI-compatible endpoint reset Ollama's expiry to
+    its server default, so a periodic ping keeps hot models resident.
+
+    Args:
+        interval (float, optional): Seconds between pings, defaults to WARMUP_CONFIG["refresh_interval"]
+        models (List[str], optional): Models to keep loaded
+        keep_alive (Union[str, int], optional): Keep-alive sent with each ping
+    """
+    global _keepalive_thread
+    interval = interval or WARMUP_CONFIG["refresh_interval"]
+    if not interval:
+        raise ValueError("A keep-alive interval is required")
+
+    stop_keepalive()
+    _keepalive_stop.clear()
+
+    def run():
+        while not _keepalive_stop.wait(interval):
+            try:
+                warmup(models, keep_alive)
+            except Exception:
+                pass  # Already logged; try again on the next tick
+
+    _keepalive_thread = threading.Thread(target=run, name="model-keepalive", daemon=True)
+    _keepalive_thread.start()
+
+def stop_keepalive() -> None:
+    """Stop the background keep-alive thread if it is running."""
+    global _keepalive_thread
+    if _keepalive_thread is not None:
+        _keepalive_stop.set()
+        _keepalive_thread.join()
+        _keepalive_thread = None
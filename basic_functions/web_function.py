@@ -1,21 +1,296 @@
-from openai import OpenAI
+import json
 import logging
+import multiprocessing
 import sys
+import threading
+from concurrent.futures import Executor, FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
 from pathlib import Path
+from typing import AsyncIterator, Iterable, Iterator, List, Sequence, Tuple
 import re
-from bs4 import BeautifulSoup
 
 # Add root directory to Python path
 root_dir = str(Path(__file__).resolve().parent.parent)
 if root_dir not in sys.path:
     sys.path.append(root_dir)
 
-from config import OLLAMA_CONFIG, LOG_CONFIG
+from config import WEB_CONFIG, LOG_CONFIG
+from basic_functions.completion import stream_chat_completion, CompletionStream
+from basic_functions.cascade import cascade, acascade
+from basic_functions import structured
+from basic_functions.metrics import instrument, in_context, track
 
 # Configure logging
 logging.basicConfig(level=LOG_CONFIG["level"], format=LOG_CONFIG["format"])
 logger = logging.getLogger(__name__)
 
+# Few-shot examples: (operation, content, style, html, css)
+EXAMPLES = [
+    ("component", "Create a notification bell icon that shows unread count", "modern",
+     """<div class="notification-bell">
+    <i class="bell-icon">🔔</i>
+    <span class="notification-count">3</span>
+</div>""",
+     """.notification-bell {
+    position: relative;
+    cursor: pointer;
+}
+.bell-icon {
+    font-size: 24px;
+}
+.notification-count {
+    position: absolute;
+    top: -8px;
+    right: -8px;
+    background: #ff4444;
+    color: white;
+    border-radius: 50%;
+    padding: 2px 6px;
+    font-size: 12px;
+}"""),
+    ("form", "Create a login form with email and password", "minimal",
+     """<form class="login-form">
+    <input type="email" placeholder="Email" required>
+    <input type="password" placeholder="Password" required>
+    <button type="submit">Login</button>
+</form>""",
+     """.login-form {
+    display: flex;
+    flex-direction: column;
+    gap: 1rem;
+    max-width: 300px;
+}
+input {
+    padding: 8px;
+    border: 1px solid #ddd;
+    border-radius: 4px;
+}
+button {
+    padding: 8px;
+    background: #007bff;
+    color: white;
+    border: none;
+    border-radius: 4px;
+    cursor: pointer;
+}"""),
+]
+
+PROMPT_INDENT = " " * 20
+
+def _indent(text: str) -> str:
+    return "\n".join(PROMPT_INDENT + line for line in text.splitlines())
+
+def _system_prompt(style: str, as_json: bool) -> str:
+    """Render the system prompt with its examples as ---HTML---/---CSS--- sections or as JSON."""
+    if as_json:
+        layout = """Reply with a JSON object with two string fields, "html" and "css"."""
+    else:
+        layout = f"""Return ONLY the code in this format:
+{PROMPT_INDENT}---HTML---
+{PROMPT_INDENT}<your html here>
+{PROMPT_INDENT}---CSS---
+{PROMPT_INDENT}<your css here>"""
+
+    examples = []
+    for operation, content, example_style, html, css in EXAMPLES:
+        if as_json:
+            output = PROMPT_INDENT + json.dumps({"html": html, "css": css}, ensure_ascii=False)
+        else:
+            output = f"{PROMPT_INDENT}---HTML---\n{_indent(html)}\n{PROMPT_INDENT}---CSS---\n{_indent(css)}"
+        examples.append(f"""{PROMPT_INDENT}Input Operation: {operation}
+{PROMPT_INDENT}Input Content: {content}
+{PROMPT_INDENT}Style: {example_style}
+{PROMPT_INDENT}Output:
+{output}
+{PROMPT_INDENT}
+""")
+
+    return f"""You are an expert web developer. Generate valid HTML5 and CSS3 based on descriptions.
+{PROMPT_INDENT}{layout}
+{PROMPT_INDENT}
+{PROMPT_INDENT}Examples:
+{"".join(examples)}{PROMPT_INDENT}IMPORTANT:
+{PROMPT_INDENT}- Generate semantic HTML5
+{PROMPT_INDENT}- Use modern CSS features
+{PROMPT_INDENT}- Ensure accessibility
+{PROMPT_INDENT}- Keep it responsive
+{PROMPT_INDENT}- Follow {style} design principles"""
+
+def _build_messages(operation: str, content: str, style: str, as_json: bool = False) -> list:
+    """Build the chat messages for a web component request."""
+    return [
+        {
+            "role": "system", 
+            "content": _system_prompt(style, as_json)
+        },
+        {
+            "role": "user",
+            "content": f"Input Operation: {operation}\nInput Content: {content}\nStyle: {style}"
+        }
+    ]
+
+def _request_kwargs() -> dict:
+    """Completion arguments, asking for schema-constrained JSON in structured output mode."""
+    if not structured.enabled("web_function"):
+        return {"temperature": 0.1}
+    return {"temperature": 0.1,
+            "response_format": structured.response_format("web_component", structured.string_schema(["html", "css"]))}
+
+def _extract(response: str) -> Tuple[str, str]:
+    """Extract the HTML and CSS of a JSON or ---HTML---/---CSS--- response, raising ValueError if malformed."""
+    data = structured.parse_object(response)
+    if data is not None:
+        html, css = structured.field_text(data.get("html")), structured.field_text(data.get("css"))
+        if not html:
+            raise ValueError("Invalid response format")
+        return html, css
+
+    # Parse response
+    html_match = re.search(r'---HTML---\n(.*?)\n---CSS---', response, re.DOTALL)
+    css_match = re.search(r'---CSS---\n(.*?)$', response, re.DOTALL)
+    
+    if not html_match or not css_match:
+        raise ValueError("Invalid response format")
+        
+    return html_match.group(1).strip(), css_match.group(1).strip()
+
+def _parse_response(response: str) -> dict:
+    """Extract and validate the HTML and CSS sections of a response."""
+    return _build_result(*_extract(response))
+
+# At-rules whose blocks hold rules rather than declarations
+NESTED_AT_RULES = {"@media", "@supports", "@container", "@layer", "@document", "@scope", "@starting-style",
+                   "@keyframes", "@-webkit-keyframes", "@-moz-keyframes"}
+
+_DECLARATION = re.compile(r'^(--[\w-]+|-?[a-zA-Z][\w-]*)\s*:(.*)$', re.DOTALL)
+
+def _check_css(css: str) -> List[str]:
+    """
+    Find syntax errors in a stylesheet: unbalanced braces, rules without a
+    selector, malformed declarations and unterminated comments or strings.
+
+    Args:
+        css (str): Stylesheet to check
+
+    Returns:
+        List[str]: One message per error, with its line number
+    """
+    errors = []
+    # Blank out comments but keep their newlines so line numbers stay right
+    text = re.sub(r'/\*.*?\*/', lambda match: re.sub(r'[^\n]', ' ', match.group(0)), css, flags=re.DOTALL)
+    if "/*" in text:
+        errors.append("Unterminated comment")
+        text = text[:text.index("/*")]
+
+    def check_declaration(declaration: str, line: int) -> None:
+        declaration = declaration.strip()
+        if not declaration:
+            return
+        match = _DECLARATION.match(declaration)
+        if match is None:
+            errors.append(f"Line {line}: invalid declaration '{declaration[:40]}'")
+        elif not match.group(2).strip() and not match.group(1).startswith("--"):
+            errors.append(f"Line {line}: '{match.group(1)}' has no value")
+
+    blocks: List[str] = []  # "rules" or "declarations" for each open brace
+    buffer = []
+    line = 1
+    quote = None
+    parens = 0
+    for ch in text:
+        if ch == "\n":
+            line += 1
+            if quote:
+                errors.append(f"Line {line - 1}: unterminated string")
+                quote = None
+        if quote:
+            if ch == quote:
+                quote = None
+            buffer.append(ch)
+            continue
+        if ch in "\"'":
+            quote = ch
+        elif ch == "(":
+            parens += 1
+        elif ch == ")":
+            parens = max(0, parens - 1)
+        elif parens:
+            pass
+        elif ch == "{":
+            prelude = "".join(buffer).strip()
+            if not prelude:
+                errors.append(f"Line {line}: rule without a selector")
+            at_rule = prelude.split()[0].lower() if prelude.startswith("@") else None
+            blocks.append("rules" if at_rule in NESTED_AT_RULES else "declarations")
+            buffer = []
+            continue
+        elif ch == "}":
+            if not blocks:
+                errors.append(f"Line {line}: unexpected '}}'")
+            elif blocks.pop() == "declarations":
+                check_declaration("".join(buffer), line)
+            elif "".join(buffer).strip():
+                errors.append(f"Line {line}: unexpected text '{''.join(buffer).strip()[:40]}'")
+            buffer = []
+            continue
+        elif ch == ";":
+            statement = "".join(buffer)
+            if blocks and blocks[-1] == "declarations":
+                check_declaration(statement, line)
+            elif not statement.strip().startswith("@"):
+                # Only at-rules such as @import end with ';' outside a declaration block
+                errors.append(f"Line {line}: unexpected ';' after '{statement.strip()[:40]}'")
+            buffer = []
+            continue
+        buffer.append(ch)
+
+    if blocks:
+        errors.append(f"{len(blocks)} unclosed '{{'")
+    elif "".join(buffer).strip():
+        errors.append(f"Line {line}: text after the last rule '{''.join(buffer).strip()[:40]}'")
+    return errors
+
+def _validate(html: str, css: str) -> dict:
+    """
+    Check generated HTML for accessibility issues and CSS for syntax errors.
+
+    Module-level and free of shared state, so batch_web_function can run it
+    in a process pool.
+    """
+    # Validate HTML
+    # bs4 is only needed once a response arrives, so keep it out of import time
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, 'html.parser')
+    
+    # Basic validation
+    validation = {
+        "valid_html": True,
+        "warnings": [],
+        "accessibility": []
+    }
+    
+    # Check for basic accessibility
+    for img in soup.find_all('img'):
+        if not img.get('alt'):
+            validation["accessibility"].append("Image missing alt text")
+            
+    for input in soup.find_all('input'):
+        if not input.get('aria-label') and not input.get('placeholder'):
+            validation["accessibility"].append("Input missing label or placeholder")
+
+    validation["css_errors"] = _check_css(css)
+    validation["valid_css"] = not validation["css_errors"]
+    return validation
+
+def _build_result(html: str, css: str) -> dict:
+    """Validate generated HTML and package it with the CSS."""
+    return {
+        "html": html,
+        "css": css,
+        "validation": _validate(html, css)
+    }
+
+@instrument("web_function", "operation")
 def web_function(operation: str, content: str, style: str = "modern") -> dict:
     """
     Generate and validate web components using LLM.
@@ -32,138 +307,317 @@ def web_function(operation: str, content: str, style: str = "modern") -> dict:
         Exception: If API call fails or validation fails
     """
     try:
-        client = OpenAI(
-            base_url=OLLAMA_CONFIG["base_url"],
-            api_key=OLLAMA_CONFIG["api_key"]
-        )
+        logger.info(f"Processing web operation: {operation} with style: {style}")
+        
+        as_json = structured.enabled("web_function")
+        result = cascade(_build_messages(operation, content, style, as_json), _parse_response, **_request_kwargs())
+        
+        logger.info("Web component generated and validated")
+        return result
+        
+    except Exception as e:
+        logger.error(f"Error processing web operation: {str(e)}")
+        raise
+
+@instrument("web_function", "operation")
+async def aweb_function(operation: str, content: str, style: str = "modern") -> dict:
+    """
+    Async version of web_function.
+    
+    Args:
+        operation (str): Operation to perform (e.g., 'component', 'form', 'layout', 'animation')
+        content (str): Description of what to generate
+        style (str): Design style preference
         
+    Returns:
+        dict: Contains HTML, CSS, and validation results
+        
+    Raises:
+        Exception: If API call fails or validation fails
+    """
+    try:
         logger.info(f"Processing web operation: {operation} with style: {style}")
         
-        completion = client.chat.completions.create(
-            model=OLLAMA_CONFIG["model"],
-            messages=[
-                {
-                    "role": "system", 
-                    "content": f"""You are an expert web developer. Generate valid HTML5 and CSS3 based on descriptions.
-                    Return ONLY the code in this format:
-                    ---HTML---
-                    <your html here>
-                    ---CSS---
-                    <your css here>
-                    
-                    Examples:
-                    Input Operation: component
-                    Input Content: Create a notification bell icon that shows unread count
-                    Style: modern
-                    Output:
-                    ---HTML---
-                    <div class="notification-bell">
-                        <i class="bell-icon">🔔</i>
-                        <span class="notification-count">3</span>
-                    </div>
-                    ---CSS---
-                    .notification-bell {{
-                        position: relative;
-                        cursor: pointer;
-                    }}
-                    .bell-icon {{
-                        font-size: 24px;
-                    }}
-                    .notification-count {{
-                        position: absolute;
-                        top: -8px;
-                        right: -8px;
-                        background: #ff4444;
-                        color: white;
-                        border-radius: 50%;
-                        padding: 2px 6px;
-                        font-size: 12px;
-                    }}
-                    
-                    Input Operation: form
-                    Input Content: Create a login form with email and password
-                    Style: minimal
-                    Output:
-                    ---HTML---
-                    <form class="login-form">
-                        <input type="email" placeholder="Email" required>
-                        <input type="password" placeholder="Password" required>
-                        <button type="submit">Login</button>
-                    </form>
-                    ---CSS---
-                    .login-form {{
-                        display: flex;
-                        flex-direction: column;
-                        gap: 1rem;
-                        max-width: 300px;
-                    }}
-                    input {{
-                        padding: 8px;
-                        border: 1px solid #ddd;
-                        border-radius: 4px;
-                    }}
-                    button {{
-                        padding: 8px;
-                        background: #007bff;
-                        color: white;
-                        border: none;
-                        border-radius: 4px;
-                        cursor: pointer;
-                    }}
-                    
-                    IMPORTANT:
-                    - Generate semantic HTML5
-                    - Use modern CSS features
-                    - Ensure accessibility
-                    - Keep it responsive
-                    - Follow {style} design principles"""
-                },
-                {
-                    "role": "user",
-                    "content": f"Input Operation: {operation}\nInput Content: {content}\nStyle: {style}"
-                }
-            ],
-            temperature=0.1
-        )
+        as_json = structured.enabled("web_function")
+        result = await acascade(_build_messages(operation, content, style, as_json), _parse_response,
+                                **_request_kwargs())
+        
+        logger.info("Web component generated and validated")
+        return result
+        
+    except Exception as e:
+        logger.error(f"Error processing web operation: {str(e)}")
+        raise
+
+# One (operation, content) or (operation, content, style) per component
+Spec = Sequence[str]
+
+# Validation workers shared by every bulk run, created on first use
+_pool = None
+_pool_lock = threading.Lock()
+
+def _validation_pool() -> Executor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            workers = WEB_CONFIG["validation_workers"]
+            if WEB_CONFIG["validation_executor"] == "process":
+                # Forking a process that runs client and limiter threads can copy their held locks
+                _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            else:
+                _pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="web-validate")
+        return _pool
+
+def _spec(spec: Spec) -> Tuple[str, str, str]:
+    operation, content, *rest = spec
+    return operation, content, rest[0] if rest else "modern"
+
+def _item(index: int, spec: Tuple[str, str, str], html: str = None, css: str = None,
+          validation: dict = None, error: BaseException = None) -> dict:
+    """One batch_web_function result; error is set instead of validation when the item failed."""
+    operation, content, style = spec
+    if error is not None:
+        logger.error(f"Error processing web component {index} ({operation}): {str(error)}")
+    return {
+        "index": index,
+        "operation": operation,
+        "content": content,
+        "style": style,
+        "html": html,
+        "css": css,
+        "validation": validation,
+        "error": None if error is None else f"{type(error).__name__}: {error}"
+    }
+
+def _generate(operation: str, content: str, style: str) -> Tuple[str, str]:
+    """Generate one component's HTML and CSS, leaving validation to the caller."""
+    with track("web_function", operation):
+        as_json = structured.enabled("web_function")
+        return cascade(_build_messages(operation, content, style, as_json), _extract, **_request_kwargs())
+
+async def _agenerate(operation: str, content: str, style: str) -> Tuple[str, str]:
+    """Async version of _generate."""
+    with track("web_function", operation):
+        as_json = structured.enabled("web_function")
+        return await acascade(_build_messages(operation, content, style, as_json), _extract, **_request_kwargs())
+
+def batch_web_function(specs: Iterable[Spec], max_workers: int = None) -> Iterator[dict]:
+    """
+    Generate many web components concurrently, yielding each as soon as it is validated.
+    
+    Up to max_workers generation requests are in flight at once, and the
+    HTML/CSS validation of finished components runs in the
+    WEB_CONFIG["validation_workers"] pool meanwhile. Each component is
+    tracked as a web_function call. A failed component is reported in its
+    result instead of stopping the batch.
+    
+    Args:
+        specs (Iterable[Spec]): (operation, content) or (operation, content, style) per component
+        max_workers (int, optional): Generation requests in flight, defaults to WEB_CONFIG["max_in_flight"]
         
-        response = completion.choices[0].message.content.strip()
+    Yields:
+        dict: In completion order: index (position in specs), operation, content,
+            style, html, css, validation (the web_function report plus css_errors
+            and valid_css) and error (None, or the failure message)
+    """
+    try:
+        specs = [_spec(spec) for spec in specs]
+        max_workers = max_workers or WEB_CONFIG["max_in_flight"]
+        logger.info(f"Generating {len(specs)} web components, {max_workers} at a time")
         
-        # Parse response
-        html_match = re.search(r'---HTML---\n(.*?)\n---CSS---', response, re.DOTALL)
-        css_match = re.search(r'---CSS---\n(.*?)$', response, re.DOTALL)
+        pool = _validation_pool()
+        generate = in_context(_generate)
+        executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="web-generate")
+        # Generation futures map to (index, None); validation futures to (index, (html, css))
+        pending = {executor.submit(generate, *spec): (index, None) for index, spec in enumerate(specs)}
+        try:
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, generated = pending.pop(future)
+                    if future.exception() is not None:
+                        yield _item(index, specs[index], *(generated or ()), error=future.exception())
+                    elif generated is None:
+                        html, css = future.result()
+                        pending[pool.submit(_validate, html, css)] = (index, (html, css))
+                    else:
+                        yield _item(index, specs[index], *generated, validation=future.result())
+        finally:
+            # Stop outstanding work if the caller stops iterating early
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False, cancel_futures=True)
         
-        if not html_match or not css_match:
-            raise ValueError("Invalid response format")
-            
-        html = html_match.group(1).strip()
-        css = css_match.group(1).strip()
+        logger.info(f"Generated {len(specs)} web components")
         
-        # Validate HTML
-        soup = BeautifulSoup(html, 'html.parser')
+    except Exception as e:
+        logger.error(f"Error processing web component batch: {str(e)}")
+        raise
+
+async def abatch_web_function(specs: Iterable[Spec], max_workers: int = None) -> AsyncIterator[dict]:
+    """
+    Async version of batch_web_function.
+    
+    Args:
+        specs (Iterable[Spec]): (operation, content) or (operation, content, style) per component
+        max_workers (int, optional): Generation requests in flight, defaults to WEB_CONFIG["max_in_flight"]
         
-        # Basic validation
-        validation = {
-            "valid_html": True,
-            "warnings": [],
-            "accessibility": []
-        }
+    Yields:
+        dict: Results in completion order, as batch_web_function
+    """
+    import asyncio
+    
+    try:
+        specs = [_spec(spec) for spec in specs]
+        semaphore = asyncio.Semaphore(max_workers or WEB_CONFIG["max_in_flight"])
+        loop = asyncio.get_running_loop()
+        pool = _validation_pool()
+        logger.info(f"Generating {len(specs)} web components")
         
-        # Check for basic accessibility
-        for img in soup.find_all('img'):
-            if not img.get('alt'):
-                validation["accessibility"].append("Image missing alt text")
-                
-        for input in soup.find_all('input'):
-            if not input.get('aria-label') and not input.get('placeholder'):
-                validation["accessibility"].append("Input missing label or placeholder")
+        async def run(index: int, spec: Tuple[str, str, str]) -> dict:
+            async with semaphore:
+                try:
+                    html, css = await _agenerate(*spec)
+                except Exception as e:
+                    return _item(index, spec, error=e)
+            # Validate outside the semaphore so the next generation starts meanwhile
+            try:
+                return _item(index, spec, html, css, validation=await loop.run_in_executor(pool, _validate, html, css))
+            except Exception as e:
+                return _item(index, spec, html, css, error=e)
         
-        logger.info("Web component generated and validated")
+        tasks = [asyncio.ensure_future(run(index, spec)) for index, spec in enumerate(specs)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
         
-        return {
-            "html": html,
-            "css": css,
-            "validation": validation
-        }
+        logger.info(f"Generated {len(specs)} web components")
+        
+    except Exception as e:
+        logger.error(f"Error processing web component batch: {str(e)}")
+        raise
+
+HTML_MARKER = "---HTML---"
+CSS_MARKER = "\n---CSS---"
+
+# Characters allowed before ---HTML--- before a stream is considered malformed
+STREAM_MAX_PREAMBLE = 200
+
+class _SectionParser:
+    """Incrementally split a streamed response into HTML and CSS sections."""
+
+    def __init__(self):
+        self.state = "preamble"
+        self.buffer = ""
+        self.html_parts = []
+        self.css_parts = []
+
+    def feed(self, delta: str) -> list:
+        """Consume a delta and return (section, text) events that are now certain."""
+        self.buffer += delta
+        events = []
+        
+        if self.state == "preamble":
+            start = self.buffer.find(HTML_MARKER)
+            if start == -1:
+                if "---CSS---" in self.buffer or len(self.buffer) > STREAM_MAX_PREAMBLE + len(HTML_MARKER):
+                    raise ValueError("Invalid response format")
+                return events
+            if start > STREAM_MAX_PREAMBLE:
+                raise ValueError("Invalid response format")
+            self.buffer = self.buffer[start + len(HTML_MARKER):].lstrip("\n")
+            self.state = "html"
+        
+        if self.state == "html":
+            end = self.buffer.find(CSS_MARKER)
+            if end == -1:
+                # Hold back a possible partial marker at the end of the buffer
+                safe = max(0, len(self.buffer) - len(CSS_MARKER))
+                if safe:
+                    events.append(("html", self.buffer[:safe]))
+                    self.html_parts.append(self.buffer[:safe])
+                    self.buffer = self.buffer[safe:]
+                return events
+            if end:
+                events.append(("html", self.buffer[:end]))
+                self.html_parts.append(self.buffer[:end])
+            self.buffer = self.buffer[end + len(CSS_MARKER):].lstrip("\n")
+            self.state = "css"
+        
+        if self.buffer:
+            events.append(("css", self.buffer))
+            self.css_parts.append(self.buffer)
+            self.buffer = ""
+        return events
+
+    def finish(self) -> None:
+        """Check that the stream ended with both sections present."""
+        if self.state != "css":
+            raise ValueError("Invalid response format")
+
+class WebComponentStream:
+    """
+    Iterator of ("html" | "css", text) events for a streamed web component.
+
+    The html attribute is set as soon as the CSS section begins, and result
+    holds the validated web_function-style dict once iteration finishes.
+    Malformed responses raise ValueError and abort the request early.
+    """
+
+    def __init__(self, completion: CompletionStream):
+        self.completion = completion
+        self.html = None
+        self.css = None
+        self.result = None
+        self._parser = _SectionParser()
+
+    @property
+    def time_to_first_token(self):
+        return self.completion.time_to_first_token
+
+    def __iter__(self):
+        try:
+            for delta in self.completion:
+                for section, text in self._parser.feed(delta):
+                    if section == "css" and self.html is None:
+                        self.html = "".join(self._parser.html_parts).strip()
+                    yield section, text
+            self._parser.finish()
+        except ValueError:
+            self.completion.close()
+            logger.error("Aborted web stream: invalid response format")
+            raise
+        
+        if self.html is None:
+            self.html = "".join(self._parser.html_parts).strip()
+        self.css = "".join(self._parser.css_parts).strip()
+        self.result = _build_result(self.html, self.css)
+        logger.info("Web component streamed and validated")
+
+@instrument("web_function", "operation")
+def web_function_stream(operation: str, content: str, style: str = "modern") -> WebComponentStream:
+    """
+    Streaming version of web_function that parses sections as they arrive.
+    
+    Args:
+        operation (str): Operation to perform (e.g., 'component', 'form', 'layout', 'animation')
+        content (str): Description of what to generate
+        style (str): Design style preference
+        
+    Returns:
+        WebComponentStream: Iterator of ("html" | "css", text) events
+        
+    Raises:
+        Exception: If API call fails; ValueError while iterating if the response is malformed
+    """
+    try:
+        logger.info(f"Streaming web operation: {operation} with style: {style}")
+        return WebComponentStream(
+            stream_chat_completion(_build_messages(operation, content, style), temperature=0.1, validate=_extract)
+        )
         
     except Exception as e:
         logger.error(f"Error processing web operation: {str(e)}")
@@ -0,0 +1,90 @@
+"""
+Measure cold import time of the basic_functions package.
+
+Every sample runs in a fresh interpreter so nothing is cached in
+sys.modules. Run from anywhere:
+
+    python benchmarks/import_time.py --runs 10
+    python benchmarks/import_time.py --json > import_time.json
+    python benchmarks/import_time.py --max-ms 50   # exit 1 if the package import regresses
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+root_dir = str(Path(__file__).resolve().parent.parent)
+
+# Name -> statement timed inside a fresh interpreter
+TARGETS = {
+    "package": "import basic_functions",
+    "math_function": "from basic_functions import math_function",
+    "string_function": "from basic_functions import string_function",
+    "code_function": "from basic_functions import code_function",
+    "web_function": "from basic_functions import web_function",
+    "vision_function": "from basic_functions import vision_function",
+    "embedding_function": "from basic_functions import embedding_function",
+    "all": "from basic_functions import *",
+    "client": "from basic_functions import get_client; get_client()",
+}
+
+# Third-party modules reported as loaded (or not) after each import
+HEAVY_MODULES = ["openai", "httpx", "bs4", "numpy", "PIL"]
+
+_CHILD = """
+import sys, time, json
+started = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - started
+print(json.dumps({{"seconds": elapsed, "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+def measure(statement: str, runs: int) -> dict:
+    """Time statement in `runs` fresh interpreters and summarise the samples."""
+    samples = []
+    heavy = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", _CHILD.format(statement=statement, heavy=HEAVY_MODULES)],
+            cwd=root_dir, capture_output=True, text=True, check=True
+        ).stdout.strip().splitlines()[-1]
+        result = json.loads(output)
+        samples.append(result["seconds"] * 1000)
+        heavy = result["heavy"]
+    return {
+        "median_ms": statistics.median(samples),
+        "min_ms": min(samples),
+        "max_ms": max(samples),
+        "heavy_modules": heavy,
+    }
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per target")
+    parser.add_argument("--targets", nargs="*", choices=sorted(TARGETS), help="Subset of targets to time")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    parser.add_argument("--max-ms", type=float, help="Fail if the median package import exceeds this")
+    args = parser.parse_args()
+
+    results = {name: measure(TARGETS[name], args.runs) for name in (args.targets or TARGETS)}
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{'target':<20} {'median':>9} {'min':>9} {'max':>9}  heavy modules loaded")
+        for name, result in results.items():
+            print(f"{name:<20} {result['median_ms']:>7.1f}ms {result['min_ms']:>7.1f}ms "
+                  f"{result['max_ms']:>7.1f}ms  {', '.join(result['heavy_modules']) or '-'}")
+
+    if args.max_ms is not None:
+        package = results.get("package") or measure(TARGETS["package"], args.runs)
+        if package["median_ms"] > args.max_ms:
+            print(f"Package import took {package['median_ms']:.1f}ms, over the {args.max_ms:g}ms budget",
+                  file=sys.stderr)
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,360 @@
+"""
+Local stand-in for Ollama's OpenAI-compatible API, for benchmarking without a GPU.
+
+Serves /v1/chat/completions (plain and streamed), /v1/embeddings and the
+native /api/generate, /api/embed and /api/ps endpoints used by warmup().
+Replies follow the formats the function agents parse (debug sections,
+---HTML---/---CSS--- blocks, vision ---MARKER--- answers, numbered
+micro-batch answers, JSON when a response_format is requested), and timing is
+simulated from a fixed latency plus a token rate, with jitter, injected
+errors, occasional stalls and optional rambling past the answer; stop
+sequences and max_tokens are honoured.
+
+    python benchmarks/mock_server.py --latency 0.05 --token-rate 100 --error-rate 0.01
+"""
+import argparse
+import contextlib
+import json
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlparse
+
+# Add root directory to Python path
+root_dir = str(Path(__file__).resolve().parent.parent)
+if root_dir not in sys.path:
+    sys.path.append(root_dir)
+
+from config import OLLAMA_CONFIG
+
+FILLER = ("the quick brown fox jumps over the lazy dog while the model keeps "
+          "generating plausible tokens for the benchmark to parse").split()
+
+def _words(count: int) -> str:
+    return " ".join(FILLER[i % len(FILLER)] for i in range(count))
+
+def _message_text(content) -> str:
+    """Flatten string or multimodal message content to its text parts."""
+    if isinstance(content, str):
+        return content
+    return "\n".join(part.get("text", "") for part in content if isinstance(part, dict))
+
+class _Server(ThreadingHTTPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+    # listen() backlog; the default of 5 drops connection bursts, and the client retries a second later
+    request_queue_size = 1024
+
+class MockServer:
+    """
+    Threaded mock backend with simulated latency, token rate, jitter and errors.
+
+    Service time includes time spent queued for one of the parallel slots.
+
+    Attributes:
+        requests (int): Requests served since start() or reset_stats()
+        service_seconds (float): Total simulated service time of those requests
+        errors (int): Requests answered with an injected error
+    """
+
+    def __init__(self, host: str = None, port: int = None, latency: float = 0.02, token_rate: float = 200.0,
+                 jitter: float = 0.1, error_rate: float = 0.0, completion_tokens: int = 48, seed: int = None,
+                 parallel: int = 0, prompt_rate: float = 0.0, stall_rate: float = 0.0, stall: float = 2.0,
+                 ramble: int = 0):
+        if host is None or port is None:
+            parsed = urlparse(OLLAMA_CONFIG["base_url"])
+            host = host or parsed.hostname
+            port = parsed.port if port is None else port
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.token_rate = token_rate
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.completion_tokens = completion_tokens
+        # Like OLLAMA_NUM_PARALLEL: requests beyond this many queue; 0 serves all at once
+        self.parallel = parallel
+        # Prompt tokens processed per second before the first token; 0 makes prompts free
+        self.prompt_rate = prompt_rate
+        self._slots = threading.Semaphore(parallel) if parallel else contextlib.nullcontext()
+        # Fraction of chat requests that stall for an extra `stall` seconds before generating
+        self.stall_rate = stall_rate
+        self.stall = stall
+        # Tokens of chatter appended after each reply, continuing the prompt's few-shot pattern
+        self.ramble = ramble
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = None
+        self.reset_stats()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/v1"
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.requests = 0
+            self.service_seconds = 0.0
+            self.errors = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"requests": self.requests, "service_seconds": self.service_seconds, "errors": self.errors}
+
+    def _scaled(self, seconds: float) -> float:
+        """Apply multiplicative jitter to a simulated duration."""
+        if not self.jitter:
+            return seconds
+        with self._lock:
+            factor = self._random.uniform(1 - self.jitter, 1 + self.jitter)
+        return max(0.0, seconds * factor)
+
+    def _should_fail(self) -> bool:
+        if not self.error_rate:
+            return False
+        with self._lock:
+            return self._random.random() < self.error_rate
+
+    def _stalled(self) -> float:
+        """Extra delay for a request that hits a simulated stall, else 0."""
+        if not self.stall_rate:
+            return 0.0
+        with self._lock:
+            return self.stall if self._random.random() < self.stall_rate else 0.0
+
+    def _record(self, seconds: float, failed: bool = False) -> None:
+        with self._lock:
+            self.requests += 1
+            self.service_seconds += seconds
+            self.errors += failed
+
+    def reply_text(self, body: dict) -> str:
+        """Build a reply in the format the calling function agent expects."""
+        messages = body.get("messages") or [{"content": ""}]
+        system = _message_text(messages[0].get("content", ""))
+        user = _message_text(messages[-1].get("content", ""))
+
+        structured = body.get("response_format") is not None
+        if "debugging" in system and structured:
+            return json.dumps({"analysis": _words(12), "root_cause": _words(8), "fix": _words(10),
+                               "prevention": f"- {_words(6)}"})
+        if "web developer" in system and structured:
+            return json.dumps({"html": '<div class="card"><img src="a.png" alt="a"><button>Share</button></div>',
+                               "css": ".card { display: flex; gap: 1rem; }"})
+        if "debugging" in system:
+            return (f"ANALYSIS:\n{_words(12)}\n\nROOT_CAUSE:\n{_words(8)}\n\n"
+                    f"FIX:\n{_words(10)}\n\nPREVENTION:\n- {_words(6)}")
+        if "web developer" in system:
+            return ('---HTML---\n<div class="card"><img src="a.png" alt="a"><button>Share</button></div>\n'
+                    "---CSS---\n.card { display: flex; gap: 1rem; }\n")
+        if "numbered inputs" in system:
+            numbers = re.findall(r"^(\d+)\. ", user, flags=re.MULTILINE)
+            answer = "42" if "mathematical" in system else _words(4)
+            return "\n".join(f"{number}. {answer}" for number in numbers)
+        markers = re.findall(r"^---([A-Z0-9_]+)---$", user, flags=re.MULTILINE)
+        if markers:
+            return "\n".join(f"---{marker}---\n{_words(self.completion_tokens // len(markers))}" for marker in markers)
+        if "mathematical" in system:
+            return "42"
+        return _words(self.completion_tokens)
+
+    def generate(self, body: dict) -> tuple:
+        """Return the reply text and finish reason, honouring stop sequences and max_tokens."""
+        text = self.reply_text(body)
+        if self.ramble:
+            system = _message_text((body.get("messages") or [{"content": ""}])[0].get("content", ""))
+            prefix = "Input Operation:" if "Input Operation:" in system else "Input:"
+            text += f"\n{prefix} {_words(self.ramble)}"
+
+        stop = body.get("stop") or []
+        cuts = [text.find(sequence) for sequence in ([stop] if isinstance(stop, str) else stop)]
+        cuts = [cut for cut in cuts if cut != -1]
+        if cuts:
+            text = text[:min(cuts)]
+        pieces = re.findall(r"\S+\s*|\s+", text)
+        max_tokens = body.get("max_tokens")
+        if max_tokens and len(pieces) > max_tokens:
+            return "".join(pieces[:max_tokens]), "length"
+        return text, "stop"
+
+    def start(self) -> "MockServer":
+        """Serve from a daemon thread and return self."""
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body go out in separate writes; without this, Nagle and
+            # delayed ACKs add ~40ms to every keep-alive response
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, status: int, payload: dict) -> None:
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                if self.path.rstrip("/").endswith("/api/ps"):
+                    self._send_json(200, {"models": [{"name": OLLAMA_CONFIG["model"]}]})
+                else:
+                    self._send_json(404, {"error": "not found"})
+
+            def _record(self, seconds: float, failed: bool = False) -> None:
+                mock._record(seconds + self.waited, failed)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+
+                queued = time.perf_counter()
+                with mock._slots:
+                    self.waited = time.perf_counter() - queued
+                    self._handle(body)
+
+            def _handle(self, body: dict) -> None:
+                if mock._should_fail():
+                    delay = mock._scaled(mock.latency)
+                    time.sleep(delay)
+                    self._record(delay, failed=True)
+                    self._send_json(500, {"error": {"message": "injected failure", "type": "server_error"}})
+                    return
+
+                if self.path.endswith("/embeddings") or self.path.endswith("/api/embed"):
+                    self._embeddings(body)
+                elif self.path.endswith("/api/generate"):
+                    delay = mock._scaled(mock.latency)
+                    time.sleep(delay)
+                    self._record(delay)
+                    self._send_json(200, {"model": body.get("model"), "done": True,
+                                          "load_duration": 0, "total_duration": int(delay * 1e9)})
+                elif self.path.endswith("/chat/completions"):
+                    self._chat(body)
+                else:
+                    self._send_json(404, {"error": "not found"})
+
+            def _embeddings(self, body: dict) -> None:
+                inputs = body.get("input", "")
+                inputs = [inputs] if isinstance(inputs, str) else inputs
+                delay = mock._scaled(mock.latency)
+                time.sleep(delay)
+                self._record(delay)
+                data = [
+                    {"object": "embedding", "index": i,
+                     "embedding": [float(len(text) % 97), 1.0, float(i), 0.5] * 16}
+                    for i, text in enumerate(inputs)
+                ]
+                tokens = sum(len(str(text).split()) for text in inputs)
+                payload = {"object": "list", "data": data, "model": body.get("model"),
+                           "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+                           "embeddings": [item["embedding"] for item in data]}
+                self._send_json(200, payload)
+
+            def _chat(self, body: dict) -> None:
+                text, finish_reason = mock.generate(body)
+                pieces = re.findall(r"\S+\s*|\s+", text)
+                prompt_tokens = sum(len(_message_text(m.get("content", "")).split()) for m in body.get("messages", []))
+                usage = {"prompt_tokens": prompt_tokens, "completion_tokens": len(pieces),
+                         "total_tokens": prompt_tokens + len(pieces)}
+                first = mock._scaled(mock.latency) + mock._stalled()
+                if mock.prompt_rate:
+                    first += mock._scaled(prompt_tokens / mock.prompt_rate)
+                per_token = mock._scaled(1.0 / mock.token_rate) if mock.token_rate else 0.0
+
+                if not body.get("stream"):
+                    delay = first + per_token * len(pieces)
+                    time.sleep(delay)
+                    self._record(delay)
+                    self._send_json(200, {
+                        "id": "mock", "object": "chat.completion", "created": int(time.time()),
+                        "model": body.get("model"),
+                        "choices": [{"index": 0, "message": {"role": "assistant", "content": text},
+                                     "finish_reason": finish_reason}],
+                        "usage": usage,
+                    })
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+
+                def send(payload) -> None:
+                    data = f"data: {payload}\n\n".encode("utf-8")
+                    self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+
+                def chunk(delta: dict, finish_reason=None) -> str:
+                    return json.dumps({
+                        "id": "mock", "object": "chat.completion.chunk", "created": int(time.time()),
+                        "model": body.get("model"),
+                        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+                    })
+
+                time.sleep(first)
+                for piece in pieces:
+                    send(chunk({"content": piece}))
+                    time.sleep(per_token)
+                send(chunk({}, finish_reason))
+                # Like OpenAI, report usage on a final chunk without choices when asked to
+                if (body.get("stream_options") or {}).get("include_usage"):
+                    send(json.dumps({"id": "mock", "object": "chat.completion.chunk", "created": int(time.time()),
+                                     "model": body.get("model"), "choices": [], "usage": usage}))
+                send("[DONE]")
+                self.wfile.write(b"0\r\n\r\n")
+                self._record(first + per_token * len(pieces))
+
+        self._server = _Server((self.host, self.port), Handler)
+        # Port 0 picks a free port
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, name="mock-server", daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "MockServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.stop()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Mock OpenAI-compatible server for benchmarks")
+    parser.add_argument("--host", help="Defaults to the host in OLLAMA_CONFIG['base_url']")
+    parser.add_argument("--port", type=int, help="Defaults to the port in OLLAMA_CONFIG['base_url']")
+    parser.add_argument("--latency", type=float, default=0.02, help="Seconds before the first token")
+    parser.add_argument("--token-rate", type=float, default=200.0, help="Generated tokens per second")
+    parser.add_argument("--jitter", type=float, default=0.1, help="Relative +/- jitter on every duration")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with HTTP 500")
+    parser.add_argument("--completion-tokens", type=int, default=48, help="Length of generic replies")
+    parser.add_argument("--seed", type=int, help="Seed for jitter and error injection")
+    parser.add_argument("--parallel", type=int, default=0, help="Requests processed at once; 0 is unlimited")
+    parser.add_argument("--prompt-rate", type=float, default=0.0, help="Prompt tokens per second; 0 is free")
+    parser.add_argument("--stall-rate", type=float, default=0.0, help="Fraction of chat requests that stall")
+    parser.add_argument("--stall", type=float, default=2.0, help="Seconds a stalled request hangs")
+    parser.add_argument("--ramble", type=int, default=0, help="Tokens of chatter appended after every reply")
+    args = parser.parse_args()
+
+    server = MockServer(args.host, args.port, args.latency, args.token_rate, args.jitter,
+                        args.error_rate, args.completion_tokens, args.seed, args.parallel, args.prompt_rate,
+                        args.stall_rate, args.stall, args.ramble).start()
+    print(f"Mock server listening on {server.base_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+if __name__ == "__main__":
+    main()
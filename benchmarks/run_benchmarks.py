@@ -0,0 +1,261 @@
+"""
+Drive every basic_functions entry point and analyze_code_file against the mock server.
+
+Each scenario runs at several concurrency levels and reports throughput,
+p50/p95/p99 latency and client-side overhead (client latency minus the
+server's simulated service time) as JSON.
+
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --concurrency 1 8 32 --calls 200 --output results.json
+    python benchmarks/run_benchmarks.py --scenarios code_function web_function --error-rate 0.05
+
+The in-process mock shares the GIL with the client, which inflates overhead at
+high concurrency. For cleaner numbers, start benchmarks/mock_server.py in
+another process and pass --base-url (overhead is then not reported).
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+# Add root directory to Python path
+root_dir = str(Path(__file__).resolve().parent.parent)
+if root_dir not in sys.path:
+    sys.path.append(root_dir)
+
+from config import (
+    OLLAMA_CONFIG, CACHE_CONFIG, MICROBATCH_CONFIG, HEDGE_CONFIG, STRUCTURED_OUTPUT_CONFIG, BUDGET_CONFIG
+)
+from benchmarks.mock_server import MockServer
+
+IMAGE_PATH = str(Path(root_dir) / "image.png")
+REVIEW_PATH = str(Path(root_dir) / "config.py")
+
+class Scenario(NamedTuple):
+    """One entry point; call(i) performs the i-th request."""
+    call: Callable[[int], Any]
+    is_async: bool = False
+    # Issues several requests in parallel per call, so overhead can't be derived from service time
+    fanout: bool = False
+
+def _scenarios() -> Dict[str, Scenario]:
+    # Imported after the base URL is pointed at the mock server
+    from basic_functions import (
+        math_function, string_function, code_function, code_function_stream, embedding_function,
+        batch_embedding_function, vision_function, web_function, web_function_stream, batch_web_function,
+        debug_function, acode_function, astring_function
+    )
+    from applications.code_reviewer.reviewer import analyze_code_file
+
+    def drain(stream):
+        for _ in stream:
+            pass
+        return stream
+
+    error_info = {
+        "error_type": "TypeError",
+        "error_message": "unsupported operand type(s) for +: 'int' and 'str'",
+        "traceback": "Traceback (most recent call last):\n  File \"app.py\", line 3, in <module>",
+        "code_snippet": "total = 1 + '2'",
+        "variables": {"total": "undefined"}
+    }
+
+    return {
+        "math_function.local": Scenario(lambda i: math_function(f"{i} + 2 * 3")),
+        "math_function": Scenario(lambda i: math_function(f"What is the derivative of x^{i % 7 + 2}?")),
+        "string_function.local": Scenario(lambda i: string_function("reverse", f"benchmark text {i}")),
+        "string_function": Scenario(lambda i: string_function("to_title_case", f"benchmark text {i}")),
+        "astring_function": Scenario(lambda i: astring_function("to_title_case", f"benchmark text {i}"), is_async=True),
+        "code_function": Scenario(lambda i: code_function("optimize", f"def f(x):\n    return [v * {i} for v in x]")),
+        "acode_function": Scenario(lambda i: acode_function("optimize", f"def f(x):\n    return [v * {i} for v in x]"),
+                                   is_async=True),
+        "code_function_stream": Scenario(lambda i: drain(code_function_stream("document", f"def g(y):\n    return y + {i}"))),
+        "embedding_function": Scenario(lambda i: embedding_function(f"benchmark sentence number {i}")),
+        "batch_embedding_function": Scenario(lambda i: batch_embedding_function(
+            [f"sentence {i}-{j}" for j in range(64)], batch_size=16), fanout=True),
+        "vision_function": Scenario(lambda i: vision_function("caption", IMAGE_PATH)),
+        "vision_function.multi": Scenario(lambda i: vision_function(["caption", "analyze", "describe"], IMAGE_PATH)),
+        "web_function": Scenario(lambda i: web_function("component", f"A share button variant {i}", "modern")),
+        "web_function_stream": Scenario(lambda i: drain(web_function_stream("component", f"A card variant {i}"))),
+        "batch_web_function": Scenario(lambda i: list(batch_web_function(
+            [("component", f"A card variant {i}-{j}") for j in range(16)])), fanout=True),
+        "debug_function": Scenario(lambda i: debug_function(error_info, f"Benchmark run {i}")),
+        "analyze_code_file": Scenario(lambda i: analyze_code_file(REVIEW_PATH), fanout=True),
+    }
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return float("nan")
+    index = min(len(sorted_values) - 1, max(0, int(round(q * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+def _timed(call: Callable[[int], Any], i: int):
+    started = time.perf_counter()
+    try:
+        call(i)
+        return time.perf_counter() - started, None
+    except Exception as e:
+        return time.perf_counter() - started, e
+
+async def _atimed(call: Callable[[int], Any], i: int, semaphore: asyncio.Semaphore):
+    async with semaphore:
+        started = time.perf_counter()
+        try:
+            await call(i)
+            return time.perf_counter() - started, None
+        except Exception as e:
+            return time.perf_counter() - started, e
+
+def run_scenario(name: str, scenario: Scenario, concurrency: int, calls: int,
+                 server: Optional[MockServer]) -> Dict[str, Any]:
+    """Run calls requests at the given concurrency and summarise them."""
+    if server is not None:
+        server.reset_stats()
+    started = time.perf_counter()
+    if scenario.is_async:
+        async def run_all():
+            from basic_functions import aclose_clients
+            semaphore = asyncio.Semaphore(concurrency)
+            try:
+                return await asyncio.gather(*(_atimed(scenario.call, i, semaphore) for i in range(calls)))
+            finally:
+                await aclose_clients()
+        outcomes = asyncio.run(run_all())
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            outcomes = list(executor.map(lambda i: _timed(scenario.call, i), range(calls)))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(seconds for seconds, _ in outcomes)
+    errors = [error for _, error in outcomes if error is not None]
+    mean = statistics.fmean(latencies)
+    # Service time is only known for the in-process mock server
+    server_stats = server.stats() if server is not None else None
+    service_per_call = server_stats["service_seconds"] / calls if server_stats else None
+    # Coalesced, micro-batched and fanned-out calls don't map one-to-one onto server requests
+    measurable = (service_per_call is not None and not scenario.fanout
+                  and server_stats["requests"] in (0, calls))
+
+    return {
+        "scenario": name,
+        "concurrency": concurrency,
+        "calls": calls,
+        "errors": len(errors),
+        "error_types": sorted({type(error).__name__ for error in errors}),
+        "seconds": elapsed,
+        "throughput_per_second": calls / elapsed if elapsed else None,
+        "latency_ms": {
+            "mean": mean * 1000,
+            "p50": _percentile(latencies, 0.50) * 1000,
+            "p95": _percentile(latencies, 0.95) * 1000,
+            "p99": _percentile(latencies, 0.99) * 1000,
+        },
+        "server_requests": server_stats["requests"] if server_stats else None,
+        "server_ms_per_call": service_per_call * 1000 if service_per_call is not None else None,
+        # Time spent outside the simulated model: client code, HTTP, JSON and queueing
+        "overhead_ms": (mean - service_per_call) * 1000 if measurable else None,
+    }
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scenarios", nargs="*", help="Subset of scenarios to run (default: all)")
+    parser.add_argument("--concurrency", nargs="*", type=int, default=[1, 4, 16], help="Concurrency levels")
+    parser.add_argument("--calls", type=int, default=64, help="Calls per scenario and concurrency level")
+    parser.add_argument("--base-url", help="Benchmark an already running server (e.g. mock_server.py in another "
+                                           "process, or Ollama) instead of the in-process mock")
+    parser.add_argument("--port", type=int, default=0, help="Mock server port (0 picks a free one)")
+    parser.add_argument("--latency", type=float, default=0.02, help="Mock seconds before the first token")
+    parser.add_argument("--token-rate", type=float, default=500.0, help="Mock tokens per second")
+    parser.add_argument("--jitter", type=float, default=0.1, help="Mock relative jitter")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Mock fraction of failed requests")
+    parser.add_argument("--parallel", type=int, default=0, help="Mock requests processed at once; 0 is unlimited")
+    parser.add_argument("--prompt-rate", type=float, default=0.0, help="Mock prompt tokens per second; 0 is free")
+    parser.add_argument("--stall-rate", type=float, default=0.0, help="Mock fraction of chat requests that stall")
+    parser.add_argument("--stall", type=float, default=2.0, help="Mock seconds a stalled request hangs")
+    parser.add_argument("--ramble", type=int, default=0, help="Mock tokens of chatter appended after every reply")
+    parser.add_argument("--seed", type=int, default=0, help="Mock random seed")
+    parser.add_argument("--microbatch", action="store_true",
+                        help="Enable MICROBATCH_CONFIG so math/string LLM calls are packed into batched prompts")
+    parser.add_argument("--hedge", action="store_true", help="Enable HEDGE_CONFIG so slow calls are duplicated")
+    parser.add_argument("--structured", action="store_true",
+                        help="Enable STRUCTURED_OUTPUT_CONFIG so debug/web calls request JSON replies")
+    parser.add_argument("--no-budget", action="store_true", help="Disable BUDGET_CONFIG (no max_tokens or stop sequences)")
+    parser.add_argument("--output", help="Write JSON results here instead of stdout")
+    args = parser.parse_args()
+
+    server = None
+    if args.base_url:
+        OLLAMA_CONFIG["base_url"] = args.base_url
+    else:
+        server = MockServer("127.0.0.1", args.port, args.latency, args.token_rate, args.jitter,
+                            args.error_rate, seed=args.seed, parallel=args.parallel,
+                            prompt_rate=args.prompt_rate, stall_rate=args.stall_rate, stall=args.stall,
+                            ramble=args.ramble).start()
+        # Point every client at the mock server
+        OLLAMA_CONFIG["base_url"] = server.base_url
+    # Measure uncached behaviour
+    CACHE_CONFIG["enabled"] = False
+    MICROBATCH_CONFIG["enabled"] = args.microbatch
+    HEDGE_CONFIG["enabled"] = args.hedge
+    STRUCTURED_OUTPUT_CONFIG["enabled"] = args.structured
+    BUDGET_CONFIG["enabled"] = not args.no_budget
+
+    from basic_functions import reset_clients
+    reset_clients()
+
+    scenarios = _scenarios()
+    names = args.scenarios or list(scenarios)
+    unknown = sorted(set(names) - set(scenarios))
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(unknown)}. Choose from: {', '.join(scenarios)}")
+
+    results = []
+    try:
+        for name in names:
+            scenario = scenarios[name]
+            # One untimed call creates clients and fills per-process caches
+            if scenario.is_async:
+                asyncio.run(scenario.call(0))
+            else:
+                scenario.call(0)
+            for concurrency in args.concurrency:
+                result = run_scenario(name, scenario, concurrency, args.calls, server)
+                results.append(result)
+                overhead = "-" if result["overhead_ms"] is None else f"{result['overhead_ms']:.2f}ms"
+                print(f"{name:<28} c={concurrency:<3} {result['throughput_per_second']:>8.1f}/s  "
+                      f"p50 {result['latency_ms']['p50']:>7.1f}ms  p95 {result['latency_ms']['p95']:>7.1f}ms  "
+                      f"p99 {result['latency_ms']['p99']:>7.1f}ms  overhead {overhead}  errors {result['errors']}",
+                      file=sys.stderr)
+    finally:
+        reset_clients()
+        if server is not None:
+            server.stop()
+
+    report = {
+        "base_url": OLLAMA_CONFIG["base_url"],
+        "mock": None if server is None else {"latency": args.latency, "token_rate": args.token_rate,
+                                             "jitter": args.jitter, "error_rate": args.error_rate, "seed": args.seed,
+                                             "parallel": args.parallel, "prompt_rate": args.prompt_rate,
+                                             "stall_rate": args.stall_rate, "stall": args.stall,
+                                             "ramble": args.ramble},
+        "calls": args.calls,
+        "microbatch": args.microbatch,
+        "hedge": args.hedge,
+        "structured": args.structured,
+        "budget": not args.no_budget,
+        "results": results,
+    }
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+    else:
+        print(json.dumps(report, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,7 +5,134 @@ OLLAMA_CONFIG = {
     "model": "smollm2:1.7b",
     "vision_model": "llama3.2-vision:11b",
     "embedding_model": "nomic-embed-text",
-    "temperature": 0.1
+    "temperature": 0.1,
+    # Models tried smallest first by debug_function and web_function; a larger one is only
+    # asked when the smaller one's output fails validation. None uses only "model".
+    "cascade": None  # e.g. ["smollm2:360m", "smollm2:1.7b", "qwen2.5-coder:7b"]
+}
+
+# HTTP Client Configuration (shared connection pool for all function agents)
+CLIENT_CONFIG = {
+    "max_connections": 100,
+    "max_keepalive_connections": 20,
+    "keepalive_expiry": 30.0,
+    "timeout": 600.0,
+    "max_retries": 2,
+    "max_concurrency": 256  # Ceiling for the adaptive concurrency limit
+}
+
+# Adaptive Concurrency Configuration (one limit on in-flight backend requests, shared by every function agent)
+CONCURRENCY_CONFIG = {
+    "adaptive": True,  # False holds the limit at initial_limit
+    "initial_limit": 4,
+    "min_limit": 1,
+    "tolerance": 1.5,  # Latency may rise this much over its unloaded baseline before the limit shrinks
+    "backoff": 0.5  # Limit multiplier after a timeout, 429 or 5xx response
+}
+
+# Model Warm-up Configuration
+WARMUP_CONFIG = {
+    "on_startup": False,  # Preload models in the background when basic_functions is imported
+    "models": None,  # None warms the model, vision_model and embedding_model from OLLAMA_CONFIG
+    "keep_alive": "30m",  # How long Ollama keeps warmed models loaded; -1 keeps them indefinitely
+    "refresh_interval": None,  # Seconds between keep-alive pings from start_keepalive(); None disables
+    "cold_threshold": 0.5,  # Load times above this many seconds are reported as cold starts
+    "timeout": 600.0
+}
+
+# Batch Embedding Configuration
+EMBEDDING_CONFIG = {
+    "batch_size": 64,  # Texts per embeddings request
+    "max_workers": 4  # Batch requests in flight at once
+}
+
+# Response Cache Configuration (opt-in, on-disk cache for deterministic chat calls)
+CACHE_CONFIG = {
+    "enabled": False,
+    "path": ".cache/responses.sqlite3",  # Relative paths resolve against the project root
+    "max_entries": 10000,
+    "max_bytes": 64 * 1024 * 1024,
+    "ttl": 7 * 24 * 3600  # Seconds; None disables expiry
+}
+
+# Request Coalescing Configuration (identical concurrent calls share one upstream request)
+COALESCE_CONFIG = {
+    "enabled": True
+}
+
+# Request Hedging Configuration (opt-in; duplicate calls that run past their usual latency)
+HEDGE_CONFIG = {
+    "enabled": False,
+    "functions": ["code_function", "debug_function"],  # Function agents whose calls may be hedged
+    "percentile": 0.95,  # Hedge a call still running at this latency percentile for its function and operation
+    "min_samples": 20,  # Latencies observed before a function/operation is hedged
+    "window": 200,  # Recent latencies kept per function/operation
+    "budget": 0.05,  # Hedges may add at most this fraction of extra requests
+    "base_url": None  # Alternate backend for duplicates; None sends them to OLLAMA_CONFIG["base_url"]
+}
+
+# Structured Output Configuration (opt-in; schema-constrained JSON replies instead of text sections)
+STRUCTURED_OUTPUT_CONFIG = {
+    "enabled": False,
+    "functions": ["debug_function", "web_function"],  # Function agents that request JSON
+    "mode": "json_schema"  # "json_schema" constrains replies to a schema; "json_object" is plain JSON mode
+}
+
+# Output Token Budget Configuration (max_tokens learned per function/operation/model, plus stop sequences)
+BUDGET_CONFIG = {
+    "enabled": True,
+    "percentile": 0.99,  # Budget is this percentile of recent completion lengths...
+    "margin": 1.5,  # ...times this margin
+    "min_samples": 50,  # Completions observed before a budget is learned
+    "window": 500,  # Recent completion lengths kept per function/operation/model
+    "min_tokens": 16,  # Smallest learned budget
+    "max_tokens": None,  # Ceiling for every request and for retries; None leaves them unbounded
+    "retry_truncated": True,  # Re-send responses cut off by a learned budget under the ceiling
+    # Stop sequences by "function" or "function.operation"; these end the few-shot pattern models tend to continue
+    "stop": {
+        "math_function": ["\nInput:"],
+        "string_function": ["\nInput Operation:"],
+        "code_function": ["\nInput Operation:"],
+        "web_function": ["\nInput Operation:"]
+    }
+}
+
+# Micro-batching Configuration (opt-in; concurrent math/string LLM calls share one numbered prompt)
+MICROBATCH_CONFIG = {
+    "enabled": False,
+    "window": 0.02,  # Seconds to wait for more calls after the first one arrives
+    "max_items": 16,  # Calls packed into one prompt
+    "max_in_flight": 4  # Batched requests sent at once per function
+}
+
+# Bulk Web Generation Configuration (batch_web_function)
+WEB_CONFIG = {
+    "max_in_flight": 8,  # Generation requests in flight at once
+    "validation_workers": 4,  # Workers parsing and validating generated HTML/CSS
+    "validation_executor": "thread"  # "process" validates off the GIL in spawned workers; needs a __main__ guard
+}
+
+# Vision Preprocessing Configuration
+VISION_CONFIG = {
+    "max_size": 1120,  # Longest image side in pixels sent to the vision model
+    "jpeg_quality": 85,
+    "cache_entries": 32  # Encoded image payloads kept in memory
+}
+
+# Code Reviewer Configuration
+REVIEW_CONFIG = {
+    "stage_timeout": 300.0,  # Seconds each concurrent analysis stage may take
+    "incremental": False,  # Only re-review functions/classes whose content changed
+    "store_path": ".cache/reviews.sqlite3",  # Relative paths resolve against the project root
+    "max_parallel_units": 4,  # Units or chunks reviewed at once
+    "chunk_token_budget": 2048  # Larger files are split along AST boundaries into chunks of about this many tokens
+}
+
+# Metrics Configuration (latency, tokens, cache hits and errors per function agent)
+METRICS_CONFIG = {
+    "enabled": True,
+    "latency_buckets": [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0],
+    "port": 9464  # Default port for start_metrics_server()
 }
 
 # Logging Configuration
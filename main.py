@@ -11,6 +11,8 @@ from basic_functions.embedding_function import embedding_function
 from basic_functions.vision_function import vision_function
 from basic_functions.web_function import web_function
 from basic_functions.debug_function import debug_function
+from basic_functions.client import close_clients
+from basic_functions.warmup import warmup
 from config import LOG_CONFIG
 
 # Configure logging
@@ -87,8 +89,9 @@ def showcase_vision():
         ("custom", "What emotions are expressed in this image?")
     ]
     
-    for op, prompt in operations:
-        result = vision_function(op, image_path, prompt)
+    # Answer every operation in a single request so the image is encoded once
+    results = vision_function(operations, image_path)
+    for op, result in results.items():
         print(f"\nOperation: {op}")
         print(f"Result: {result}")
 
@@ -136,6 +139,9 @@ def main():
     try:
         print("\n=== LLM Function Library Showcase ===\n")
         
+        # Load the vision and embedding models while the text showcases run
+        warmup(background=True)
+        
         # Basic operations
         showcase_math()
         showcase_string()
@@ -156,6 +162,8 @@ def main():
     except Exception as e:
         logger.error(f"Showcase failed: {str(e)}")
         raise
+    finally:
+        close_clients()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,48 @@
+import sys
+from pathlib import Path
+
+# Add root directory to Python path
+root_dir = str(Path(__file__).resolve().parent.parent)
+if root_dir not in sys.path:
+    sys.path.insert(0, root_dir)
+
+import pytest
+
+from config import OLLAMA_CONFIG, CACHE_CONFIG
+
+# Settings a test may change on the shared mock server
+_MOCK_SETTINGS = ("latency", "token_rate", "error_rate", "completion_tokens", "stall_rate", "stall", "ramble")
+
+@pytest.fixture(scope="session")
+def _mock_server_session():
+    from benchmarks.mock_server import MockServer
+
+    server = MockServer("127.0.0.1", 0, latency=0.001, token_rate=0, jitter=0).start()
+    yield server
+    server.stop()
+
+@pytest.fixture
+def mock_server(_mock_server_session, monkeypatch):
+    """A benchmarks.mock_server.MockServer on a free port that every client talks to."""
+    from basic_functions.client import reset_clients
+
+    server = _mock_server_session
+    settings = {name: getattr(server, name) for name in _MOCK_SETTINGS}
+    server.reset_stats()
+    monkeypatch.setitem(OLLAMA_CONFIG, "base_url", server.base_url)
+    reset_clients()
+    yield server
+    for name, value in settings.items():
+        setattr(server, name, value)
+    reset_clients()
+
+@pytest.fixture
+def response_cache(tmp_path, monkeypatch):
+    """An enabled response cache in a temporary directory."""
+    from basic_functions.cache import close_cache, get_cache
+
+    close_cache()
+    monkeypatch.setitem(CACHE_CONFIG, "enabled", True)
+    monkeypatch.setitem(CACHE_CONFIG, "path", str(tmp_path / "responses.sqlite3"))
+    yield get_cache()
+    close_cache()
@@ -0,0 +1,75 @@
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+from basic_functions import code_function
+from basic_functions.budget import TokenBudgets
+from config import BUDGET_CONFIG, OLLAMA_CONFIG
+
+completion = sys.modules["basic_functions.completion"]
+
+LABELS = (("function", "code_function"), ("operation", "optimize"), ("model", "test"))
+
+@pytest.fixture
+def budgets(monkeypatch):
+    budgets = TokenBudgets()
+    monkeypatch.setattr(completion, "budgets", budgets)
+    monkeypatch.setitem(BUDGET_CONFIG, "min_samples", 3)
+    monkeypatch.setitem(BUDGET_CONFIG, "max_tokens", None)
+    return budgets
+
+def _completion(tokens, finish_reason="stop"):
+    return SimpleNamespace(choices=[SimpleNamespace(finish_reason=finish_reason)],
+                           usage=SimpleNamespace(completion_tokens=tokens))
+
+def test_budget_is_learned_from_recent_lengths(budgets):
+    assert budgets.limits(LABELS, {}) == {"stop": ["\nInput Operation:"]}
+    for tokens in (10, 30, 20):
+        assert budgets.observe(LABELS, {}, _completion(tokens)) is False
+
+    # The longest of three, with a 1.5x margin
+    assert budgets.limits(LABELS, {}) == {"stop": ["\nInput Operation:"], "max_tokens": 45}
+    assert budgets.limits(LABELS, {}, learned=False) == {"stop": ["\nInput Operation:"]}
+    # Arguments the caller set are left alone
+    assert budgets.limits(LABELS, {"max_tokens": 5, "stop": None}) == {}
+
+def test_learned_budget_has_a_floor(budgets):
+    for tokens in (1, 2, 3):
+        budgets.observe(LABELS, {}, _completion(tokens))
+    assert budgets.limits(LABELS, {})["max_tokens"] == BUDGET_CONFIG["min_tokens"]
+
+def test_operation_stops_override_function_stops(budgets, monkeypatch):
+    monkeypatch.setitem(BUDGET_CONFIG, "stop", {"code_function": ["A"], "code_function.optimize": ["B"]})
+    assert budgets.limits(LABELS, {})["stop"] == ["B"]
+
+def test_only_truncation_by_a_learned_budget_is_retried(budgets, monkeypatch):
+    monkeypatch.setitem(BUDGET_CONFIG, "max_tokens", 100)
+    assert budgets.observe(LABELS, {"max_tokens": 100}, _completion(100, "length")) is False
+    assert budgets.observe(LABELS, {"max_tokens": 40}, _completion(40, "length")) is True
+    # The cut-off length isn't learned
+    assert budgets.stats()["code_function/optimize/test"]["samples"] == 1
+    assert budgets.stats()["code_function/optimize/test"]["truncated"] == 2
+
+    assert budgets.retry_limits({"stop": ["\nX"], "max_tokens": 40}) == {"stop": ["\nX"], "max_tokens": 100}
+
+def test_truncated_replies_are_retried_without_the_budget(mock_server, budgets):
+    mock_server.completion_tokens = 10
+    for _ in range(3):
+        code_function("optimize", "x = 1")
+    labels = f"code_function/optimize/{OLLAMA_CONFIG['model']}"
+    assert budgets.stats()[labels]["budget"] == 16
+
+    mock_server.reset_stats()
+    mock_server.completion_tokens = 40
+    response = code_function("optimize", "x = 1")
+
+    assert len(response.split()) == 40
+    assert mock_server.requests == 2
+    assert budgets.stats()[labels]["truncated"] == 1
+
+def test_stop_sequences_cut_off_rambling(mock_server, budgets):
+    mock_server.ramble = 8
+    response = code_function("optimize", "x = 1")
+    assert "Input Operation" not in response
+    assert len(response.split()) == mock_server.completion_tokens
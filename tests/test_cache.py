@@ -0,0 +1,82 @@
+import time
+
+import pytest
+
+from basic_functions.cache import ResponseCache, bypass_cache, get_cache
+from basic_functions.completion import chat_completion
+
+MESSAGES = [{"role": "user", "content": "Say hello"}]
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ResponseCache(str(tmp_path / "responses.sqlite3"), max_entries=3)
+    yield cache
+    cache.close()
+
+def test_make_key_covers_every_request_parameter():
+    key = ResponseCache.make_key("m", MESSAGES, 0.1)
+    assert key == ResponseCache.make_key("m", MESSAGES, 0.1)
+    assert key != ResponseCache.make_key("other", MESSAGES, 0.1)
+    assert key != ResponseCache.make_key("m", MESSAGES, 0.2)
+    assert key != ResponseCache.make_key("m", MESSAGES, 0.1, stop=["\n"])
+
+def test_get_returns_what_set_stored(cache):
+    assert cache.get("a") is None
+    cache.set("a", "reply")
+    assert cache.get("a") == "reply"
+    assert cache.stats() == {"hits": 1, "misses": 1, "entries": 1, "bytes": len("reply")}
+
+def test_least_recently_used_entries_are_evicted(cache):
+    for key in "abc":
+        cache.set(key, key)
+        time.sleep(0.002)
+    cache.get("a")
+    time.sleep(0.002)
+    cache.set("d", "d")
+    assert cache.get("b") is None
+    assert [cache.get(key) for key in "acd"] == ["a", "c", "d"]
+
+def test_entries_over_max_bytes_are_evicted(tmp_path):
+    cache = ResponseCache(str(tmp_path / "bytes.sqlite3"), max_bytes=10)
+    try:
+        cache.set("a", "12345")
+        time.sleep(0.002)
+        cache.set("b", "123456")
+        assert cache.get("a") is None
+        assert cache.get("b") == "123456"
+    finally:
+        cache.close()
+
+def test_expired_entries_are_misses(tmp_path):
+    cache = ResponseCache(str(tmp_path / "ttl.sqlite3"), ttl=0.05)
+    try:
+        cache.set("a", "reply")
+        assert cache.get("a") == "reply"
+        time.sleep(0.1)
+        assert cache.get("a") is None
+        assert cache.stats()["entries"] == 0
+    finally:
+        cache.close()
+
+def test_cached_reply_is_replayed_without_a_request(mock_server, response_cache):
+    first = chat_completion(MESSAGES)
+    requests = mock_server.requests
+    assert chat_completion(MESSAGES) == first
+    assert mock_server.requests == requests
+    with bypass_cache():
+        assert get_cache() is None
+        chat_completion(MESSAGES)
+    assert mock_server.requests == requests + 1
+
+def test_truncated_replies_are_not_cached(mock_server, response_cache):
+    chat_completion(MESSAGES, max_tokens=2)
+    assert response_cache.stats()["entries"] == 0
+
+def test_replies_failing_validation_are_returned_but_not_cached(mock_server, response_cache):
+    def reject(response):
+        raise ValueError("malformed")
+
+    assert chat_completion(MESSAGES, validate=reject)
+    assert response_cache.stats()["entries"] == 0
+    chat_completion(MESSAGES, validate=len)
+    assert response_cache.stats()["entries"] == 1
@@ -0,0 +1,73 @@
+import asyncio
+import sys
+
+import pytest
+
+from basic_functions import adebug_function, debug_function, get_cascade_stats
+from basic_functions.cascade import cascade
+from config import OLLAMA_CONFIG
+
+ERROR = {"error_type": "KeyError", "error_message": "'name'", "traceback": "line 3, in main"}
+
+PARTIAL = "ANALYSIS:\nThe dict has no such key."
+
+def _reply_per_model(mock_server, monkeypatch, replies):
+    """Have the mock answer some models with fixed text."""
+    reply_text = mock_server.reply_text
+    monkeypatch.setattr(mock_server, "reply_text",
+                        lambda body: replies.get(body.get("model")) or reply_text(body))
+
+@pytest.fixture
+def tiers(monkeypatch):
+    monkeypatch.setitem(OLLAMA_CONFIG, "cascade", ["tiny", "large"])
+    return ["tiny", "large"]
+
+def _counts(function, kind, model):
+    return get_cascade_stats().get(function, {}).get(kind, {}).get(model, 0)
+
+def test_invalid_reply_escalates_to_the_next_model(mock_server, monkeypatch, tiers):
+    _reply_per_model(mock_server, monkeypatch, {"tiny": PARTIAL})
+    escalated = _counts("debug_function", "escalated", "tiny")
+    served = _counts("debug_function", "served", "large")
+
+    sections = debug_function(ERROR)
+
+    assert "No information provided" not in sections.values()
+    assert mock_server.requests == 2
+    assert _counts("debug_function", "escalated", "tiny") == escalated + 1
+    assert _counts("debug_function", "served", "large") == served + 1
+
+def test_valid_reply_is_served_by_the_first_model(mock_server, tiers):
+    served = _counts("debug_function", "served", "tiny")
+    asyncio.run(adebug_function(ERROR))
+    assert mock_server.requests == 1
+    assert _counts("debug_function", "served", "tiny") == served + 1
+
+def test_last_model_reply_is_kept_by_the_lenient_parser(mock_server, monkeypatch, tiers):
+    _reply_per_model(mock_server, monkeypatch, {"tiny": PARTIAL, "large": PARTIAL})
+    sections = debug_function(ERROR)
+    assert sections["analysis"] == "The dict has no such key."
+    assert sections["fix"] == "No information provided"
+
+def test_without_lenient_parser_the_last_rejection_is_raised(mock_server, monkeypatch, tiers):
+    _reply_per_model(mock_server, monkeypatch, {"tiny": "no", "large": "no"})
+
+    def parse(response):
+        raise ValueError(f"unexpected {response!r}")
+
+    with pytest.raises(ValueError):
+        cascade([{"role": "user", "content": "hello"}], parse)
+    assert mock_server.requests == 2
+
+def test_lenient_replies_of_the_last_model_are_cached(mock_server, monkeypatch, response_cache):
+    _reply_per_model(mock_server, monkeypatch, {OLLAMA_CONFIG["model"]: PARTIAL})
+    first = debug_function(ERROR)
+    assert debug_function(ERROR) == first
+    assert mock_server.requests == 1
+
+def test_rejected_replies_of_earlier_models_are_not_cached(mock_server, monkeypatch, tiers, response_cache):
+    _reply_per_model(mock_server, monkeypatch, {"tiny": PARTIAL})
+    debug_function(ERROR)
+    debug_function(ERROR)
+    # tiny is asked again each time; large's valid reply comes from the cache
+    assert mock_server.requests == 3
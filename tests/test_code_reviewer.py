@@ -0,0 +1,95 @@
+import runpy
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+from tests.conftest import root_dir
+from config import CLIENT_CONFIG, REVIEW_CONFIG
+from basic_functions.client import reset_clients
+from applications.code_reviewer.reviewer import ISSUE_SECTIONS, analyze_code_file, generate_report
+
+# Get path to main.py in root directory
+main_path = Path(root_dir) / "main.py"
+
+def test_review_main(mock_server, tmp_path):
+    """Review main.py against the mock server and write the report to a temporary file."""
+    analysis = analyze_code_file(str(main_path), incremental=False)
+
+    assert analysis["original"] == main_path.read_text()
+    assert analysis["errors"] == {}
+    assert analysis["optimized"].strip()
+    assert analysis["documentation"].strip()
+    assert list(analysis["issues"]) == ISSUE_SECTIONS
+    assert set(analysis["timings"]) == {"optimized", "issues", "documentation", "total"}
+
+    report_path = tmp_path / "main_review.md"
+    report_path.write_text(generate_report(analysis))
+    report = report_path.read_text()
+    assert "# Code Analysis Report" in report
+    assert analysis["original"] in report
+    assert f"- Root Cause: {analysis['issues']['root_cause']}" in report
+    assert "- optimized:" in report
+
+def test_failed_stages_are_reported_not_raised(mock_server, monkeypatch):
+    mock_server.error_rate = 1.0
+    monkeypatch.setitem(CLIENT_CONFIG, "max_retries", 0)
+    reset_clients()
+    analysis = analyze_code_file(str(main_path), incremental=False)
+
+    assert set(analysis["errors"]) == {"optimized", "issues", "documentation"}
+    assert analysis["optimized"].startswith("# Optimization unavailable")
+    assert all(text.startswith("Unavailable") for text in analysis["issues"].values())
+    assert "(InternalServerError" in generate_report(analysis)
+
+def test_slow_stages_time_out_without_holding_up_the_review(mock_server):
+    mock_server.latency = 0.5
+    started = time.perf_counter()
+    analysis = analyze_code_file(str(main_path), stage_timeout=0.1, incremental=False)
+
+    assert time.perf_counter() - started < 0.4
+    assert set(analysis["errors"]) == {"optimized", "issues", "documentation"}
+    assert all(error.startswith("Timed out") for error in analysis["errors"].values())
+    # Let the abandoned stages finish before the fixture closes their clients
+    while mock_server.requests < 3 and time.perf_counter() - started < 5:
+        time.sleep(0.05)
+
+SOURCE = '''import math
+
+def area(radius):
+    return math.pi * radius ** 2
+
+def perimeter(radius):
+    return 2 * math.pi * radius
+'''
+
+@pytest.fixture
+def review_store(tmp_path, monkeypatch):
+    monkeypatch.setitem(REVIEW_CONFIG, "store_path", str(tmp_path / "reviews.sqlite3"))
+    return tmp_path / "reviews.sqlite3"
+
+def test_incremental_review_only_resends_changed_units(mock_server, review_store, tmp_path):
+    path = tmp_path / "shapes.py"
+    path.write_text(SOURCE)
+    first = analyze_code_file(str(path), incremental=True)
+    assert [unit["cached"] for unit in first["units"]] == [False] * len(first["units"])
+
+    path.write_text(SOURCE.replace("2 * math.pi", "math.tau"))
+    mock_server.reset_stats()
+    second = analyze_code_file(str(path), incremental=True)
+    cached = {unit["name"]: unit["cached"] for unit in second["units"]}
+
+    assert cached["perimeter"] is False
+    assert cached["area"] is True
+    assert mock_server.requests == 3
+
+def test_command_line_falls_back_to_the_configured_mode(mock_server, review_store, tmp_path, monkeypatch, capsys):
+    path = tmp_path / "shapes.py"
+    path.write_text(SOURCE)
+    monkeypatch.setitem(REVIEW_CONFIG, "incremental", True)
+    monkeypatch.setattr(sys, "argv", ["reviewer.py", str(path)])
+    runpy.run_path(str(Path(root_dir) / "applications" / "code_reviewer" / "reviewer.py"), run_name="__main__")
+
+    assert "# Code Analysis Report" in capsys.readouterr().out
+    assert review_store.exists()
@@ -0,0 +1,15 @@
+from basic_functions import metrics
+from basic_functions.completion import stream_chat_completion
+
+MESSAGES = [{"role": "user", "content": "Say hello"}]
+
+def _completion_tokens():
+    return sum(sample["value"] for sample in metrics.get_metrics()["llm_completion_tokens_total"])
+
+def test_stream_records_usage_from_a_final_chunk_without_choices(mock_server):
+    metrics.reset_metrics()
+    stream = stream_chat_completion(MESSAGES, use_cache=False,
+                                    extra_body={"stream_options": {"include_usage": True}})
+    assert "".join(stream)
+    assert stream.finish_reason == "stop"
+    assert _completion_tokens() > 0
@@ -0,0 +1,29 @@
+import asyncio
+
+import numpy as np
+
+from basic_functions import abatch_embedding_function, batch_embedding_function, embedding_function
+
+TEXTS = ["a", "bb", "ccc", "dddd", "eeeee"]
+
+def test_batch_returns_a_float32_matrix_in_input_order(mock_server):
+    matrix = batch_embedding_function(TEXTS, batch_size=2, max_workers=3)
+
+    assert matrix.shape == (len(TEXTS), len(embedding_function("a")))
+    assert matrix.dtype == np.float32
+    assert matrix.flags["C_CONTIGUOUS"]
+    # The mock encodes each text's length and its position within its request
+    assert matrix[:, 0].tolist() == [1, 2, 3, 4, 5]
+    assert matrix[:, 2].tolist() == [0, 1, 0, 1, 0]
+    assert mock_server.requests == 4
+
+def test_batch_can_normalize_rows(mock_server):
+    matrix = batch_embedding_function(TEXTS, batch_size=2, normalize=True)
+    assert np.allclose(np.linalg.norm(matrix, axis=1), 1.0)
+
+def test_async_batch_matches_the_sync_version(mock_server):
+    matrix = asyncio.run(abatch_embedding_function(TEXTS, batch_size=2))
+    assert np.array_equal(matrix, batch_embedding_function(TEXTS, batch_size=2))
+
+def test_empty_input_gives_an_empty_matrix(mock_server):
+    assert batch_embedding_function([]).shape[0] == 0
@@ -0,0 +1,90 @@
+import asyncio
+import sys
+import time
+
+import pytest
+
+from basic_functions import code_function, get_hedging_stats
+from config import HEDGE_CONFIG
+
+hedging = sys.modules["basic_functions.hedging"]
+
+LABELS = (("function", "code_function"), ("operation", "optimize"), ("model", "test"))
+
+@pytest.fixture
+def policy(monkeypatch):
+    policy = hedging.HedgePolicy()
+    monkeypatch.setattr(hedging, "policy", policy)
+    monkeypatch.setitem(HEDGE_CONFIG, "enabled", True)
+    monkeypatch.setitem(HEDGE_CONFIG, "min_samples", 3)
+    monkeypatch.setitem(HEDGE_CONFIG, "budget", 1.0)
+    return policy
+
+def _samples(policy):
+    return len(policy._latencies.get(LABELS, ()))
+
+def _attempt(*delays):
+    """An attempt whose n-th start takes delays[n] seconds and answers with its number."""
+    started = []
+
+    async def attempt(base_url):
+        number = len(started)
+        started.append(base_url)
+        await asyncio.sleep(delays[number])
+        return number
+
+    return attempt
+
+def test_threshold_waits_for_enough_samples(policy):
+    assert policy.delay(LABELS) is None
+    for seconds in (0.3, 0.1, 0.2):
+        policy.record(LABELS, seconds)
+    assert policy.delay(LABELS) == 0.3
+
+def test_fast_primary_adds_one_sample(policy):
+    assert asyncio.run(hedging._race(LABELS, _attempt(0.0), delay=1.0)) == 0
+    assert _samples(policy) == 1
+    assert policy.stats()["hedged"] == 0
+
+def test_primary_without_budget_adds_one_sample(policy):
+    assert asyncio.run(hedging._race(LABELS, _attempt(0.05), delay=0.01)) == 0
+    assert _samples(policy) == 1
+    assert policy.stats()["denied"] == 1
+
+def test_hedge_wins_over_a_stalled_primary(policy):
+    policy._tokens = 1.0
+    assert asyncio.run(hedging._race(LABELS, _attempt(5.0, 0.0), delay=0.01)) == 1
+    # The hedge's latency and the cancelled primary's lower bound
+    assert _samples(policy) == 2
+    assert policy.stats() == {"calls": 0, "hedged": 1, "won": 1, "denied": 0}
+
+def test_failed_primary_leaves_the_hedge_its_chance(policy):
+    policy._tokens = 1.0
+
+    calls = []
+
+    async def attempt(base_url):
+        calls.append(base_url)
+        if len(calls) == 1:
+            await asyncio.sleep(0.05)
+            raise ConnectionError("primary failed")
+        await asyncio.sleep(0.1)
+        return "hedge"
+
+    assert asyncio.run(hedging._race(LABELS, attempt, delay=0.01)) == "hedge"
+
+def test_slow_calls_are_hedged_end_to_end(mock_server, policy, monkeypatch):
+    # The first call also opens the client's connection, so hedge past the median
+    monkeypatch.setitem(HEDGE_CONFIG, "percentile", 0.5)
+    for _ in range(3):
+        code_function("optimize", "x = 1")
+    assert mock_server.requests == 3
+
+    mock_server.latency = 0.2
+    assert code_function("optimize", "x = 1")
+    assert get_hedging_stats()["hedged"] == 1
+    # The server counts the losing request once it finishes
+    deadline = time.monotonic() + 5
+    while mock_server.requests < 5 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert mock_server.requests == 5
@@ -0,0 +1,53 @@
+import base64
+import io
+import os
+import random
+
+import pytest
+from PIL import Image
+
+from basic_functions import vision_function
+from basic_functions.image_preprocess import clear_image_cache, prepare_image
+
+@pytest.fixture(autouse=True)
+def _fresh_cache():
+    clear_image_cache()
+    yield
+    clear_image_cache()
+
+def _save(path, size, mode="RGB"):
+    # Random pixels, like a photo, don't compress well as PNG
+    pixels = random.Random(0).randbytes(size[0] * size[1] * len(mode))
+    Image.frombytes(mode, size, pixels).save(path, "PNG")
+    return str(path)
+
+def _decode(payload):
+    return Image.open(io.BytesIO(base64.b64decode(payload.data)))
+
+def test_large_opaque_images_are_downsized_to_jpeg(tmp_path):
+    payload = prepare_image(_save(tmp_path / "big.png", (800, 400)), max_size=200)
+
+    assert payload.mime_type == "image/jpeg"
+    assert payload.size == (200, 100)
+    assert payload.data_url.startswith("data:image/jpeg;base64,")
+    assert _decode(payload).size == (200, 100)
+    assert len(base64.b64decode(payload.data)) < payload.source_bytes
+
+def test_transparent_images_stay_png(tmp_path):
+    payload = prepare_image(_save(tmp_path / "alpha.png", (300, 300), mode="RGBA"), max_size=100)
+    assert payload.mime_type == "image/png"
+    assert _decode(payload).mode == "RGBA"
+
+def test_payloads_are_reused_until_the_file_changes(tmp_path):
+    path = _save(tmp_path / "photo.png", (300, 200))
+    first = prepare_image(path, max_size=100)
+    assert prepare_image(path, max_size=100) is first
+    assert prepare_image(path, max_size=50) is not first
+
+    _save(tmp_path / "photo.png", (200, 300))
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1))
+    assert prepare_image(path, max_size=100).size == (67, 100)
+
+def test_vision_function_sends_the_prepared_image(mock_server, tmp_path):
+    assert vision_function("caption", _save(tmp_path / "photo.png", (1500, 1000)))
+    assert mock_server.requests == 1
@@ -0,0 +1,111 @@
+import asyncio
+import sys
+import threading
+
+import pytest
+
+from basic_functions import math_function
+from basic_functions.limiter import AdaptiveLimiter, is_overload
+from config import OLLAMA_CONFIG
+
+completion = sys.modules["basic_functions.completion"]
+
+class _StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+def _window(limiter, latency, error=None):
+    """Run one full window of requests that all hold their slot at once."""
+    count = int(limiter.limit)
+    for _ in range(count):
+        limiter.acquire()
+    for _ in range(count):
+        limiter.release("model", latency, error)
+
+def test_overload_errors_are_recognised():
+    assert is_overload(_StatusError(429))
+    assert is_overload(_StatusError(503))
+    assert is_overload(TimeoutError())
+    assert not is_overload(_StatusError(400))
+    assert not is_overload(ValueError("bad input"))
+
+def test_limit_doubles_during_slow_start():
+    limiter = AdaptiveLimiter(initial_limit=2, min_limit=1, max_limit=64, adaptive=True)
+    _window(limiter, 0.1)
+    assert limiter.limit == 4
+    _window(limiter, 0.1)
+    assert limiter.limit == 8
+
+def test_limit_grows_by_sqrt_after_first_slowdown():
+    limiter = AdaptiveLimiter(initial_limit=16, min_limit=1, max_limit=64, adaptive=True, tolerance=1.5)
+    _window(limiter, 0.1)
+    assert limiter.limit == 32
+    _window(limiter, 0.6)
+    # Shrinking is capped at half
+    assert limiter.limit == pytest.approx(16)
+    _window(limiter, 0.1)
+    assert limiter.limit == pytest.approx(20)
+
+def test_unused_limit_does_not_grow():
+    limiter = AdaptiveLimiter(initial_limit=8, min_limit=1, max_limit=64, adaptive=True)
+    for _ in range(8):
+        limiter.acquire()
+        limiter.release("model", 0.1)
+    assert limiter.limit == 8
+
+def test_overload_backs_off_once_per_window():
+    limiter = AdaptiveLimiter(initial_limit=8, min_limit=1, max_limit=64, adaptive=True, backoff=0.5)
+    _window(limiter, 0.1, _StatusError(503))
+    assert limiter.limit == 4
+    _window(limiter, 0.1, _StatusError(400))
+    assert limiter.limit == 4
+
+def test_fixed_limit_ignores_outcomes():
+    limiter = AdaptiveLimiter(initial_limit=4, min_limit=1, max_limit=64, adaptive=False)
+    _window(limiter, 0.1)
+    _window(limiter, 0.1, _StatusError(503))
+    assert limiter.limit == 4
+
+def test_waiters_are_served_in_order():
+    limiter = AdaptiveLimiter(initial_limit=1, min_limit=1, max_limit=1, adaptive=False)
+    limiter.acquire()
+    order = []
+
+    def wait(name):
+        limiter.acquire()
+        order.append(name)
+        limiter.release("model", 0.0)
+
+    first = threading.Thread(target=wait, args=("first",))
+    first.start()
+    while not limiter.stats()["queued"]:
+        pass
+
+    async def await_slot():
+        await limiter.aacquire()
+        order.append("async")
+        limiter.release("model", 0.0)
+
+    async def run():
+        task = asyncio.create_task(await_slot())
+        await asyncio.sleep(0.01)
+        assert limiter.stats()["queued"] == 2
+        limiter.release("model", 0.0)
+        await task
+
+    asyncio.run(run())
+    first.join()
+    assert order == ["first", "async"]
+    assert limiter.stats()["in_flight"] == 0
+
+def test_requests_are_timed_per_function(mock_server, monkeypatch):
+    limiter = AdaptiveLimiter(initial_limit=4, min_limit=1, max_limit=16, adaptive=True)
+    monkeypatch.setattr(completion, "limiter", limiter)
+    for n in range(4):
+        math_function(f"How many legs do {n} dogs have?")
+
+    stats = limiter.stats()
+    assert stats["in_flight"] == 0
+    assert list(stats["latency"]) == [f"{OLLAMA_CONFIG['model']}/math_function/chat"]
+    assert stats["latency"][f"{OLLAMA_CONFIG['model']}/math_function/chat"]["baseline"] > 0
@@ -0,0 +1,50 @@
+import time
+
+import pytest
+
+from basic_functions.math_eval import evaluate_batch, evaluate_expression, normalize_expression
+
+@pytest.mark.parametrize("question, expected", [
+    ("2 + 2=", "4"),
+    ("What is 5 * 3?", "15"),
+    ("Calculate 10/2", "5"),
+    ("15% of 200", "30"),
+    ("square root of 16", "4"),
+    ("3 squared", "9"),
+    ("2^10", "1024"),
+    ("pow(2, 10)", "1024"),
+    ("pow(2, 10**9, 7)", "2"),
+    ("(-2)**3", "-8"),
+    ("2**-2", "0.25"),
+    ("1,000 + 1", "1001"),
+])
+def test_evaluates_plain_expressions(question, expected):
+    assert evaluate_expression(question) == expected
+
+@pytest.mark.parametrize("question", [
+    "What is the derivative of x^2?",
+    "__import__('os')",
+    "1 / 0",
+    "factorial(100000)",
+    "2 ** 5000",
+])
+def test_leaves_the_rest_to_the_llm(question):
+    assert evaluate_expression(question) is None
+
+@pytest.mark.parametrize("question", [
+    "pow(9, 10**9)",
+    "((10**1000)**1000)**1000",
+    "pow(pow(10, 1000), 1000)",
+])
+def test_oversized_powers_are_rejected_instantly(question):
+    started = time.perf_counter()
+    assert evaluate_expression(question) is None
+    assert time.perf_counter() - started < 1.0
+
+def test_normalizes_natural_language():
+    assert normalize_expression("What is 15% of 200?") == "(15/100)*200"
+    assert normalize_expression("sin(90 degrees)") == "sin(radians(90))"
+
+def test_batch_matches_scalar_evaluation():
+    questions = [f"{i} + 2 * 3" for i in range(20)] + [f"pow({i}, 3)" for i in range(10)] + ["what is love?"]
+    assert evaluate_batch(questions) == [evaluate_expression(question) for question in questions]
@@ -0,0 +1,84 @@
+import asyncio
+import sys
+import threading
+
+import pytest
+
+from basic_functions import amath_function, get_microbatch_stats
+from basic_functions.microbatch import MicroBatcher, _Item, parse_numbered
+from config import MICROBATCH_CONFIG
+
+math = sys.modules["basic_functions.math_function"]
+
+def _batcher(single):
+    return MicroBatcher("test_batch", math.SYSTEM_PROMPT, format_item=lambda value: " ".join(value.split()),
+                        single=single)
+
+def _drop_answers(mock_server, monkeypatch, *numbers):
+    """Make the mock's batched replies skip the given input numbers."""
+    reply_text = mock_server.reply_text
+
+    def reply(body):
+        lines = reply_text(body).splitlines()
+        return "\n".join(line for line in lines if not any(line.startswith(f"{n}. ") for n in numbers))
+
+    monkeypatch.setattr(mock_server, "reply_text", reply)
+
+def test_parse_numbered_drops_unattributable_lines():
+    response = "Here you go:\n1. four\n2) \n3: nine\n3. ten\n5. out of range\n4 . sixteen"
+    assert parse_numbered(response, 4) == {1: "four", 4: "sixteen"}
+
+def test_batch_is_split_back_to_callers(mock_server):
+    batcher = _batcher(single=lambda value: pytest.fail(f"{value!r} fell back"))
+    items = [_Item("two  apples"), _Item("three pears"), _Item("two apples")]
+    batcher._answer(items)
+
+    assert [item.future.result() for item in items] == ["42", "42", "42"]
+    assert mock_server.requests == 1
+    # Identical inputs are asked once
+    assert batcher.stats()["items"] == 2
+
+def test_unanswered_inputs_fall_back_concurrently(mock_server, monkeypatch):
+    _drop_answers(mock_server, monkeypatch, 2, 3)
+    # Both fallbacks must be running at once to get past the barrier
+    barrier = threading.Barrier(2, timeout=5)
+
+    def single(value):
+        barrier.wait()
+        return f"single {value}"
+
+    batcher = _batcher(single)
+    items = [_Item("one apple"), _Item("two pears"), _Item("six plums")]
+    batcher._answer(items)
+
+    assert [item.future.result() for item in items] == ["42", "single two pears", "single six plums"]
+    assert batcher.stats() == {"batches": 1, "items": 1, "fallbacks": 2, "pending": 0}
+
+def test_fallback_errors_reach_only_their_callers(mock_server, monkeypatch):
+    _drop_answers(mock_server, monkeypatch, 1)
+
+    def single(value):
+        raise RuntimeError(value)
+
+    batcher = _batcher(single)
+    items = [_Item("one apple"), _Item("two pears")]
+    batcher._answer(items)
+
+    with pytest.raises(RuntimeError):
+        items[0].future.result()
+    assert items[1].future.result() == "42"
+
+def test_missing_answers_are_asked_again_end_to_end(mock_server, monkeypatch):
+    monkeypatch.setitem(MICROBATCH_CONFIG, "enabled", True)
+    monkeypatch.setitem(MICROBATCH_CONFIG, "window", 0.5)
+    mock_server.latency = 0.1
+    _drop_answers(mock_server, monkeypatch, 2)
+    before = get_microbatch_stats()["math_function"]
+
+    async def run():
+        return await asyncio.gather(*(amath_function(f"What is {n} apples plus one apple?") for n in range(2, 6)))
+
+    assert asyncio.run(run()) == ["42"] * 4
+    after = get_microbatch_stats()["math_function"]
+    assert after["batches"] > before["batches"]
+    assert after["fallbacks"] > before["fallbacks"]
@@ -0,0 +1,113 @@
+import asyncio
+import threading
+
+import pytest
+
+from basic_functions.singleflight import SingleFlight, make_key
+
+def test_make_key_depends_on_every_part():
+    assert make_key("chat", "m", [{"a": 1}]) == make_key("chat", "m", [{"a": 1}])
+    assert make_key("chat", "m", [{"a": 1}]) != make_key("chat", "m", [{"a": 2}])
+    assert make_key({"x": 1, "y": 2}) == make_key({"y": 2, "x": 1})
+
+def test_concurrent_calls_share_one_execution():
+    flights = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def request():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "answer"
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flights.do("key", request)))
+    leader.start()
+    started.wait(5)
+    followers = [threading.Thread(target=lambda: results.append(flights.do("key", request))) for _ in range(3)]
+    for follower in followers:
+        follower.start()
+    while flights.stats()["merged"] < 3:
+        threading.Event().wait(0.001)
+    release.set()
+    for thread in [leader] + followers:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert sorted(results, key=lambda result: result[1]) == [("answer", False)] + [("answer", True)] * 3
+    assert flights.stats() == {"in_flight": 0, "leaders": 1, "merged": 3}
+
+def test_sequential_calls_run_again():
+    flights = SingleFlight()
+    assert flights.do("key", lambda: 1) == (1, False)
+    assert flights.do("key", lambda: 2) == (2, False)
+
+def test_exception_reaches_every_caller_and_is_not_kept():
+    flights = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+
+    def request():
+        started.set()
+        release.wait(5)
+        raise ValueError("backend down")
+
+    errors = []
+
+    def call():
+        try:
+            flights.do("key", request)
+        except ValueError as e:
+            errors.append(str(e))
+
+    leader = threading.Thread(target=call)
+    leader.start()
+    started.wait(5)
+    follower = threading.Thread(target=call)
+    follower.start()
+    while flights.stats()["merged"] < 1:
+        threading.Event().wait(0.001)
+    release.set()
+    leader.join(5)
+    follower.join(5)
+
+    assert errors == ["backend down", "backend down"]
+    assert flights.do("key", lambda: "recovered") == ("recovered", False)
+
+def test_async_calls_share_one_task():
+    flights = SingleFlight()
+    calls = []
+
+    async def request():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "answer"
+
+    async def main():
+        return await asyncio.gather(*(flights.ado("key", request) for _ in range(4)))
+
+    results = asyncio.run(main())
+    assert len(calls) == 1
+    assert sorted(shared for _, shared in results) == [False, True, True, True]
+    assert {result for result, _ in results} == {"answer"}
+
+def test_cancelled_leader_does_not_fail_followers():
+    flights = SingleFlight()
+
+    async def request():
+        await asyncio.sleep(0.02)
+        return "answer"
+
+    async def main():
+        leader = asyncio.ensure_future(flights.ado("key", request))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flights.ado("key", request))
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(main()) == ("answer", True)
@@ -0,0 +1,57 @@
+import sys
+
+import pytest
+
+from basic_functions import code_function_stream, web_function_stream
+
+web = sys.modules["basic_functions.web_function"]
+
+RESPONSE = '---HTML---\n<div class="card"><button>Go</button></div>\n---CSS---\n.card { gap: 1rem; }\n'
+
+def _sections(events):
+    html = "".join(text for section, text in events if section == "html")
+    css = "".join(text for section, text in events if section == "css")
+    return html.strip(), css.strip()
+
+def test_code_stream_yields_deltas_as_they_arrive(mock_server):
+    stream = code_function_stream("optimize", "def f(x):\n    return x + 1\n")
+    deltas = list(stream)
+
+    assert len(deltas) > 1
+    assert "".join(deltas) == stream.text
+    assert stream.time_to_first_token is not None
+    assert stream.finish_reason == "stop"
+    assert stream.closed
+
+def test_web_stream_emits_html_then_css_and_a_validated_result(mock_server):
+    stream = web_function_stream("component", "A share card")
+    events = list(stream)
+    sections = [section for section, _ in events]
+
+    assert sections == sorted(sections, key=["html", "css"].index)
+    assert _sections(events) == (stream.html, stream.css)
+    assert stream.result["html"].startswith('<div class="card">')
+    assert stream.result["validation"]["valid_css"] is True
+
+@pytest.mark.parametrize("size", [1, 3, 7, len(RESPONSE)])
+def test_section_parser_handles_markers_split_across_deltas(size):
+    parser = web._SectionParser()
+    events = []
+    for begin in range(0, len(RESPONSE), size):
+        events.extend(parser.feed(RESPONSE[begin:begin + size]))
+    parser.finish()
+    assert _sections(events) == ('<div class="card"><button>Go</button></div>', ".card { gap: 1rem; }")
+
+@pytest.mark.parametrize("response", [
+    "---CSS---\n.card {}",
+    "x" * (web.STREAM_MAX_PREAMBLE + 20),
+])
+def test_section_parser_rejects_malformed_responses_early(response):
+    with pytest.raises(ValueError):
+        web._SectionParser().feed(response)
+
+def test_section_parser_requires_a_css_section():
+    parser = web._SectionParser()
+    parser.feed("---HTML---\n<div></div>")
+    with pytest.raises(ValueError):
+        parser.finish()
@@ -0,0 +1,34 @@
+import asyncio
+import sys
+
+import pytest
+
+from basic_functions import astring_function, get_path_stats, register_operation, string_function
+
+strings = sys.modules["basic_functions.string_function"]
+
+@pytest.mark.parametrize("operation, text, expected", [
+    ("reverse", "hello world", "dlrow olleh"),
+    ("capitalize", "hello world", "HELLO WORLD"),
+    ("count_words", "hello  beautiful\tworld", "3"),
+    ("remove_punctuation", "Hello, World! How are you?", "Hello World How are you"),
+    (" Reverse ", "abc", "cba"),
+])
+def test_known_operations_run_locally(mock_server, operation, text, expected):
+    assert string_function(operation, text) == expected
+    assert asyncio.run(astring_function(operation, text)) == expected
+    assert mock_server.requests == 0
+
+def test_unknown_operations_go_to_the_llm(mock_server):
+    before = get_path_stats()
+    assert string_function("pig_latin", "hello")
+    assert mock_server.requests == 1
+    after = get_path_stats()
+    assert (after["llm"] - before["llm"], after["local"] - before["local"]) == (1, 0)
+
+def test_registered_operations_take_the_local_path(mock_server, monkeypatch):
+    monkeypatch.setattr(strings, "LOCAL_OPERATIONS", dict(strings.LOCAL_OPERATIONS))
+    register_operation("Snake_Case")(lambda text: "_".join(text.lower().split()))
+
+    assert string_function("snake_case", "Hello Big World") == "hello_big_world"
+    assert mock_server.requests == 0
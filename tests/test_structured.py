@@ -0,0 +1,86 @@
+import sys
+
+import pytest
+
+from basic_functions import debug_function, web_function
+from basic_functions.structured import field_text, parse_object, response_format, string_schema
+from config import STRUCTURED_OUTPUT_CONFIG
+
+debug = sys.modules["basic_functions.debug_function"]
+web = sys.modules["basic_functions.web_function"]
+
+ERROR = {"error_type": "KeyError", "error_message": "'name'", "traceback": "line 3, in main"}
+
+@pytest.fixture
+def structured_mode(monkeypatch):
+    monkeypatch.setitem(STRUCTURED_OUTPUT_CONFIG, "enabled", True)
+
+@pytest.fixture
+def request_bodies(mock_server, monkeypatch):
+    """Chat request bodies the mock server receives."""
+    bodies = []
+    reply_text = mock_server.reply_text
+
+    def reply(body):
+        bodies.append(body)
+        return reply_text(body)
+
+    monkeypatch.setattr(mock_server, "reply_text", reply)
+    return bodies
+
+@pytest.mark.parametrize("response", [
+    '{"html": "<p>hi</p>"}',
+    '  ```json\n{"html": "<p>hi</p>"}\n```  ',
+    '```\n{"html": "<p>hi</p>"}\n```',
+])
+def test_parse_object_reads_plain_and_fenced_json(response):
+    assert parse_object(response) == {"html": "<p>hi</p>"}
+
+@pytest.mark.parametrize("response", ["ANALYSIS:\nfine", '["html"]', '{"html": "<p>', ""])
+def test_parse_object_leaves_other_replies_to_the_text_parser(response):
+    assert parse_object(response) is None
+
+def test_field_text_renders_lists_as_bullets():
+    assert field_text(["check keys", "", "use .get()"]) == "- check keys\n- use .get()"
+    assert field_text(None) == ""
+    assert field_text("  text ") == "text"
+
+def test_response_format_follows_the_configured_mode(monkeypatch):
+    schema = string_schema(["html", "css"])
+    assert schema["required"] == ["html", "css"]
+    assert response_format("web_component", schema)["json_schema"] == {
+        "name": "web_component", "schema": schema, "strict": True}
+
+    monkeypatch.setitem(STRUCTURED_OUTPUT_CONFIG, "mode", "json_object")
+    assert response_format("web_component", schema) == {"type": "json_object"}
+
+def test_debug_sections_are_read_from_json():
+    sections = debug._parse_response('{"analysis": "No key", "root_cause": "Typo", "fix": "Rename",'
+                                     ' "prevention": ["Use .get()", "Add a test"]}')
+    assert sections == {"analysis": "No key", "root_cause": "Typo", "fix": "Rename",
+                        "prevention": "- Use .get()\n- Add a test"}
+
+    with pytest.raises(ValueError):
+        debug._parse_strict('{"analysis": "No key", "fix": "Rename"}')
+
+def test_web_json_without_html_is_rejected():
+    with pytest.raises(ValueError):
+        web._extract('{"html": "", "css": ".a { color: red; }"}')
+
+def test_debug_function_asks_for_json(structured_mode, request_bodies):
+    sections = debug_function(ERROR)
+
+    assert request_bodies[0]["response_format"]["json_schema"]["name"] == "debug_analysis"
+    assert all(value and value != "No information provided" for value in sections.values())
+    assert sections["prevention"].startswith("- ")
+
+def test_web_function_asks_for_json(structured_mode, request_bodies):
+    result = web_function("component", "A share card")
+
+    assert request_bodies[0]["response_format"]["json_schema"]["name"] == "web_component"
+    assert result["html"].startswith('<div class="card">')
+    assert result["validation"]["valid_css"] is True
+
+def test_text_mode_sends_no_response_format(request_bodies):
+    debug_function(ERROR)
+    assert "response_format" not in request_bodies[0]
@@ -0,0 +1,80 @@
+from applications.code_reviewer.reviewer import analyze_code_file
+from applications.code_reviewer.units import chunk_source, estimate_tokens, split_units
+from config import REVIEW_CONFIG
+
+SOURCE = '''import os
+from typing import List
+
+LIMIT = 10
+
+def load(path):
+    return open(path).read()
+
+class Store:
+    """Keeps items."""
+
+    def __init__(self):
+        self.items: List[str] = []
+
+    def add(self, item):
+        self.items.append(item)
+
+    def clear(self):
+        self.items = []
+
+if __name__ == "__main__":
+    print(load(os.devnull))
+'''
+
+def test_split_units_follows_top_level_statements():
+    units = split_units(SOURCE)
+    assert [(unit.name, unit.kind) for unit in units] == [
+        ("<module:1>", "module"), ("load", "function"), ("Store", "class"), ("<module:21>", "module")
+    ]
+    assert "".join(unit.source for unit in units).replace("\n", "") == SOURCE.replace("\n", "")
+
+def test_fingerprints_ignore_comments_and_formatting():
+    edited = SOURCE.replace("    return open(path).read()", "    # Read it all\n    return open( path ).read()")
+    before = {unit.name: unit.fingerprint for unit in split_units(SOURCE)}
+    after = {unit.name: unit.fingerprint for unit in split_units(edited)}
+    assert after["load"] == before["load"]
+
+    changed = {unit.name: unit.fingerprint for unit in split_units(SOURCE.replace("read()", "read(10)"))}
+    assert changed["load"] != before["load"]
+    assert changed["Store"] == before["Store"]
+
+def test_unparseable_source_is_one_unit():
+    units = split_units("def broken(:\n    pass\n")
+    assert [(unit.name, unit.kind, unit.start, unit.end) for unit in units] == [("<module>", "module", 1, 3)]
+
+def test_small_files_fit_in_one_chunk():
+    chunks = chunk_source(SOURCE, token_budget=10000)
+    assert len(chunks) == 1
+    assert chunks[0].kind == "group"
+    assert chunks[0].context == ""
+
+def test_oversized_classes_are_split_into_members_with_their_header():
+    chunks = chunk_source(SOURCE, token_budget=estimate_tokens(SOURCE) // 3)
+    members = [chunk for chunk in chunks if chunk.name.startswith("Store.")]
+
+    assert members
+    for chunk in members:
+        assert chunk.context.startswith("import os\nfrom typing import List\n")
+        assert 'class Store:\n    """Keeps items."""' in chunk.context
+    # Chunks stay in source order and never overlap
+    assert all(previous.end < chunk.start for previous, chunk in zip(chunks, chunks[1:]))
+
+def test_unpacked_chunks_hold_one_unit_each():
+    chunks = chunk_source(SOURCE, token_budget=10000, pack=False)
+    assert [chunk.name for chunk in chunks] == [unit.name for unit in split_units(SOURCE)]
+
+def test_large_files_are_reviewed_chunk_by_chunk(mock_server, tmp_path, monkeypatch):
+    path = tmp_path / "store.py"
+    path.write_text(SOURCE)
+    monkeypatch.setitem(REVIEW_CONFIG, "chunk_token_budget", estimate_tokens(SOURCE) // 3)
+    analysis = analyze_code_file(str(path), incremental=False)
+
+    names = [unit["name"] for unit in analysis["units"]]
+    assert len(names) > 1
+    assert analysis["errors"] == {}
+    assert mock_server.requests == 3 * len(names)
@@ -0,0 +1,83 @@
+import sqlite3
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from tests.conftest import root_dir
+from applications.vector_store import VectorStore
+
+@pytest.fixture
+def store(tmp_path):
+    store = VectorStore(str(tmp_path / "store"), dim=3, search_block=2)
+    yield store
+    store.close()
+
+def _add(store):
+    return store.add_vectors(
+        np.array([[1, 0, 0], [0, 1, 0], [0, 0, 1], [1, 1, 0]]),
+        texts=["x", "y", "z", "xy"],
+        metadatas=[{"axis": "x"}, {"axis": "y"}, {"axis": "z"}, None]
+    )
+
+def test_search_ranks_by_cosine_similarity(store):
+    _add(store)
+    results = store.search(np.array([1.0, 0.1, 0.0]), k=2)
+    assert [result["text"] for result in results] == ["x", "xy"]
+    assert results[0]["metadata"] == {"axis": "x"}
+    assert results[0]["score"] >= results[1]["score"]
+
+@pytest.mark.parametrize("k", [0, -1])
+def test_search_with_no_results_requested_returns_nothing(store, k):
+    _add(store)
+    assert store.search(np.array([1.0, 0.0, 0.0]), k=k) == []
+
+def test_search_with_large_k_returns_every_live_item(store):
+    _add(store)
+    assert len(store.search(np.array([1.0, 0.0, 0.0]), k=100)) == 4
+
+def test_deleted_items_are_skipped_and_compacted(store):
+    ids = _add(store)
+    assert store.delete([ids[0]]) == 1
+    assert "x" not in [result["text"] for result in store.search(np.array([1.0, 0.0, 0.0]), k=4)]
+    assert store.compact() == 1
+    assert len(store) == 3
+    assert store.search(np.array([1.0, 0.0, 0.0]), k=1)[0]["text"] == "xy"
+
+def test_reopened_store_keeps_its_items(tmp_path):
+    store = VectorStore(str(tmp_path / "store"), dim=3)
+    _add(store)
+    store.close()
+    store = VectorStore(str(tmp_path / "store"))
+    try:
+        assert len(store) == 4
+        assert store.search(np.array([0.0, 0.0, 1.0]), k=1)[0]["text"] == "z"
+    finally:
+        store.close()
+
+def test_applications_package_loads_numpy_lazily():
+    code = "import sys, applications; from applications import analyze_code_file; print('numpy' in sys.modules)"
+    output = subprocess.run([sys.executable, "-c", code], cwd=root_dir, capture_output=True, text=True, check=True)
+    assert output.stdout.strip() == "False"
+
+@pytest.mark.parametrize("vectors", [np.empty(0), np.empty((0, 3))])
+def test_adding_no_vectors_leaves_a_new_store_unset(tmp_path, vectors):
+    store = VectorStore(str(tmp_path / "store"))
+    try:
+        assert store.add_vectors(vectors) == []
+        assert store.dim is None
+        assert store.add_vectors(np.array([[1.0, 0.0]])) == [1]
+    finally:
+        store.close()
+
+def test_dimension_must_be_positive(tmp_path):
+    with pytest.raises(ValueError):
+        VectorStore(str(tmp_path / "store"), dim=0)
+
+def test_search_beyond_the_sqlite_parameter_limit(store):
+    store.add_vectors(np.random.default_rng(0).random((2000, 3)))
+    # SQLite before 3.32 allows only 999 bound parameters
+    store._db.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, 999)
+    results = store.search(np.array([1.0, 1.0, 1.0]), k=1500)
+    assert len({result["id"] for result in results}) == 1500
@@ -0,0 +1,53 @@
+import asyncio
+import sys
+
+import pytest
+from PIL import Image
+
+from basic_functions import avision_function, vision_function
+
+vision = sys.modules["basic_functions.vision_function"]
+
+@pytest.fixture
+def image_path(tmp_path):
+    path = tmp_path / "photo.png"
+    Image.new("RGB", (64, 48), (20, 120, 200)).save(path)
+    return str(path)
+
+def test_parse_multi_response_tolerates_loose_markers():
+    operations = vision._normalize_operations(["caption", ("count people", "How many people?")])
+    response = "Sure!\n--- CAPTION ---\nA dog.\n---count_people---\nTwo\n---EXTRA---\nIgnored\n"
+    assert vision._parse_multi_response(response, operations) == {"caption": "A dog.", "count people": "Two"}
+
+def test_parse_multi_response_drops_empty_answers():
+    operations = vision._normalize_operations(["caption", "describe"])
+    assert vision._parse_multi_response("---CAPTION---\n\n---DESCRIBE---\nA park.", operations) == {
+        "describe": "A park."
+    }
+
+def test_duplicate_operations_are_rejected():
+    with pytest.raises(ValueError):
+        vision._normalize_operations(["caption", ("caption", "Again?")])
+
+def test_operations_are_answered_in_one_request(mock_server, image_path):
+    answers = vision_function(["caption", "describe", ("colors", "Which colors dominate?")], image_path)
+    assert list(answers) == ["caption", "describe", "colors"]
+    assert all(answers.values())
+    assert mock_server.requests == 1
+
+def test_skipped_operations_are_asked_separately(mock_server, image_path, monkeypatch):
+    parse = vision._parse_multi_response
+
+    def drop_describe(response, operations):
+        answers = parse(response, operations)
+        answers.pop("describe", None)
+        return answers
+
+    monkeypatch.setattr(vision, "_parse_multi_response", drop_describe)
+    answers = vision_function(["caption", "describe"], image_path)
+    assert all(answers.values())
+    assert mock_server.requests == 2
+
+    answers = asyncio.run(avision_function(["caption", "describe"], image_path))
+    assert all(answers.values())
+    assert mock_server.requests == 4
@@ -0,0 +1,52 @@
+import time
+
+from basic_functions import get_warmup_report, loaded_models, start_keepalive, stop_keepalive, warmup
+from config import OLLAMA_CONFIG, WARMUP_CONFIG
+
+def test_warmup_loads_each_model_once(mock_server):
+    models = [OLLAMA_CONFIG["model"], OLLAMA_CONFIG["embedding_model"]]
+    results = warmup(models)
+
+    assert list(results) == models
+    for result in results.values():
+        assert result["status"] == "ok"
+        assert result["cold"] is False
+        assert result["wall_seconds"] >= 0
+    assert mock_server.requests == 2
+    assert get_warmup_report()[OLLAMA_CONFIG["model"]]["status"] == "ok"
+
+def test_default_models_are_loaded_once(mock_server, monkeypatch):
+    monkeypatch.setitem(WARMUP_CONFIG, "models", None)
+    monkeypatch.setitem(OLLAMA_CONFIG, "cascade", None)
+    monkeypatch.setitem(OLLAMA_CONFIG, "vision_model", OLLAMA_CONFIG["model"])
+    results = warmup()
+
+    assert list(results) == [OLLAMA_CONFIG["model"], OLLAMA_CONFIG["embedding_model"]]
+    assert mock_server.requests == 2
+
+def test_background_warmup_returns_a_future(mock_server):
+    future = warmup([OLLAMA_CONFIG["model"]], background=True)
+    assert future.result(timeout=5)[OLLAMA_CONFIG["model"]]["status"] == "ok"
+
+def test_failed_loads_are_reported_not_raised(mock_server):
+    mock_server.error_rate = 1.0
+    result = warmup([OLLAMA_CONFIG["model"]])[OLLAMA_CONFIG["model"]]
+    assert result["status"] == "error"
+    assert "500" in result["error"]
+
+def test_loaded_models_lists_resident_models(mock_server):
+    assert [entry["name"] for entry in loaded_models()] == [OLLAMA_CONFIG["model"]]
+
+def test_keepalive_pings_until_stopped(mock_server):
+    start_keepalive(0.05, models=[OLLAMA_CONFIG["model"]])
+    try:
+        deadline = time.monotonic() + 5
+        while mock_server.requests < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        stop_keepalive()
+    pinged = mock_server.requests
+    assert pinged >= 2
+
+    time.sleep(0.15)
+    assert mock_server.requests == pinged
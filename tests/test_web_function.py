@@ -0,0 +1,47 @@
+import sys
+
+import pytest
+
+from basic_functions import batch_web_function, web_function
+
+web = sys.modules["basic_functions.web_function"]
+
+@pytest.mark.parametrize("css", [
+    "",
+    ".card { color: red; padding: 4px }",
+    "@media (max-width: 600px) { .card { display: none; } }",
+    "@import url('theme.css');\n:root { --gap: 4px; }",
+    "a::after { content: '}'; }",
+    "/* note */ .a { margin: 0 auto; }",
+])
+def test_check_css_accepts_valid_stylesheets(css):
+    assert web._check_css(css) == []
+
+@pytest.mark.parametrize("css, error", [
+    (".card { color: red;", "1 unclosed '{'"),
+    (".card { color: red; } }", "Line 1: unexpected '}'"),
+    ("{ color: red; }", "Line 1: rule without a selector"),
+    (".card {\n  color; }", "Line 2: invalid declaration 'color'"),
+    (".card { color: ; }", "Line 1: 'color' has no value"),
+    (".card { color: red; } /* open", "Unterminated comment"),
+    (".card { content: 'open;\n}", "Line 1: unterminated string"),
+])
+def test_check_css_reports_errors_with_line_numbers(css, error):
+    assert error in web._check_css(css)
+
+def test_extract_rejects_a_reply_without_sections():
+    with pytest.raises(ValueError):
+        web._extract("Here is your component!")
+
+def test_web_function_returns_validated_component(mock_server):
+    result = web_function("component", "A pricing card")
+    assert "<" in result["html"]
+    assert result["validation"]["valid_css"] is True
+
+def test_batch_web_function_keeps_every_spec(mock_server):
+    specs = [("component", f"Button {i}") for i in range(6)] + [("form", "A signup form", "minimal")]
+    items = sorted(batch_web_function(specs, max_workers=3), key=lambda item: item["index"])
+    assert [item["index"] for item in items] == list(range(len(specs)))
+    assert all(item["error"] is None for item in items)
+    assert items[-1]["style"] == "minimal"
+    assert all("valid_css" in item["validation"] for item in items)